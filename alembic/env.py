@@ -5,7 +5,11 @@ from sqlalchemy import pool
 
 from alembic import context
 
+from app.models.batch_job import BatchItem, BatchJob
+from app.models.conversation_message import ConversationMessage
 from app.models.conversation_thread import ConversationThread
+from app.models.run_metric import RunMetric
+from app.models.thread_deletion import ThreadDeletion
 from app.models.user import User
 from app.src.db import Base
 
@@ -0,0 +1,28 @@
+"""Add message embedded flag for semantic search
+
+Revision ID: 3d8a5c1e9f26
+Revises: 9b4e2f7a6c15
+Create Date: 2026-10-19 18:05:37.441902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8a5c1e9f26'
+down_revision: Union[str, None] = '9b4e2f7a6c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversation_messages', sa.Column('embedded', sa.Boolean(), server_default='false', nullable=False))
+    op.create_index('ix_conversation_messages_unembedded', 'conversation_messages', ['user_id'], unique=False, postgresql_where=sa.text('embedded IS false'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_messages_unembedded', table_name='conversation_messages', postgresql_where=sa.text('embedded IS false'))
+    op.drop_column('conversation_messages', 'embedded')
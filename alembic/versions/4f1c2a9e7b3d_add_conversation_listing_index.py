@@ -0,0 +1,39 @@
+"""Add conversation listing index
+
+Revision ID: 4f1c2a9e7b3d
+Revises: 35d2c30e57b9
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c2a9e7b3d'
+down_revision: Union[str, None] = '35d2c30e57b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so large tables stay writable during the upgrade.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_conversation_threads_user_id_created_at_id',
+            'conversation_threads',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_conversation_threads_user_id_created_at_id',
+            table_name='conversation_threads',
+            postgresql_concurrently=True,
+        )
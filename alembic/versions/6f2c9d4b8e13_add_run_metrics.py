@@ -0,0 +1,44 @@
+"""Add run metrics
+
+Revision ID: 6f2c9d4b8e13
+Revises: 3d8a5c1e9f26
+Create Date: 2026-10-19 19:22:48.109374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2c9d4b8e13'
+down_revision: Union[str, None] = '3d8a5c1e9f26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('run_metrics',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('run_id', sa.String(length=64), nullable=False),
+    sa.Column('thread_id', sa.String(length=120), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('model', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('streamed', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('wall_ms', sa.Integer(), nullable=False),
+    sa.Column('polls', sa.SmallInteger(), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+    sa.Column('completion_tokens', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_run_metrics_created_at', 'run_metrics', ['created_at'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_run_metrics_created_at', table_name='run_metrics', postgresql_using='brin')
+    op.drop_table('run_metrics')
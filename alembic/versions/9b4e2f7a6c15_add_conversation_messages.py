@@ -0,0 +1,45 @@
+"""Add conversation messages for full-text search
+
+Revision ID: 9b4e2f7a6c15
+Revises: e5b19d7c3f42
+Create Date: 2026-10-19 16:47:12.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e2f7a6c15'
+down_revision: Union[str, None] = 'e5b19d7c3f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Needed to put the scalar user_id column into the GIN index.
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+    op.create_table('conversation_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.String(length=120), nullable=True),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', content)", persisted=True), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversation_threads.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_conversation_messages_conversation_id', 'conversation_messages', ['conversation_id'], unique=False)
+    op.create_index('ix_conversation_messages_user_id_search_vector', 'conversation_messages', ['user_id', 'search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_messages_user_id_search_vector', table_name='conversation_messages', postgresql_using='gin')
+    op.drop_index('ix_conversation_messages_conversation_id', table_name='conversation_messages')
+    op.drop_table('conversation_messages')
@@ -0,0 +1,28 @@
+"""Add version counters
+
+Revision ID: a7d3e5c1f920
+Revises: 4f1c2a9e7b3d
+Create Date: 2026-10-19 10:03:27.540112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5c1f920'
+down_revision: Union[str, None] = '4f1c2a9e7b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('conversations_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('conversation_threads', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('conversation_threads', 'version')
+    op.drop_column('users', 'conversations_version')
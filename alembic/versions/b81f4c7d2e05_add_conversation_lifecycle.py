@@ -0,0 +1,118 @@
+"""Add conversation lifecycle columns and thread deletion queue
+
+Revision ID: b81f4c7d2e05
+Revises: 6f2c9d4b8e13
+Create Date: 2026-10-19 21:04:16.573920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4c7d2e05'
+down_revision: Union[str, None] = '6f2c9d4b8e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('thread_deletions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('thread_id', sa.String(length=120), nullable=False),
+    sa.Column('requested_at', sa.DateTime(), nullable=True),
+    sa.Column('attempts', sa.SmallInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('thread_id')
+    )
+    op.add_column('conversation_threads', sa.Column('last_activity_at', sa.DateTime(), nullable=True))
+    op.add_column('conversation_threads', sa.Column('archived_at', sa.DateTime(), nullable=True))
+    op.add_column('conversation_threads', sa.Column('remote_deleted_at', sa.DateTime(), nullable=True))
+    # Listings now only match rows with an explicit status.
+    op.execute("UPDATE conversation_threads SET status = 'active' WHERE status IS NULL")
+    # Without a backfill the first lifecycle pass would judge existing rows by
+    # created_at and archive conversations still in use. Rows without local
+    # messages get a full idle period from now.
+    op.execute(
+        """
+        UPDATE conversation_threads AS c
+        SET last_activity_at = coalesce(
+            (
+                SELECT max(m.created_at)
+                FROM conversation_messages AS m
+                WHERE m.conversation_id = c.id
+            ),
+            timezone('utc', now())
+        )
+        """
+    )
+
+    # Built concurrently so large tables stay writable during the upgrade.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_conversation_threads_active_listing',
+            'conversation_threads',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_conversation_threads_archived_listing',
+            'conversation_threads',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text("status = 'archived'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_conversation_threads_idle',
+            'conversation_threads',
+            [sa.text('coalesce(last_activity_at, created_at)')],
+            unique=False,
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_conversation_threads_remote_pending',
+            'conversation_threads',
+            ['archived_at'],
+            unique=False,
+            postgresql_where=sa.text(
+                "status = 'archived' AND remote_deleted_at IS NULL"
+            ),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_conversation_threads_user_id_created_at_id',
+            table_name='conversation_threads',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_conversation_threads_user_id_created_at_id',
+            'conversation_threads',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        for name in (
+            'ix_conversation_threads_remote_pending',
+            'ix_conversation_threads_idle',
+            'ix_conversation_threads_archived_listing',
+            'ix_conversation_threads_active_listing',
+        ):
+            op.drop_index(
+                name,
+                table_name='conversation_threads',
+                postgresql_concurrently=True,
+            )
+    op.drop_column('conversation_threads', 'remote_deleted_at')
+    op.drop_column('conversation_threads', 'archived_at')
+    op.drop_column('conversation_threads', 'last_activity_at')
+    op.drop_table('thread_deletions')
@@ -0,0 +1,26 @@
+"""Add conversation title
+
+Revision ID: c2e8b6f4d1a7
+Revises: a7d3e5c1f920
+Create Date: 2026-10-19 13:41:08.226351
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8b6f4d1a7'
+down_revision: Union[str, None] = 'a7d3e5c1f920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversation_threads', sa.Column('title', sa.String(length=120), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversation_threads', 'title')
@@ -0,0 +1,26 @@
+"""Add batch job attempts
+
+Revision ID: d4a9c7e1b352
+Revises: b81f4c7d2e05
+Create Date: 2026-10-20 09:42:11.305718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9c7e1b352'
+down_revision: Union[str, None] = 'b81f4c7d2e05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('batch_jobs', sa.Column('attempts', sa.SmallInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('batch_jobs', 'attempts')
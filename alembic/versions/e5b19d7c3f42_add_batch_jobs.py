@@ -0,0 +1,59 @@
+"""Add batch jobs
+
+Revision ID: e5b19d7c3f42
+Revises: c2e8b6f4d1a7
+Create Date: 2026-10-19 15:20:54.918377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b19d7c3f42'
+down_revision: Union[str, None] = 'c2e8b6f4d1a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('batch_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('mode', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('upstream_batch_id', sa.String(length=120), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_batch_jobs_status', 'batch_jobs', ['status'], unique=False)
+    op.create_table('batch_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('line_number', sa.Integer(), nullable=False),
+    sa.Column('custom_id', sa.String(length=120), nullable=True),
+    sa.Column('prompt', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('response', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['batch_jobs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_batch_items_job_id_status_line', 'batch_items', ['job_id', 'status', 'line_number'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_batch_items_job_id_status_line', table_name='batch_items')
+    op.drop_table('batch_items')
+    op.drop_index('ix_batch_jobs_status', table_name='batch_jobs')
+    op.drop_table('batch_jobs')
@@ -1,28 +1,73 @@
-from flask import Flask, request, jsonify, make_response
+from flask import (
+    Flask,
+    Response,
+    request,
+    jsonify,
+    make_response,
+    stream_with_context,
+)
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
-from app.src.db import get_db
+from app.src.compression import init_compression
+from app.src.db import get_db, check_connection
+from app.src.etag import make_etag, not_modified, with_etag
+from app.src.json_provider import init_json
+from app.src.lifecycle import latest_local_messages, local_messages, revive
+from app.src.logging_setup import configure_logging, init_request_ids
+from app.src.metrics import init_metrics
+from app.src.pagination import (
+    decode_cursor,
+    encode_cursor,
+    parse_limit,
+    parse_timestamp,
+)
+from app.src.prefetch import (
+    PREFETCH_WAIT_SECONDS,
+    prefetch,
+    schedule_prefetch,
+    take_prefetched,
+)
+from app.src.search import capture_messages
+from app.src.semantic import schedule_indexing
+from app.src.streaming import (
+    NDJSON_MIMETYPE,
+    SSE_MIMETYPE,
+    json_object_chunks,
+    ndjson_lines,
+    sse_events,
+)
 from app.models.user import User
-from app.models.conversation_thread import ConversationThread
+from app.models.conversation_thread import (
+    ACTIVE,
+    ARCHIVED,
+    TITLE_LENGTH,
+    ConversationThread,
+)
 from app.api.auth import token_required, authenticate_user, generate_token
+from app.api.admin import admin_bp
+from app.api.batch import batch_bp
+from app.api.lifecycle import lifecycle_bp
+from app.api.search import search_bp
+from app.api.transfer import transfer_bp
 import logging
 from typing import Iterator, Dict, Any
 from http import HTTPStatus
-from app.assistants.openai import OpenAIAssistant
+from app.assistants.openai import get_assistant
 
 app = Flask(__name__)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Logs to a file
-        logging.StreamHandler(),  # Also logs to the console
-    ],
-)
+init_json(app)
+init_request_ids(app)
+init_metrics(app)
+init_compression(app)
+app.register_blueprint(batch_bp)
+app.register_blueprint(transfer_bp)
+app.register_blueprint(search_bp)
+app.register_blueprint(admin_bp)
+app.register_blueprint(lifecycle_bp)
+
+configure_logging()
 logger = logging.getLogger(__name__)
 
-openai_client = OpenAIAssistant()
-
 
 def get_database_session() -> Iterator[Session]:
     db = next(get_db())
@@ -96,6 +141,8 @@ def login() -> Dict[str, Any]:
     if user:
         token = generate_token(user.id)
         logger.info(f"User logged in: {email}")
+        # The app opens on the newest conversation; warm its messages now.
+        schedule_prefetch(user.id)
 
         response = make_response(
             jsonify({"message": "Login successful"}), HTTPStatus.OK
@@ -125,7 +172,7 @@ def get_user_info(current_user: User) -> Dict[str, Any]:
 @token_required
 def create_conversation(current_user: User) -> Dict[str, Any]:
 
-    thread_id = openai_client.create_thread()
+    thread_id = get_assistant().create_thread()
     if not thread_id:
         logger.error("Error creating conversation thread")
         return (
@@ -133,7 +180,7 @@ def create_conversation(current_user: User) -> Dict[str, Any]:
             HTTPStatus.INTERNAL_SERVER_ERROR,
         )
 
-    assistant_id = openai_client.get_assistant_id()
+    assistant_id = get_assistant().get_assistant_id()
     if not assistant_id:
         logger.error("Error getting assistant ID")
         return (
@@ -148,6 +195,10 @@ def create_conversation(current_user: User) -> Dict[str, Any]:
     )
     db_session = next(get_database_session())
     db_session.add(new_conversation)
+    db_session.query(User).filter_by(id=current_user.id).update(
+        {User.conversations_version: User.conversations_version + 1},
+        synchronize_session=False,
+    )
     db_session.commit()
     logger.info(f"Conversation thread created with ID: {new_conversation.id}")
 
@@ -159,29 +210,222 @@ def create_conversation(current_user: User) -> Dict[str, Any]:
     )
 
 
+MAX_PREVIEW_IDS = 50
+
+
+def conversation_to_dict(conversation: ConversationThread) -> Dict[str, Any]:
+    return {
+        "id": conversation.id,
+        "thread_id": conversation.thread_id,
+        "assistant_id": conversation.assistant_id,
+        "title": conversation.title,
+        "created_at": conversation.created_at,
+        "status": conversation.status,
+        "archived_at": conversation.archived_at,
+    }
+
+
 @app.route("/conversations", methods=["GET"])
 @token_required
 def list_conversations(current_user: User) -> Dict[str, Any]:
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        cursor = request.args.get("cursor")
+        after = decode_cursor(cursor) if cursor else None
+        created_after = parse_timestamp(request.args.get("created_after"))
+        created_before = parse_timestamp(request.args.get("created_before"))
+    except ValueError as e:
+        logger.warning(f"Invalid listing parameters: {str(e)}")
+        return (
+            jsonify({"error": "Invalid limit, cursor or date filter"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+    # Archived conversations are listed separately, each from its own
+    # partial index.
+    status = request.args.get("status", ACTIVE)
+    if status not in (ACTIVE, ARCHIVED):
+        return (
+            jsonify({"error": f"status must be '{ACTIVE}' or '{ARCHIVED}'"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+    # ?include_latest_messages=1 returns the newest conversation's messages
+    # inline, saving the client its follow-up request.
+    include_latest = (
+        request.args.get("include_latest_messages") in ("1", "true")
+        and status == ACTIVE
+        and not after
+    )
+
+    # The user row is already loaded by token_required, so a matching
+    # validator is answered without touching the conversations table. The
+    # inline messages change without the listing, so they skip it.
+    etag = make_etag(
+        "conversations", current_user.id, current_user.conversations_version
+    )
+    if not include_latest:
+        cached = not_modified(etag)
+        if cached:
+            # A revalidating client already holds the listing and, most
+            # likely, the newest conversation's messages: no prefetch.
+            return cached
+        if status == ACTIVE and not after:
+            # Opening the app lists the first page, then opens the newest
+            # conversation.
+            schedule_prefetch(current_user.id)
+
     db_session = next(get_database_session())
+    query = db_session.query(ConversationThread).filter(
+        ConversationThread.user_id == current_user.id
+    )
+    query = query.filter(ConversationThread.status == status)
+    # Filters narrow the per-user range of the listing index, so no extra
+    # index is needed for them.
+    if created_after:
+        query = query.filter(ConversationThread.created_at >= created_after)
+    if created_before:
+        query = query.filter(ConversationThread.created_at < created_before)
+    title_prefix = request.args.get("q", "").strip().lower()
+    if title_prefix:
+        escaped = (
+            title_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        query = query.filter(
+            func.lower(ConversationThread.title).like(f"{escaped}%", escape="\\")
+        )
+    if after:
+        query = query.filter(
+            tuple_(ConversationThread.created_at, ConversationThread.id)
+            < tuple_(*after)
+        )
+    # Fetch one extra row to know whether another page exists.
     conversations = (
-        db_session.query(ConversationThread).filter_by(user_id=current_user.id).all()
+        query.order_by(
+            ConversationThread.created_at.desc(), ConversationThread.id.desc()
+        )
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(conversations) > limit
+    conversations = conversations[:limit]
+    next_cursor = (
+        encode_cursor(conversations[-1].created_at, conversations[-1].id)
+        if has_more
+        else None
     )
+
     logger.info(f"Conversations listed for user ID: {current_user.id}")
-    return (
-        jsonify(
-            [
-                {
-                    "id": conversation.id,
-                    "thread_id": conversation.thread_id,
-                    "assistant_id": conversation.assistant_id,
-                    "created_at": conversation.created_at,
-                    "status": conversation.status,
-                }
-                for conversation in conversations
-            ]
-        ),
-        HTTPStatus.OK,
+    body = {
+        "conversations": [
+            conversation_to_dict(conversation) for conversation in conversations
+        ],
+        "next_cursor": next_cursor,
+    }
+    if not include_latest:
+        return with_etag(make_response(jsonify(body), HTTPStatus.OK), etag)
+
+    body["latest_messages"] = None
+    # Filters may have hidden the newest conversation; inline the first
+    # one listed, which is what the client will open.
+    if conversations:
+        latest = conversations[0]
+        # Shares the fetch with a prefetch already in flight, if any. The
+        # pool is shared by all users, so the listing never waits on it for
+        # longer than a follow-up request would.
+        future = prefetch(latest.id, latest.version, latest.thread_id)
+        try:
+            messages = future.result(timeout=PREFETCH_WAIT_SECONDS)
+        except Exception as e:
+            logger.warning(
+                f"Inline messages of conversation {latest.id} unavailable: {e!r}"
+            )
+            messages = None
+        if messages is not None:
+            body["latest_messages"] = {
+                "conversation_id": latest.id,
+                "messages": messages,
+            }
+    return jsonify(body), HTTPStatus.OK
+
+
+@app.route("/conversations/previews", methods=["POST"])
+@token_required
+def get_conversation_previews(current_user: User) -> Dict[str, Any]:
+    data = request.get_json(silent=True)
+    if not data:
+        logger.warning("Empty JSON request body")
+        return jsonify({"error": "Request body must be JSON"}), HTTPStatus.BAD_REQUEST
+
+    conversation_ids = data.get("conversation_ids")
+    if (
+        not isinstance(conversation_ids, list)
+        or not conversation_ids
+        or not all(
+            isinstance(conversation_id, int) and not isinstance(conversation_id, bool)
+            for conversation_id in conversation_ids
+        )
+    ):
+        logger.warning("Invalid conversation_ids in preview request")
+        return (
+            jsonify({"error": "conversation_ids must be a non-empty list of IDs"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    if len(conversation_ids) > MAX_PREVIEW_IDS:
+        return (
+            jsonify({"error": f"At most {MAX_PREVIEW_IDS} conversations per request"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    db_session = next(get_database_session())
+    conversations = {
+        conversation.id: conversation
+        for conversation in db_session.query(ConversationThread).filter(
+            ConversationThread.user_id == current_user.id,
+            ConversationThread.id.in_(conversation_ids),
+        )
+    }
+
+    # One parallel fan-out instead of one sequential round trip per thread.
+    # Threads deleted upstream are previewed from their stored messages.
+    last_messages = get_assistant().get_last_messages(
+        [
+            conversation.thread_id
+            for conversation in conversations.values()
+            if conversation.remote_deleted_at is None
+        ]
+    )
+    local_last_messages = latest_local_messages(
+        db_session,
+        [
+            conversation.id
+            for conversation in conversations.values()
+            if conversation.remote_deleted_at is not None
+        ],
+    )
+
+    previews = []
+    for conversation_id in conversation_ids:
+        conversation = conversations.get(conversation_id)
+        if conversation is None:
+            previews.append(
+                {"conversation_id": conversation_id, "error": "Conversation not found"}
+            )
+            continue
+        if conversation.remote_deleted_at is not None:
+            result = local_last_messages.get(conversation_id)
+        else:
+            result = last_messages[conversation.thread_id]
+        if isinstance(result, Exception):
+            previews.append(
+                {"conversation_id": conversation_id, "error": "Failed to fetch preview"}
+            )
+        else:
+            previews.append({"conversation_id": conversation_id, "message": result})
+
+    logger.info(
+        f"Previews fetched for {len(conversations)} conversations of user {current_user.id}"
     )
+    return jsonify({"previews": previews}), HTTPStatus.OK
 
 
 @app.route("/conversations/<int:conversation_id>/messages", methods=["POST"])
@@ -210,12 +454,47 @@ def send_message(current_user: User, conversation_id: int) -> Dict[str, Any]:
         )
         return jsonify({"error": "Conversation not found"}), HTTPStatus.NOT_FOUND
 
-    openai_response = openai_client.send_message(
+    if conversation.status == ARCHIVED:
+        # A new message revives an archived conversation, unless the
+        # lifecycle job already deleted its thread.
+        if not revive(db_session, conversation):
+            return (
+                jsonify(
+                    {"error": "The conversation's thread was deleted; it is read-only"}
+                ),
+                HTTPStatus.CONFLICT,
+            )
+        db_session.commit()
+
+    if conversation.title is None:
+        # The first message names the conversation in listings.
+        conversation.title = message.strip()[:TITLE_LENGTH]
+        db_session.query(User).filter_by(id=current_user.id).update(
+            {User.conversations_version: User.conversations_version + 1},
+            synchronize_session=False,
+        )
+        # Committed before the run, which can take minutes, so the user's
+        # row is not held locked and listings see the title at once.
+        db_session.commit()
+
+    if data.get("stream"):
+        return stream_message_reply(db_session, conversation, message)
+
+    openai_response = get_assistant().send_message(
         thread_id=conversation.thread_id,
         assistant_id=conversation.assistant_id,
         message=message,
+        user_id=current_user.id,
     )
 
+    # Even a failed run may have added the user's message upstream.
+    sent = [{"role": "user", "content": [message]}]
+    if openai_response:
+        sent.append({"role": "assistant", "content": [openai_response]})
+    capture_messages(db_session, conversation, sent)
+    bump_thread_version(db_session, conversation.id)
+    schedule_indexing(current_user.id)
+
     if not openai_response:
         logger.error("Error sending message to OpenAI")
         return (
@@ -227,6 +506,56 @@ def send_message(current_user: User, conversation_id: int) -> Dict[str, Any]:
     return jsonify(openai_response), HTTPStatus.OK
 
 
+def bump_thread_version(db_session: Session, conversation_id: int) -> None:
+    db_session.query(ConversationThread).filter_by(id=conversation_id).update(
+        {
+            ConversationThread.version: ConversationThread.version + 1,
+            ConversationThread.last_activity_at: func.timezone("utc", func.now()),
+        },
+        synchronize_session=False,
+    )
+    db_session.commit()
+
+
+def stream_message_reply(
+    db_session: Session, conversation: ConversationThread, message: str
+) -> Response:
+    """Relays the assistant's reply as server-sent ``delta`` events, ending
+    with a ``done`` event carrying the final messages (or an ``error``)."""
+    conversation_id = conversation.id
+    user_id = conversation.user_id
+    events = get_assistant().stream_message(
+        thread_id=conversation.thread_id,
+        assistant_id=conversation.assistant_id,
+        message=message,
+        user_id=user_id,
+    )
+
+    # The done event carries the stored messages, upstream IDs included.
+    final_messages = [{"role": "user", "content": [message]}]
+
+    def relay() -> Iterator[Dict[str, Any]]:
+        for event in events:
+            if event["type"] == "done":
+                final_messages[:] = reversed(event["messages"])
+            yield event
+
+    def generate() -> Iterator[str]:
+        try:
+            yield from sse_events(relay(), app.json.dumps)
+        finally:
+            capture_messages(db_session, conversation, final_messages)
+            bump_thread_version(db_session, conversation_id)
+            schedule_indexing(user_id)
+            logger.info(f"Streamed message to conversation {conversation_id}")
+
+    response = Response(stream_with_context(generate()), mimetype=SSE_MIMETYPE)
+    response.headers["Cache-Control"] = "no-cache"
+    # Ask reverse proxies not to buffer the event stream.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @app.route("/conversations/<int:conversation_id>/messages", methods=["GET"])
 @token_required
 def get_conversation_messages(
@@ -246,8 +575,54 @@ def get_conversation_messages(
             )
             return jsonify({"error": "Conversation not found"}), HTTPStatus.NOT_FOUND
 
-        # Fetch the thread messages from OpenAI
-        messages = openai_client.get_thread_messages(conversation.thread_id)
+        etag = make_etag("messages", conversation.id, conversation.version)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        if conversation.remote_deleted_at is not None:
+            # The thread is gone upstream; serve the stored copy whole.
+            response = make_response(
+                jsonify(
+                    {
+                        "conversation_id": conversation_id,
+                        "messages": local_messages(db_session, conversation.id),
+                    }
+                ),
+                HTTPStatus.OK,
+            )
+            return with_etag(response, etag)
+
+        # ?stream=ndjson or ?stream=json sends messages as upstream pages
+        # arrive, so memory stays flat however long the thread is.
+        stream = request.args.get("stream")
+        if stream and stream not in ("ndjson", "json"):
+            return (
+                jsonify({"error": "stream must be 'ndjson' or 'json'"}),
+                HTTPStatus.BAD_REQUEST,
+            )
+        if stream:
+            return stream_conversation_messages(
+                conversation_id, conversation.thread_id, stream, etag
+            )
+
+        try:
+            limit_arg = request.args.get("limit")
+            limit = parse_limit(limit_arg) if limit_arg else None
+        except ValueError:
+            return jsonify({"error": "Invalid limit"}), HTTPStatus.BAD_REQUEST
+
+        # Fetch the thread messages from OpenAI. ?after=<message id> returns
+        # only newer messages; ?before=<message id> pages back in history.
+        after = request.args.get("after")
+        before = request.args.get("before")
+        messages = None
+        if not after and not before:
+            messages = take_prefetched(conversation.id, conversation.version, limit)
+        if messages is None:
+            messages = get_assistant().get_thread_messages(
+                conversation.thread_id, limit=limit, after=after, before=before
+            )
 
         if not messages and not isinstance(messages, list):
             logger.error("Error fetching conversation messages")
@@ -258,7 +633,7 @@ def get_conversation_messages(
                 HTTPStatus.INTERNAL_SERVER_ERROR,
             )
 
-        return (
+        response = make_response(
             jsonify(
                 {
                     "conversation_id": conversation_id,
@@ -267,6 +642,7 @@ def get_conversation_messages(
             ),
             HTTPStatus.OK,
         )
+        return with_etag(response, etag)
 
     except Exception as e:
         logger.error(
@@ -278,6 +654,22 @@ def get_conversation_messages(
         )
 
 
+def stream_conversation_messages(
+    conversation_id: int, thread_id: str, mode: str, etag: str
+) -> Response:
+    messages = get_assistant().iter_thread_messages(thread_id)
+    if mode == "ndjson":
+        body = ndjson_lines(messages, app.json.dumps)
+        mimetype = NDJSON_MIMETYPE
+    else:
+        body = json_object_chunks(
+            {"conversation_id": conversation_id}, "messages", messages, app.json.dumps
+        )
+        mimetype = "application/json"
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    return with_etag(response, etag)
+
+
 @app.route("/conversations/<int:conversation_id>/thread", methods=["GET"])
 @token_required
 def get_conversation_thread(conversation_id: int, current_user: User) -> Dict[str, Any]:
@@ -295,8 +687,14 @@ def get_conversation_thread(conversation_id: int, current_user: User) -> Dict[st
             )
             return jsonify({"error": "Conversation not found"}), HTTPStatus.NOT_FOUND
 
-        # Fetch the thread messages from OpenAI
-        thread = openai_client.get_thread(conversation.thread_id).to_json()
+        if conversation.remote_deleted_at is not None:
+            return (
+                jsonify({"error": "The conversation's thread was deleted"}),
+                HTTPStatus.GONE,
+            )
+
+        # Fetch the thread from OpenAI
+        thread = get_assistant().get_thread(conversation.thread_id)
 
         if not thread:
             logger.error("Error fetching conversation thread messages")
@@ -312,7 +710,7 @@ def get_conversation_thread(conversation_id: int, current_user: User) -> Dict[st
                 {
                     "conversation_id": conversation_id,
                     "thread_id": conversation.thread_id,
-                    "content": thread,
+                    "content": thread.to_dict(),
                 }
             ),
             HTTPStatus.OK,
@@ -328,6 +726,37 @@ def get_conversation_thread(conversation_id: int, current_user: User) -> Dict[st
         )
 
 
+@app.route("/healthz", methods=["GET"])
+def liveness() -> Dict[str, Any]:
+    return jsonify({"status": "ok"}), HTTPStatus.OK
+
+
+@app.route("/readyz", methods=["GET"])
+def readiness() -> Dict[str, Any]:
+    # Warms the DB pool and the OpenAI client so the first real request
+    # routed to this worker does not pay for them.
+    checks = {}
+    try:
+        check_connection()
+        checks["database"] = "ok"
+    except Exception as e:
+        logger.error(f"Readiness check failed for database: {str(e)}")
+        checks["database"] = "unavailable"
+
+    try:
+        get_assistant()
+        checks["openai"] = "ok"
+    except Exception as e:
+        logger.error(f"Readiness check failed for OpenAI client: {str(e)}")
+        checks["openai"] = "unavailable"
+
+    ready = all(value == "ok" for value in checks.values())
+    return (
+        jsonify({"status": "ok" if ready else "unavailable", "checks": checks}),
+        HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE,
+    )
+
+
 @app.route("/")
 def index() -> str:
     logger.info("Index page accessed")
@@ -0,0 +1,111 @@
+import logging
+import shutil
+import tempfile
+from http import HTTPStatus
+from typing import IO, Any, Dict, Iterator
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+
+from app.api.auth import admin_required
+from app.models.user import User
+from app.src.db import get_db
+from app.src.pagination import parse_timestamp
+from app.src.provisioning import (
+    PROVISION_WEB_HASH_PROCESSES,
+    parse_users,
+    provision_users,
+)
+from app.src.run_metrics import summarize
+from app.src.streaming import NDJSON_MIMETYPE, ndjson_lines
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+@admin_bp.route("/run-metrics", methods=["GET"])
+@admin_required
+def run_metrics_summary(current_user: User) -> Dict[str, Any]:
+    """Assistant run latency and throughput per time window.
+
+    ``bucket`` is ``minute``, ``hour`` (default) or ``day``; ``group_by`` is
+    ``none`` (default), ``model`` or ``user``. ``since``/``until`` default
+    to the last 24 hours and ``model``/``user_id`` narrow the runs.
+    """
+    try:
+        user_id = request.args.get("user_id")
+        summary = summarize(
+            next(get_db()),
+            bucket=request.args.get("bucket", "hour"),
+            group_by=request.args.get("group_by", "none"),
+            since=parse_timestamp(request.args.get("since")),
+            until=parse_timestamp(request.args.get("until")),
+            model=request.args.get("model"),
+            user_id=int(user_id) if user_id else None,
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid run metrics parameters: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+
+    return jsonify({"windows": summary}), HTTPStatus.OK
+
+
+def _upload_format(filename: str) -> str:
+    """Picks the format from ``?format=``, the file name or the content type."""
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt
+    if filename.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if filename.endswith(".csv") or "csv" in (request.content_type or ""):
+        return "csv"
+    return "jsonl"
+
+
+def _closing(lines: Iterator[str], upload: IO[bytes]) -> Iterator[str]:
+    try:
+        yield from lines
+    finally:
+        upload.close()
+
+
+@admin_bp.route("/users/bulk", methods=["POST"])
+@admin_required
+def provision_users_upload(current_user: User) -> Response:
+    """Creates users from a CSV (with ``email`` and ``password`` columns) or
+    JSONL upload, sent as the raw body or a multipart ``file``.
+
+    The response streams NDJSON: one line per row that was not created,
+    with its line number and status, then a ``summary`` line.
+    """
+    upload = request.files.get("file")
+    filename = (upload.filename or "") if upload else ""
+    # Flask closes request.files when the view returns, before the response
+    # is streamed, so a multipart upload is copied to a file of our own.
+    lines: IO[bytes] = request.stream
+    if upload:
+        lines = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        shutil.copyfileobj(upload.stream, lines)
+        lines.seek(0)
+    try:
+        rows = parse_users(lines, _upload_format(filename.lower()))
+    except ValueError as e:
+        lines.close()
+        logger.warning(f"Rejected user provisioning upload: {str(e)}")
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+
+    logger.info(f"User provisioning started by admin {current_user.id}")
+    results = provision_users(
+        next(get_db()), rows, processes=PROVISION_WEB_HASH_PROCESSES
+    )
+    body = ndjson_lines(results, current_app.json.dumps)
+    return Response(
+        stream_with_context(_closing(body, lines)), mimetype=NDJSON_MIMETYPE
+    )
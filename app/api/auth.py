@@ -6,8 +6,9 @@ from flask import request, jsonify
 from sqlalchemy.orm import Session
 from app.src.db import get_db
 from app.models.user import User
+from app.src.metrics import request_stage
 from dotenv import load_dotenv
-from typing import Callable, Any, Optional, Dict
+from typing import Callable, Any, Optional, Dict, Tuple
 
 load_dotenv()
 
@@ -16,6 +17,13 @@ SECRET_KEY = os.getenv("JWT_SECRET")
 if not SECRET_KEY:
     raise ValueError("No SECRET_KEY set for Flask application.")
 
+# Comma-separated emails allowed to use the /admin endpoints.
+ADMIN_EMAILS = {
+    email.strip().lower()
+    for email in os.getenv("ADMIN_EMAILS", "").split(",")
+    if email.strip()
+}
+
 
 def generate_token(user_id: int) -> str:
     """Generates a JWT token for a user."""
@@ -27,33 +35,55 @@ def generate_token(user_id: int) -> str:
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
 
+def _authenticate_request() -> Tuple[Optional[User], Optional[Any]]:
+    """Resolves the token cookie to a user, or returns the error response."""
+    token: Optional[str] = request.cookies.get("token")
+    if not token:
+        return None, (jsonify({"error": "Token is missing!"}), 401)
+
+    try:
+        data: Dict[str, Any] = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        user_id: str = data["user_id"]
+
+        db: Session = next(get_db())
+        current_user: Optional[User] = db.query(User).filter_by(id=user_id).first()
+
+        if not current_user:
+            return None, (jsonify({"error": "User not found!"}), 404)
+
+    except jwt.ExpiredSignatureError:
+        return None, (jsonify({"error": "Token has expired!"}), 401)
+    except jwt.InvalidTokenError:
+        return None, (jsonify({"error": "Invalid token!"}), 401)
+
+    return current_user, None
+
+
 def token_required(f: Callable) -> Callable:
     """Decorator to protect routes with token-based authentication."""
 
     @wraps(f)
     def decorated(*args: Any, **kwargs: Any) -> Any:
-        token: Optional[str] = request.cookies.get("token")
-        if not token:
-            return jsonify({"error": "Token is missing!"}), 401
+        with request_stage("auth"):
+            current_user, error = _authenticate_request()
+        if error is not None:
+            return error
 
-        try:
-            data: Dict[str, Any] = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            user_id: str = data["user_id"]
+        return f(current_user=current_user, *args, **kwargs)
 
-            db: Session = next(get_db())
-            current_user: Optional[User] = db.query(User).filter_by(id=user_id).first()
+    return decorated
 
-            if not current_user:
-                return jsonify({"error": "User not found!"}), 404
 
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token has expired!"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token!"}), 401
+def admin_required(f: Callable) -> Callable:
+    """Like ``token_required``, but only for emails listed in ``ADMIN_EMAILS``."""
 
+    @wraps(f)
+    def decorated(*args: Any, current_user: User, **kwargs: Any) -> Any:
+        if current_user.email.lower() not in ADMIN_EMAILS:
+            return jsonify({"error": "Admin access required"}), 403
         return f(current_user=current_user, *args, **kwargs)
 
-    return decorated
+    return token_required(decorated)
 
 
 def authenticate_user(email: str, password: str) -> Optional[User]:
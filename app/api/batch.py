@@ -0,0 +1,77 @@
+import logging
+from http import HTTPStatus
+from typing import Any, Dict
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from sqlalchemy.orm import Session
+
+from app.api.auth import token_required
+from app.models.batch_job import BatchJob
+from app.models.user import User
+from app.src.batch import MODES, create_job, iter_results, job_to_dict, parse_prompts
+from app.src.db import get_db
+from app.src.streaming import NDJSON_MIMETYPE, ndjson_lines
+
+logger = logging.getLogger(__name__)
+
+batch_bp = Blueprint("batch", __name__, url_prefix="/batch")
+
+
+@batch_bp.route("/jobs", methods=["POST"])
+@token_required
+def create_batch_job(current_user: User) -> Dict[str, Any]:
+    """Accepts JSONL prompts as the raw body or a multipart ``file``.
+
+    ``?mode=threads|batch_api`` picks the worker strategy and ``?field=``
+    names the JSON key holding each prompt (default ``prompt``).
+    """
+    mode = request.args.get("mode", "threads")
+    if mode not in MODES:
+        return (
+            jsonify({"error": f"mode must be one of: {', '.join(MODES)}"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+    field = request.args.get("field", "prompt")
+
+    upload = request.files.get("file")
+    lines = upload.stream if upload else request.stream
+
+    db: Session = next(get_db())
+    try:
+        job = create_job(db, current_user.id, parse_prompts(lines, field), mode)
+    except ValueError as e:
+        db.rollback()
+        logger.warning(f"Rejected batch upload from user {current_user.id}: {e}")
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+
+    return jsonify(job_to_dict(job)), HTTPStatus.CREATED
+
+
+@batch_bp.route("/jobs/<int:job_id>", methods=["GET"])
+@token_required
+def get_batch_job(current_user: User, job_id: int) -> Dict[str, Any]:
+    db: Session = next(get_db())
+    job = db.query(BatchJob).filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"error": "Batch job not found"}), HTTPStatus.NOT_FOUND
+    return jsonify(job_to_dict(job)), HTTPStatus.OK
+
+
+@batch_bp.route("/jobs/<int:job_id>/results", methods=["GET"])
+@token_required
+def get_batch_results(current_user: User, job_id: int) -> Response:
+    """Streams finished results as JSONL, in input order."""
+    db: Session = next(get_db())
+    job = db.query(BatchJob).filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"error": "Batch job not found"}), HTTPStatus.NOT_FOUND
+
+    body = ndjson_lines(iter_results(db, job.id), current_app.json.dumps)
+    return Response(stream_with_context(body), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,93 @@
+import logging
+from http import HTTPStatus
+from typing import Any, Dict, Optional
+
+from flask import Blueprint, jsonify
+from sqlalchemy.orm import Session
+
+from app.api.auth import token_required
+from app.models.conversation_thread import ARCHIVED, ConversationThread
+from app.models.user import User
+from app.src.db import get_db
+from app.src.lifecycle import archive, delete_conversation, revive
+
+logger = logging.getLogger(__name__)
+
+lifecycle_bp = Blueprint("lifecycle", __name__)
+
+
+def _find_conversation(
+    db: Session, conversation_id: int, user_id: int
+) -> Optional[ConversationThread]:
+    return (
+        db.query(ConversationThread)
+        .filter_by(id=conversation_id, user_id=user_id)
+        .first()
+    )
+
+
+@lifecycle_bp.route("/conversations/<int:conversation_id>/archive", methods=["POST"])
+@token_required
+def archive_conversation(current_user: User, conversation_id: int) -> Dict[str, Any]:
+    """Hides a conversation from the default listing; it stays readable
+    and sending it a message makes it active again."""
+    db: Session = next(get_db())
+    conversation = _find_conversation(db, conversation_id, current_user.id)
+    if conversation is None:
+        return jsonify({"error": "Conversation not found"}), HTTPStatus.NOT_FOUND
+
+    if conversation.status != ARCHIVED:
+        archive(db, conversation)
+        db.commit()
+        logger.info(f"Archived conversation {conversation_id}")
+    return jsonify({"message": "Conversation archived"}), HTTPStatus.OK
+
+
+@lifecycle_bp.route("/conversations/<int:conversation_id>/unarchive", methods=["POST"])
+@token_required
+def unarchive_conversation(
+    current_user: User, conversation_id: int
+) -> Dict[str, Any]:
+    """Makes an archived conversation active again, unless its thread has
+    already been deleted upstream."""
+    db: Session = next(get_db())
+    conversation = _find_conversation(db, conversation_id, current_user.id)
+    if conversation is None:
+        return jsonify({"error": "Conversation not found"}), HTTPStatus.NOT_FOUND
+
+    if conversation.status == ARCHIVED:
+        if not revive(db, conversation):
+            return (
+                jsonify(
+                    {"error": "The conversation's thread was deleted; it is read-only"}
+                ),
+                HTTPStatus.CONFLICT,
+            )
+        db.commit()
+        logger.info(f"Unarchived conversation {conversation_id}")
+    return jsonify({"message": "Conversation active"}), HTTPStatus.OK
+
+
+@lifecycle_bp.route("/conversations/<int:conversation_id>", methods=["DELETE"])
+@token_required
+def delete_conversation_route(
+    current_user: User, conversation_id: int
+) -> Dict[str, Any]:
+    """Deletes a conversation and its stored messages at once; the OpenAI
+    thread is deleted later by ``python manage.py lifecycle``."""
+    db: Session = next(get_db())
+    conversation = _find_conversation(db, conversation_id, current_user.id)
+    if conversation is None:
+        return jsonify({"error": "Conversation not found"}), HTTPStatus.NOT_FOUND
+
+    try:
+        delete_conversation(db, conversation)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to delete conversation {conversation_id}: {str(e)}")
+        return (
+            jsonify({"error": "An error occurred deleting the conversation"}),
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+        )
+    logger.info(f"Deleted conversation {conversation_id}")
+    return jsonify({"message": "Conversation deleted"}), HTTPStatus.OK
@@ -0,0 +1,90 @@
+import logging
+from http import HTTPStatus
+from typing import Any, Dict
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy.orm import Session
+
+from app.api.auth import token_required
+from app.models.user import User
+from app.src.db import get_db
+from app.src.pagination import decode_rank_cursor, parse_limit
+from app.src.search import search_messages
+from app.src.semantic import semantic_search
+
+logger = logging.getLogger(__name__)
+
+search_bp = Blueprint("search", __name__, url_prefix="/search")
+
+MAX_QUERY_LENGTH = 256
+DEFAULT_SEMANTIC_RESULTS = 10
+MAX_SEMANTIC_RESULTS = 50
+
+
+@search_bp.route("", methods=["GET"])
+@token_required
+def search(current_user: User) -> Dict[str, Any]:
+    """Full-text search over the user's messages, best matches first.
+
+    ``q`` uses web search syntax (``"exact phrase"``, ``or``, ``-word``).
+    Snippets are plain text with matches wrapped in ``<mark>`` tags.
+    """
+    query_text = request.args.get("q", "").strip()
+    if not query_text or len(query_text) > MAX_QUERY_LENGTH:
+        return (
+            jsonify({"error": f"q must be 1 to {MAX_QUERY_LENGTH} characters"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        cursor = request.args.get("cursor")
+        after = decode_rank_cursor(cursor) if cursor else None
+    except ValueError as e:
+        logger.warning(f"Invalid search parameters: {str(e)}")
+        return jsonify({"error": "Invalid limit or cursor"}), HTTPStatus.BAD_REQUEST
+
+    db: Session = next(get_db())
+    results, next_cursor = search_messages(
+        db, current_user.id, query_text, limit, after
+    )
+    logger.info(f"Search returned {len(results)} hits for user ID: {current_user.id}")
+    return jsonify({"results": results, "next_cursor": next_cursor}), HTTPStatus.OK
+
+
+@search_bp.route("/semantic", methods=["GET"])
+@token_required
+def search_semantic(current_user: User) -> Dict[str, Any]:
+    """Finds the user's conversations closest in meaning to ``q``.
+
+    Returns one result per conversation with its best-matching message and
+    cosine ``score``, best first.
+    """
+    query_text = request.args.get("q", "").strip()
+    if not query_text or len(query_text) > MAX_QUERY_LENGTH:
+        return (
+            jsonify({"error": f"q must be 1 to {MAX_QUERY_LENGTH} characters"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+    try:
+        limit_arg = request.args.get("limit")
+        limit = (
+            min(parse_limit(limit_arg), MAX_SEMANTIC_RESULTS)
+            if limit_arg
+            else DEFAULT_SEMANTIC_RESULTS
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), HTTPStatus.BAD_REQUEST
+
+    db: Session = next(get_db())
+    try:
+        results = semantic_search(db, current_user.id, query_text, limit)
+    except Exception as e:
+        logger.error(f"Semantic search failed for user {current_user.id}: {str(e)}")
+        return (
+            jsonify({"error": "An error occurred running the search"}),
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+        )
+    logger.info(
+        f"Semantic search returned {len(results)} hits for user ID: {current_user.id}"
+    )
+    return jsonify({"results": results}), HTTPStatus.OK
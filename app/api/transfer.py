@@ -0,0 +1,58 @@
+import logging
+from http import HTTPStatus
+from typing import Any, Dict
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from sqlalchemy.orm import Session
+
+from app.api.auth import token_required
+from app.assistants.openai import get_assistant
+from app.models.user import User
+from app.src.db import get_db
+from app.src.streaming import NDJSON_MIMETYPE, ndjson_lines
+from app.src.transfer import export_records, import_conversations, parse_conversations
+
+logger = logging.getLogger(__name__)
+
+transfer_bp = Blueprint("transfer", __name__)
+
+
+@transfer_bp.route("/export", methods=["GET"])
+@token_required
+def export_conversations(current_user: User) -> Response:
+    """Streams every conversation of the user, with its messages, as NDJSON."""
+    db: Session = next(get_db())
+    body = ndjson_lines(
+        export_records(db, current_user.id, get_assistant()), current_app.json.dumps
+    )
+    response = Response(stream_with_context(body), mimetype=NDJSON_MIMETYPE)
+    response.headers["Content-Disposition"] = (
+        'attachment; filename="conversations.ndjson"'
+    )
+    logger.info(f"Export started for user ID: {current_user.id}")
+    return response
+
+
+@transfer_bp.route("/import", methods=["POST"])
+@token_required
+def import_conversations_upload(current_user: User) -> Dict[str, Any]:
+    """Accepts an export as the raw body or a multipart ``file``."""
+    upload = request.files.get("file")
+    lines = upload.stream if upload else request.stream
+
+    db: Session = next(get_db())
+    try:
+        counts = import_conversations(db, current_user.id, parse_conversations(lines))
+    except ValueError as e:
+        db.rollback()
+        logger.warning(f"Rejected import from user {current_user.id}: {e}")
+        return jsonify({"error": str(e)}), HTTPStatus.BAD_REQUEST
+
+    return jsonify(counts), HTTPStatus.OK
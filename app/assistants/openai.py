@@ -1,23 +1,32 @@
 import os
 import logging
-from openai import OpenAI
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import IO, Optional, Dict, Any, Iterator, List
+from app.src.metrics import upstream_call
+from app.src.run_metrics import record_run, run_metric_row
 
 # Load environment variables from .env
 load_dotenv()
 
-# Set up logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Logs to a file
-        logging.StreamHandler(),  # Also logs to the console
-    ],
-)
 logger = logging.getLogger(__name__)
 
+# Largest page the Assistants messages.list endpoint accepts.
+MAX_MESSAGES_PAGE_SIZE = 100
+
+# Upper bound on concurrent upstream calls made for a single fan-out.
+FAN_OUT_CONCURRENCY = int(os.getenv("OPENAI_FAN_OUT_CONCURRENCY", "8"))
+
+# Same default as the SDK's create_and_poll.
+RUN_POLL_INTERVAL = int(os.getenv("OPENAI_RUN_POLL_INTERVAL_MS", "1000")) / 1000
+ACTIVE_RUN_STATUSES = ("queued", "in_progress", "cancelling")
+
+_assistant: Optional["OpenAIAssistant"] = None
+_assistant_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
 
 class OpenAIAssistant:
     def __init__(self) -> None:
@@ -27,7 +36,15 @@ class OpenAIAssistant:
             raise ValueError("The OpenAI API key is not set.")
 
         logger.info("OpenAI API key successfully loaded.")
-        self.client = OpenAI(api_key=self.api_key)
+        # Imported here: the SDK is heavy and not every process needs it.
+        from openai import OpenAI
+
+        # OPENAI_BASE_URL points the client elsewhere, e.g. at the fake
+        # server in benchmarks/fake_openai.py for load tests.
+        self.base_url = os.getenv("OPENAI_BASE_URL") or None
+        if self.base_url:
+            logger.info(f"Using OpenAI API at {self.base_url}")
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
 
     def get_assistant_id(self) -> Optional[str]:
         """Return a fixed assistant ID (hardcoded)."""
@@ -35,6 +52,7 @@ class OpenAIAssistant:
         logger.info(f"Returning assistant ID: {assistant_id}")
         return assistant_id
 
+    @upstream_call
     def create_thread(self) -> Optional[str]:
         """Creates a conversation thread in OpenAI."""
         try:
@@ -46,25 +64,52 @@ class OpenAIAssistant:
             logger.error(f"Failed to create conversation thread: {e}")
             return None
 
+    @upstream_call
     def send_message(
-        self, thread_id: str, assistant_id: str, message: str
+        self,
+        thread_id: str,
+        assistant_id: str,
+        message: str,
+        user_id: Optional[int] = None,
     ) -> Optional[Dict[str, str]]:
-        """Sends a message to the assistant in a specific conversation thread."""
+        """Sends a message to the assistant in a specific conversation thread.
+
+        The finished run is recorded in ``run_metrics`` under ``user_id``.
+        """
         try:
             logger.info(
                 f"Sending message to thread {thread_id} with assistant {assistant_id}."
             )
+            started = time.perf_counter()
             message_response = self.client.beta.threads.messages.create(
                 thread_id=thread_id,
                 role="user",
                 content=message,
             )
-            logger.info(f"Message sent: {message}")
+            logger.debug(
+                f"Message sent to thread {thread_id}",
+                extra={"chars": len(message), "payload": message},
+            )
 
-            # Wait for the assistant to respond
-            run_response = self.client.beta.threads.runs.create_and_poll(
-                thread_id=thread_id,
-                assistant_id=assistant_id,
+            # Wait for the assistant to respond. Polled here rather than with
+            # create_and_poll so the number of polls can be recorded.
+            runs = self.client.beta.threads.runs
+            run_response = runs.create(thread_id=thread_id, assistant_id=assistant_id)
+            polls = 0
+            while run_response.status in ACTIVE_RUN_STATUSES:
+                time.sleep(RUN_POLL_INTERVAL)
+                run_response = runs.retrieve(
+                    thread_id=thread_id, run_id=run_response.id
+                )
+                polls += 1
+            record_run(
+                run_metric_row(
+                    run_response,
+                    thread_id=thread_id,
+                    user_id=user_id,
+                    wall_ms=round((time.perf_counter() - started) * 1000),
+                    polls=polls,
+                )
             )
 
             if run_response.status == "completed":
@@ -73,9 +118,12 @@ class OpenAIAssistant:
                 # assistant_reply = (
                 #     messages[-1].content if messages else "No response from assistant."
                 # )
-                assistant_reply = messages
-                logger.info(f"Assistant response: {assistant_reply}")
-                return self._extract_last_message(assistant_reply)
+                assistant_reply = self._extract_last_message(messages)
+                logger.debug(
+                    f"Assistant response for thread {thread_id}",
+                    extra={"payload": assistant_reply or ""},
+                )
+                return assistant_reply
             else:
                 logger.error(
                     f"Assistant did not complete the response for thread {thread_id}. Status: {run_response.status}"
@@ -88,6 +136,69 @@ class OpenAIAssistant:
             )
             return None
 
+    @upstream_call
+    def stream_message(
+        self,
+        thread_id: str,
+        assistant_id: str,
+        message: str,
+        user_id: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Sends a message and yields the assistant's reply as it is generated.
+
+        Yields ``{"type": "delta", "text": ...}`` events followed by one
+        ``{"type": "done", "messages": [...]}`` event carrying the reply and
+        the user's message, newest first, or an ``{"type": "error"}`` event.
+        """
+        try:
+            logger.info(
+                f"Streaming message to thread {thread_id} with assistant {assistant_id}."
+            )
+            started = time.perf_counter()
+            user_message = self.client.beta.threads.messages.create(
+                thread_id=thread_id,
+                role="user",
+                content=message,
+            )
+
+            with self.client.beta.threads.runs.stream(
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+            ) as stream:
+                for text in stream.text_deltas:
+                    yield {"type": "delta", "text": text}
+                run = stream.get_final_run()
+                replies = stream.get_final_messages()
+            record_run(
+                run_metric_row(
+                    run,
+                    thread_id=thread_id,
+                    user_id=user_id,
+                    wall_ms=round((time.perf_counter() - started) * 1000),
+                    streamed=True,
+                )
+            )
+
+            if run.status != "completed":
+                logger.error(
+                    f"Assistant did not complete the streamed response for thread {thread_id}. Status: {run.status}"
+                )
+                yield {"type": "error", "error": f"Run ended with status {run.status}"}
+                return
+
+            logger.info(
+                f"Streamed assistant response completed for thread {thread_id}."
+            )
+            messages = [self._message_to_dict(reply) for reply in reversed(replies)]
+            messages.append(self._message_to_dict(user_message))
+            yield {"type": "done", "messages": messages}
+
+        except Exception as e:
+            logger.error(
+                f"Error streaming message to thread {thread_id} with assistant {assistant_id}: {e}"
+            )
+            yield {"type": "error", "error": "An error occurred sending the message"}
+
     def _extract_last_message(self, response: Dict[str, Any]) -> Optional[str]:
         try:
             messages = response.data
@@ -107,21 +218,35 @@ class OpenAIAssistant:
             logger.error(f"Error extracting last assistant message: {e}")
             return None
 
-    def get_thread_messages(self, thread_id: str) -> Optional[Dict[str, Any]]:
-        """Fetches all messages in a conversation thread."""
+    @upstream_call
+    def get_thread_messages(
+        self,
+        thread_id: str,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Fetches a page of messages in a conversation thread, newest first.
+
+        ``after`` returns every message newer than that message id and
+        ``before`` returns up to ``limit`` messages older than it.
+        """
         try:
-            messages = self.client.beta.threads.messages.list(thread_id=thread_id)
-            thread_data = []
-            for message in messages.data:
-                message_data = {
-                    "id": message.id,
-                    "role": message.role,
-                    "created_at": message.created_at,
-                    "content": [
-                        content_block.text.value for content_block in message.content
-                    ],
-                }
-                thread_data.append(message_data)
+            messages = self.client.beta.threads.messages
+            if after:
+                # Upstream cursors follow the listing order, so walk forward
+                # in ascending order from the known message.
+                newer = messages.list(thread_id=thread_id, order="asc", after=after)
+                thread_data = [self._message_to_dict(message) for message in newer]
+                thread_data.reverse()
+            else:
+                params: Dict[str, Any] = {"thread_id": thread_id, "order": "desc"}
+                if limit:
+                    params["limit"] = min(limit, MAX_MESSAGES_PAGE_SIZE)
+                if before:
+                    params["after"] = before
+                page = messages.list(**params)
+                thread_data = [self._message_to_dict(message) for message in page.data]
 
             logger.info(f"Fetched {len(thread_data)} messages for thread {thread_id}.")
             return thread_data
@@ -129,6 +254,105 @@ class OpenAIAssistant:
             logger.error(f"Error fetching messages for thread {thread_id}: {e}")
             return None
 
+    @upstream_call
+    def iter_thread_messages(
+        self, thread_id: str, page_size: int = MAX_MESSAGES_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields every message in a thread, newest first, one page at a time.
+
+        Only the current page is held in memory. Errors propagate so the
+        caller can decide how to end a response that has already started.
+        """
+        pages = self.client.beta.threads.messages.list(
+            thread_id=thread_id, limit=page_size
+        )
+        count = 0
+        for message in pages:
+            count += 1
+            yield self._message_to_dict(message)
+        logger.info(f"Streamed {count} messages for thread {thread_id}.")
+
+    @staticmethod
+    def _message_to_dict(message: Any) -> Dict[str, Any]:
+        return {
+            "id": message.id,
+            "role": message.role,
+            "created_at": message.created_at,
+            "content": [content_block.text.value for content_block in message.content],
+        }
+
+    @upstream_call
+    def get_last_message(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Fetches the newest message of a thread, or None if it is empty.
+
+        Errors propagate so fan-out callers can report them per thread.
+        """
+        page = self.client.beta.threads.messages.list(
+            thread_id=thread_id, limit=1, order="desc"
+        )
+        return self._message_to_dict(page.data[0]) if page.data else None
+
+    @upstream_call
+    def get_last_messages(self, thread_ids: List[str]) -> Dict[str, Any]:
+        """Fetches the newest message of each thread concurrently.
+
+        Maps each thread ID to its message dict, None for an empty thread,
+        or the exception its request raised.
+        """
+        futures = {
+            thread_id: _get_executor().submit(self.get_last_message, thread_id)
+            for thread_id in dict.fromkeys(thread_ids)
+        }
+        results: Dict[str, Any] = {}
+        for thread_id, future in futures.items():
+            try:
+                results[thread_id] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching last message for thread {thread_id}: {e}")
+                results[thread_id] = e
+        logger.info(f"Fetched last messages for {len(futures)} threads.")
+        return results
+
+    @upstream_call
+    def delete_thread(self, thread_id: str) -> bool:
+        """Deletes a conversation thread in OpenAI.
+
+        A thread that no longer exists counts as deleted.
+        """
+        try:
+            self.client.beta.threads.delete(thread_id)
+            logger.info(f"Deleted conversation thread with ID: {thread_id}")
+            return True
+        except Exception as e:
+            if getattr(e, "status_code", None) == 404:
+                logger.info(f"Conversation thread {thread_id} was already deleted")
+                return True
+            logger.error(f"Error deleting conversation thread {thread_id}: {e}")
+            return False
+
+    @upstream_call
+    def submit_batch(self, requests_file: IO[bytes], endpoint: str) -> str:
+        """Uploads a Batch API input file and starts the batch; returns its ID."""
+        uploaded = self.client.files.create(file=requests_file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=endpoint,
+            completion_window="24h",
+        )
+        logger.info(f"Submitted batch {batch.id} with input file {uploaded.id}")
+        return batch.id
+
+    @upstream_call
+    def get_batch(self, batch_id: str) -> Any:
+        """Fetches a Batch API batch, including its status and file IDs."""
+        return self.client.batches.retrieve(batch_id)
+
+    @upstream_call
+    def iter_file_lines(self, file_id: str) -> Iterator[str]:
+        """Yields the lines of an uploaded or generated file."""
+        yield from self.client.files.content(file_id).iter_lines()
+
+    @upstream_call
     def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
         """Fetches a conversation thread by ID."""
         try:
@@ -138,3 +362,28 @@ class OpenAIAssistant:
         except Exception as e:
             logger.error(f"Error fetching conversation thread {thread_id}: {e}")
             return None
+
+
+def get_assistant() -> OpenAIAssistant:
+    """Returns the process-wide assistant client, creating it on first use."""
+    global _assistant
+    if _assistant is None:
+        with _assistant_lock:
+            if _assistant is None:
+                _assistant = OpenAIAssistant()
+    return _assistant
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns the shared pool for concurrent upstream calls.
+
+    Created on first use so forked workers never inherit a dead pool.
+    """
+    global _executor
+    if _executor is None:
+        with _assistant_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=FAN_OUT_CONCURRENCY, thread_name_prefix="openai"
+                )
+    return _executor
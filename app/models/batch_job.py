@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, Text, ForeignKey, DateTime, Index
+)
+from sqlalchemy.orm import relationship
+from app.src.db import Base
+from typing import Optional
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+
+    id: int = Column(Integer, primary_key=True)
+    user_id: int = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # "threads" runs each prompt through the assistant; "batch_api" submits
+    # the whole job to the OpenAI Batch API.
+    mode: str = Column(String(20), nullable=False, default="threads")
+    status: str = Column(String(20), nullable=False, default="pending")
+    total: int = Column(Integer, nullable=False, default=0)
+    completed: int = Column(Integer, nullable=False, default=0)
+    failed: int = Column(Integer, nullable=False, default=0)
+    upstream_batch_id: Optional[str] = Column(String(120), nullable=True)
+    error: Optional[str] = Column(Text, nullable=True)
+    # A worker owns the job until its lease expires; a crashed worker's job
+    # is picked up again and resumes from the pending items.
+    lease_expires_at: Optional[datetime] = Column(DateTime, nullable=True)
+    # Passes that ended in an exception; the job fails at BATCH_MAX_ATTEMPTS.
+    attempts: int = Column(SmallInteger, nullable=False, default=0, server_default="0")
+    created_at: datetime = Column(DateTime, default=_utcnow)
+    updated_at: datetime = Column(DateTime, default=_utcnow, onupdate=_utcnow)
+
+    user = relationship("User")
+    items = relationship("BatchItem", back_populates="job", lazy="dynamic")
+
+    __table_args__ = (Index("ix_batch_jobs_status", status),)
+
+    def __repr__(self) -> str:
+        """Provides a string representation of the BatchJob object."""
+        return f"<BatchJob(id={self.id}, status={self.status}, mode={self.mode})>"
+
+
+class BatchItem(Base):
+    __tablename__ = "batch_items"
+
+    id: int = Column(Integer, primary_key=True)
+    job_id: int = Column(Integer, ForeignKey("batch_jobs.id"), nullable=False)
+    line_number: int = Column(Integer, nullable=False)
+    custom_id: Optional[str] = Column(String(120), nullable=True)
+    prompt: str = Column(Text, nullable=False)
+    status: str = Column(String(20), nullable=False, default="pending")
+    response: Optional[str] = Column(Text, nullable=True)
+    error: Optional[str] = Column(Text, nullable=True)
+    completed_at: Optional[datetime] = Column(DateTime, nullable=True)
+
+    job = relationship("BatchJob", back_populates="items")
+
+    __table_args__ = (
+        # Resuming scans a job's pending items in input order.
+        Index("ix_batch_items_job_id_status_line", job_id, status, line_number),
+    )
+
+    def __repr__(self) -> str:
+        """Provides a string representation of the BatchItem object."""
+        return f"<BatchItem(job_id={self.job_id}, line={self.line_number})>"
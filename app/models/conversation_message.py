@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from app.src.db import Base
+from typing import Optional
+
+
+# Text search configuration used both for indexing and for parsing queries.
+SEARCH_CONFIG = "english"
+
+
+class ConversationMessage(Base):
+    """Local copy of a message's text, kept so it can be searched without
+    pulling threads back from OpenAI."""
+
+    __tablename__ = "conversation_messages"
+
+    id: int = Column(Integer, primary_key=True)
+    user_id: int = Column(Integer, ForeignKey("users.id"), nullable=False)
+    conversation_id: int = Column(
+        Integer, ForeignKey("conversation_threads.id"), nullable=False
+    )
+    # Upstream message ID; unknown for messages captured from a plain send.
+    message_id: Optional[str] = Column(String(120), nullable=True)
+    role: str = Column(String(20), nullable=False)
+    content: str = Column(Text, nullable=False)
+    created_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    search_vector = Column(
+        TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True)
+    )
+    # Set once the message's embedding is in the user's vector index.
+    embedded: bool = Column(
+        Boolean, nullable=False, default=False, server_default="false"
+    )
+
+    __table_args__ = (
+        # btree_gin lets the user_id equality share the GIN index, so a
+        # search only visits the user's own postings.
+        Index(
+            "ix_conversation_messages_user_id_search_vector",
+            user_id,
+            search_vector,
+            postgresql_using="gin",
+        ),
+        Index("ix_conversation_messages_conversation_id", conversation_id),
+        # Only the small backlog of messages still to embed is indexed.
+        Index(
+            "ix_conversation_messages_unembedded",
+            user_id,
+            postgresql_where=embedded.is_(False),
+        ),
+    )
+
+    def __repr__(self) -> str:
+        """Provides a string representation of the ConversationMessage object."""
+        return (
+            f"<ConversationMessage(conversation_id={self.conversation_id}, "
+            f"role={self.role})>"
+        )
@@ -1,10 +1,16 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.src.db import Base
 from typing import Optional
 
 
+TITLE_LENGTH = 120
+
+ACTIVE = "active"
+ARCHIVED = "archived"
+
+
 class ConversationThread(Base):
     __tablename__ = "conversation_threads"
 
@@ -13,10 +19,51 @@ class ConversationThread(Base):
     thread_id: str = Column(String(120), unique=True, nullable=False)
     created_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     assistant_id: Optional[str] = Column(String(120), nullable=True)
-    status: str = Column(String(50), default="active")
+    # Taken from the first message sent to the conversation.
+    title: Optional[str] = Column(String(TITLE_LENGTH), nullable=True)
+    status: str = Column(String(50), default=ACTIVE)
+    # Bumped whenever messages are added to the thread; feeds ETags.
+    version: int = Column(Integer, nullable=False, default=0, server_default="0")
+    # Time of the last message; NULL until the first one is sent.
+    last_activity_at: Optional[datetime] = Column(DateTime, nullable=True)
+    archived_at: Optional[datetime] = Column(DateTime, nullable=True)
+    # Set once the OpenAI thread is deleted; its messages are then served
+    # from the local copy in conversation_messages.
+    remote_deleted_at: Optional[datetime] = Column(DateTime, nullable=True)
 
     user = relationship("User", back_populates="threads")
 
+    __table_args__ = (
+        # Serve the per-user listings, newest first, with keyset pagination.
+        # Partial, so archived conversations never grow the hot index.
+        Index(
+            "ix_conversation_threads_active_listing",
+            user_id,
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=status == ACTIVE,
+        ),
+        Index(
+            "ix_conversation_threads_archived_listing",
+            user_id,
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=status == ARCHIVED,
+        ),
+        # Lets the lifecycle job find idle and archived conversations
+        # without scanning the table.
+        Index(
+            "ix_conversation_threads_idle",
+            func.coalesce(last_activity_at, created_at),
+            postgresql_where=status == ACTIVE,
+        ),
+        Index(
+            "ix_conversation_threads_remote_pending",
+            archived_at,
+            postgresql_where=(status == ARCHIVED) & remote_deleted_at.is_(None),
+        ),
+    )
+
     def __repr__(self) -> str:
         """Provides a string representation of the ConversationThread object."""
         return (
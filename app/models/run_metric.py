@@ -0,0 +1,52 @@
+from datetime import datetime
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+)
+from app.src.db import Base
+from typing import Optional
+
+
+class RunMetric(Base):
+    """One row per assistant run, written in batches off the request path.
+
+    Deliberately narrow and without foreign keys: it is an append-only
+    telemetry log, not part of the relational model.
+    """
+
+    __tablename__ = "run_metrics"
+
+    id: int = Column(BigInteger, primary_key=True)
+    run_id: str = Column(String(64), nullable=False)
+    thread_id: str = Column(String(120), nullable=False)
+    user_id: Optional[int] = Column(Integer, nullable=True)
+    model: Optional[str] = Column(String(64), nullable=True)
+    status: str = Column(String(20), nullable=False)
+    streamed: bool = Column(Boolean, nullable=False, default=False)
+    # Upstream timestamps (whole seconds): created -> started is queueing,
+    # started -> completed is model time.
+    created_at: datetime = Column(DateTime, nullable=False)
+    started_at: Optional[datetime] = Column(DateTime, nullable=True)
+    completed_at: Optional[datetime] = Column(DateTime, nullable=True)
+    # Measured locally around the whole send, so wall_ms minus the upstream
+    # span is our own overhead.
+    wall_ms: int = Column(Integer, nullable=False)
+    polls: int = Column(SmallInteger, nullable=False, default=0)
+    prompt_tokens: Optional[int] = Column(Integer, nullable=True)
+    completion_tokens: Optional[int] = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        # Rows arrive in time order, so a BRIN index serves window scans at
+        # a tiny fraction of a btree's size.
+        Index("ix_run_metrics_created_at", created_at, postgresql_using="brin"),
+    )
+
+    def __repr__(self) -> str:
+        """Provides a string representation of the RunMetric object."""
+        return f"<RunMetric(run_id={self.run_id}, status={self.status})>"
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, SmallInteger, String
+from app.src.db import Base
+
+
+class ThreadDeletion(Base):
+    """An OpenAI thread left behind by a deleted conversation.
+
+    The lifecycle job deletes queued threads upstream at a bounded rate, so
+    deleting a conversation never waits on OpenAI.
+    """
+
+    __tablename__ = "thread_deletions"
+
+    id: int = Column(Integer, primary_key=True)
+    thread_id: str = Column(String(120), unique=True, nullable=False)
+    requested_at: datetime = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    # Failed upstream deletes so far; the error itself is logged.
+    attempts: int = Column(SmallInteger, nullable=False, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        """Provides a string representation of the ThreadDeletion object."""
+        return f"<ThreadDeletion(thread_id={self.thread_id}, attempts={self.attempts})>"
@@ -13,6 +13,10 @@ class User(Base):
     email: str = Column(String(120), unique=True, nullable=False)
     password_hash: str = Column(String(255), nullable=False)
     created_at: datetime = Column(DateTime, default=datetime.now(timezone.utc))
+    # Bumped whenever the user's conversation list changes; feeds ETags.
+    conversations_version: int = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     # Relationship to ConversationThread
     threads = relationship("ConversationThread", back_populates="user")
@@ -0,0 +1,428 @@
+"""Offline batch prompt processing.
+
+Jobs are uploaded as JSONL, stored as one ``BatchItem`` per prompt and
+processed by ``python manage.py batch-worker``. Every finished item is
+committed as it completes, so a worker that crashes (or whose lease
+expires) is replaced by one that resumes from the items still pending.
+While a worker is alive a heartbeat thread keeps its lease renewed, however
+long individual prompts take; a job whose processing keeps raising is
+marked ``failed`` after ``BATCH_MAX_ATTEMPTS`` passes.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+from app.assistants.openai import OpenAIAssistant
+from app.models.batch_job import BatchItem, BatchJob
+from app.src.db import SessionLocal, get_engine
+
+logger = logging.getLogger(__name__)
+
+MODES = ("threads", "batch_api")
+INSERT_CHUNK_SIZE = 1000
+LOAD_CHUNK_SIZE = 500
+LEASE_SECONDS = int(os.getenv("BATCH_LEASE_SECONDS", "120"))
+MAX_JOB_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_API_MODEL = os.getenv("BATCH_API_MODEL", "gpt-4o-mini")
+BATCH_API_ENDPOINT = "/v1/chat/completions"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_prompts(
+    lines: Iterable[bytes], field: str = "prompt"
+) -> Iterator[Dict[str, Any]]:
+    """Yields ``{line_number, custom_id, prompt}`` for each non-blank line.
+
+    Raises ``ValueError`` naming the first line that is not a JSON object
+    with a non-empty string ``field``.
+    """
+    for line_number, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number} is not valid JSON") from e
+        prompt = record.get(field) if isinstance(record, dict) else None
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise ValueError(f"Line {line_number} has no '{field}' string")
+        custom_id = record.get("custom_id") or record.get("id")
+        yield {
+            "line_number": line_number,
+            "custom_id": str(custom_id)[:120] if custom_id is not None else None,
+            "prompt": prompt,
+        }
+
+
+def create_job(
+    db: Session, user_id: int, prompts: Iterable[Dict[str, Any]], mode: str
+) -> BatchJob:
+    """Stores a job and its prompts with batched inserts.
+
+    Nothing is committed if ``prompts`` raises or is empty; the caller rolls
+    back.
+    """
+    job = BatchJob(user_id=user_id, mode=mode, status="pending")
+    db.add(job)
+    db.flush()
+
+    total = 0
+    chunk = []
+    for prompt in prompts:
+        chunk.append({**prompt, "job_id": job.id, "status": "pending"})
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            db.execute(insert(BatchItem), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(insert(BatchItem), chunk)
+        total += len(chunk)
+
+    if total == 0:
+        raise ValueError("No prompts found")
+    job.total = total
+    db.commit()
+    logger.info(f"Batch job {job.id} created with {total} prompts ({mode})")
+    return job
+
+
+def job_to_dict(job: BatchJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "mode": job.mode,
+        "status": job.status,
+        "total": job.total,
+        "completed": job.completed,
+        "failed": job.failed,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def iter_results(db: Session, job_id: int) -> Iterator[Dict[str, Any]]:
+    """Yields finished items in input order without loading them all."""
+    query = (
+        db.query(BatchItem)
+        .filter(BatchItem.job_id == job_id, BatchItem.status != "pending")
+        .order_by(BatchItem.line_number)
+        .execution_options(stream_results=True)
+        .yield_per(LOAD_CHUNK_SIZE)
+    )
+    for item in query:
+        yield {
+            "line_number": item.line_number,
+            "custom_id": item.custom_id,
+            "status": item.status,
+            "response": item.response,
+            "error": item.error,
+        }
+
+
+def run_bounded(
+    items: Iterable[T], fn: Callable[[T], R], concurrency: int
+) -> Iterator[Tuple[T, Any]]:
+    """Runs ``fn`` over ``items`` on a thread pool with at most
+    ``concurrency`` calls in flight, yielding ``(item, result)`` pairs as
+    they complete. A raised exception is yielded in place of the result.
+
+    Items are pulled lazily, so memory is bounded by ``concurrency``.
+    """
+    iterator = iter(items)
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="batch"
+    ) as executor:
+        in_flight: Dict[Future, T] = {}
+
+        def fill() -> None:
+            while len(in_flight) < concurrency:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                in_flight[executor.submit(fn, item)] = item
+
+        fill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                error = future.exception()
+                yield item, error if error is not None else future.result()
+            fill()
+
+
+def answer_prompt(
+    assistant: OpenAIAssistant, prompt: str, user_id: Optional[int] = None
+) -> str:
+    """Runs one prompt through the assistant on a throwaway thread."""
+    thread_id = assistant.create_thread()
+    if not thread_id:
+        raise RuntimeError("Failed to create thread")
+    try:
+        reply = assistant.send_message(
+            thread_id=thread_id,
+            assistant_id=assistant.get_assistant_id(),
+            message=prompt,
+            user_id=user_id,
+        )
+    finally:
+        assistant.delete_thread(thread_id)
+    if reply is None:
+        raise RuntimeError("Assistant run did not complete")
+    return reply
+
+
+def claim_job(db: Session) -> Optional[BatchJob]:
+    """Leases the oldest runnable job: pending, or running with an expired
+    lease (its worker died)."""
+    now = _utcnow()
+    job = (
+        db.query(BatchJob)
+        .filter(
+            BatchJob.status.in_(("pending", "running")),
+            or_(BatchJob.lease_expires_at.is_(None), BatchJob.lease_expires_at < now),
+        )
+        .order_by(BatchJob.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+    if job.status == "running":
+        logger.info(f"Resuming batch job {job.id} after an expired lease")
+    job.status = "running"
+    job.lease_expires_at = now + timedelta(seconds=LEASE_SECONDS)
+    db.commit()
+    return job
+
+
+def _renew_lease(job_id: int, stop: threading.Event) -> None:
+    """Extends the lease every third of ``LEASE_SECONDS`` until ``stop`` is
+    set, on a session of its own."""
+    while not stop.wait(LEASE_SECONDS / 3):
+        db = SessionLocal()
+        expires = _utcnow() + timedelta(seconds=LEASE_SECONDS)
+        try:
+            # A job that was finished or released keeps its cleared lease.
+            db.query(BatchJob).filter(
+                BatchJob.id == job_id,
+                BatchJob.status == "running",
+                BatchJob.lease_expires_at.isnot(None),
+            ).update(
+                {BatchJob.lease_expires_at: expires}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to renew the lease of batch job {job_id}: {str(e)}")
+        finally:
+            db.close()
+
+
+@contextmanager
+def _leased(job_id: int) -> Iterator[None]:
+    """Keeps the job's lease renewed while the block runs, so prompts that
+    outlast the lease are not handed to another worker and paid for twice."""
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_renew_lease,
+        args=(job_id, stop),
+        name=f"batch-lease-{job_id}",
+        daemon=True,
+    )
+    heartbeat.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def _record_result(db: Session, job: BatchJob, item_id: int, result: Any) -> None:
+    failed = isinstance(result, Exception)
+    updated = db.query(BatchItem).filter(
+        BatchItem.id == item_id, BatchItem.status == "pending"
+    ).update(
+        {
+            BatchItem.status: "failed" if failed else "done",
+            BatchItem.response: None if failed else result,
+            BatchItem.error: str(result) if failed else None,
+            BatchItem.completed_at: _utcnow(),
+        },
+        synchronize_session=False,
+    )
+    # Only count the first result recorded for an item.
+    if updated:
+        counter = BatchJob.failed if failed else BatchJob.completed
+        db.query(BatchJob).filter(BatchJob.id == job.id).update(
+            {counter: counter + 1}, synchronize_session=False
+        )
+    db.commit()
+
+
+def _pending_items(db: Session, job_id: int) -> Iterator[Tuple[int, str]]:
+    """Yields ``(item_id, prompt)`` of pending items in input order."""
+    last_line = 0
+    while True:
+        chunk = (
+            db.query(BatchItem.id, BatchItem.line_number, BatchItem.prompt)
+            .filter(
+                BatchItem.job_id == job_id,
+                BatchItem.status == "pending",
+                BatchItem.line_number > last_line,
+            )
+            .order_by(BatchItem.line_number)
+            .limit(LOAD_CHUNK_SIZE)
+            .all()
+        )
+        if not chunk:
+            return
+        for item_id, line_number, prompt in chunk:
+            last_line = line_number
+            yield item_id, prompt
+
+
+def _finish(
+    db: Session, job: BatchJob, status: str, error: Optional[str] = None
+) -> None:
+    job.status = status
+    job.error = error
+    job.lease_expires_at = None
+    db.commit()
+    logger.info(f"Batch job {job.id} {status}")
+
+
+def run_threads_job(
+    db: Session, job: BatchJob, assistant: OpenAIAssistant, concurrency: int
+) -> None:
+    """Answers each pending prompt on its own assistant thread."""
+    user_id = job.user_id
+    results = run_bounded(
+        _pending_items(db, job.id),
+        lambda item: answer_prompt(assistant, item[1], user_id),
+        concurrency,
+    )
+    for (item_id, _), result in results:
+        _record_result(db, job, item_id, result)
+    db.refresh(job)
+    _finish(db, job, "completed")
+
+
+def run_batch_api_job(db: Session, job: BatchJob, assistant: OpenAIAssistant) -> bool:
+    """Submits pending prompts to the Batch API once, then polls it.
+
+    The upstream batch ID is checkpointed, so a restarted worker polls the
+    existing batch instead of submitting a new one. Returns False while the
+    upstream batch is still running.
+    """
+    if job.upstream_batch_id is None:
+        with tempfile.TemporaryFile() as requests_file:
+            for item_id, prompt in _pending_items(db, job.id):
+                request = {
+                    "custom_id": str(item_id),
+                    "method": "POST",
+                    "url": BATCH_API_ENDPOINT,
+                    "body": {
+                        "model": BATCH_API_MODEL,
+                        "messages": [{"role": "user", "content": prompt}],
+                    },
+                }
+                requests_file.write(json.dumps(request).encode() + b"\n")
+            requests_file.seek(0)
+            job.upstream_batch_id = assistant.submit_batch(
+                requests_file, BATCH_API_ENDPOINT
+            )
+        db.commit()
+
+    batch = assistant.get_batch(job.upstream_batch_id)
+    if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+        # Not done yet: release the job so the next poll picks it up.
+        job.lease_expires_at = None
+        db.commit()
+        return False
+    if batch.status != "completed":
+        _finish(db, job, "failed", f"Upstream batch ended with status {batch.status}")
+        return True
+
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in assistant.iter_file_lines(file_id):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            item_id = int(record["custom_id"])
+            response = record.get("response") or {}
+            if response.get("status_code") == 200:
+                body = response["body"]
+                result: Any = body["choices"][0]["message"]["content"]
+            else:
+                result = RuntimeError(
+                    json.dumps(record.get("error") or response.get("body"))
+                )
+            _record_result(db, job, item_id, result)
+    db.refresh(job)
+    _finish(db, job, "completed")
+    return True
+
+
+def run_worker(
+    assistant_factory: Callable[[], OpenAIAssistant],
+    concurrency: int = BATCH_CONCURRENCY,
+    poll_interval: float = 5.0,
+    once: bool = False,
+) -> None:
+    """Processes jobs until interrupted (or until none is left with ``once``)."""
+    get_engine()
+    while True:
+        db = SessionLocal()
+        idle = True
+        try:
+            job = claim_job(db)
+            if job is not None:
+                logger.info(f"Processing batch job {job.id} ({job.mode})")
+                try:
+                    with _leased(job.id):
+                        assistant = assistant_factory()
+                        if job.mode == "batch_api":
+                            # An upstream batch still running counts as idle.
+                            idle = not run_batch_api_job(db, job, assistant)
+                        else:
+                            run_threads_job(db, job, assistant, concurrency)
+                            idle = False
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Batch job {job.id} failed: {str(e)}")
+                    job.attempts += 1
+                    if job.attempts >= MAX_JOB_ATTEMPTS:
+                        _finish(db, job, "failed", str(e))
+                    else:
+                        # Leave the job running; its lease expires and another
+                        # pass resumes from the items still pending.
+                        db.commit()
+        finally:
+            db.close()
+
+        if idle:
+            if once and job is None:
+                return
+            time.sleep(poll_interval)
@@ -0,0 +1,77 @@
+import gzip
+from typing import Callable, Dict
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional encoding
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/plain",
+    "text/html",
+    "text/event-stream",
+}
+
+
+def _encoders(level: int) -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encoders in server preference order."""
+    encoders: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        # Compressor objects are not thread-safe, so build one per response.
+        encoders["zstd"] = lambda data: zstandard.ZstdCompressor(
+            level=level
+        ).compress(data)
+    if brotli is not None:
+        encoders["br"] = lambda data: brotli.compress(data, quality=min(level, 11))
+    encoders["gzip"] = lambda data: gzip.compress(data, compresslevel=min(level, 9))
+    return encoders
+
+
+def init_compression(app: Flask) -> None:
+    """Compresses responses according to the client's ``Accept-Encoding``.
+
+    Config: ``COMPRESS_MIN_SIZE`` (bytes, default 1024) and
+    ``COMPRESS_LEVEL`` (default 5, clamped per codec).
+    """
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+    app.config.setdefault("COMPRESS_LEVEL", 5)
+    encoders = _encoders(app.config["COMPRESS_LEVEL"])
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        response.vary.add("Accept-Encoding")
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        body = response.get_data()
+        if len(body) < app.config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        encoding = request.accept_encodings.best_match(list(encoders))
+        if not encoding:
+            return response
+
+        response.set_data(encoders[encoding](body))
+        response.headers["Content-Encoding"] = encoding
+        # The compressed bytes differ from the identity representation, so a
+        # strong validator would be wrong; If-None-Match compares weakly.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,11 +1,12 @@
 import os
-import psycopg2
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from dotenv import load_dotenv
 import logging
-from typing import Iterator
+from typing import Iterator, Optional
 
 # Load environment variables
 load_dotenv()
@@ -17,21 +18,31 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
 DB_PORT = os.getenv("DB_PORT", "55000")
+# Logs every statement; for debugging only.
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Logs to a file
-        logging.StreamHandler(),  # Also logs to the console
-    ],
-)
 logger = logging.getLogger(__name__)
 
+Base = declarative_base()
+
+# The session factory is bound to the engine on first use, so importing this
+# module (models, Alembic, tests) never opens a connection.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def create_database_if_not_exists() -> bool:
+    """Creates the database if it does not exist.
 
-def create_database_if_not_exists() -> None:
-    """Creates the database if it does not exist."""
+    Returns False, after logging the error, if it could not be checked or
+    created.
+    """
+    import psycopg2
+
+    conn = None
+    cursor = None
     try:
         conn = psycopg2.connect(
             dbname="postgres",  # Connect to default 'postgres' database
@@ -51,31 +62,56 @@ def create_database_if_not_exists() -> None:
             logger.info(f"Database '{DB_NAME}' created.")
         else:
             logger.info(f"Database '{DB_NAME}' already exists.")
+        return True
 
     except psycopg2.Error as e:
         logger.error(f"Database error: {e.pgcode} - {e.pgerror}")
+        return False
 
     except Exception as e:
         logger.error(f"Unexpected error during database setup: {str(e)}")
+        return False
 
     finally:
-        cursor.close()
-        conn.close()
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
 
 
-# Ensuring the database is created if not exists
-create_database_if_not_exists()
+def get_engine() -> Engine:
+    """Returns the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    DATABASE_URL, echo=SQL_ECHO, pool_pre_ping=True
+                )
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def dispose_engine(close: bool = True) -> None:
+    """Drops pooled connections, e.g. after forking a worker process.
+
+    In a forked child pass ``close=False`` so the parent's sockets are
+    abandoned rather than closed underneath it.
+    """
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose(close=close)
 
-# Set up SQLAlchemy
-engine = create_engine(DATABASE_URL, echo=True)
-Base = declarative_base()
 
-# Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def check_connection() -> None:
+    """Runs a trivial query, opening a pooled connection if none is idle."""
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
 
 
 def get_db() -> Iterator[Session]:
     """Creates a new database session/connection for a request."""
+    get_engine()
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,131 @@
+"""Text embedders for semantic search.
+
+Both embedders return L2-normalised float32 rows, so cosine similarity is
+a plain dot product. ``EMBEDDER`` picks one: ``openai`` (the default) or
+``hashing``, a local feature-hashing embedder meant for offline
+tests and benchmarks.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDER = os.getenv("EMBEDDER", "openai").lower()
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+HASHING_DIMENSIONS = int(os.getenv("HASHING_EMBEDDER_DIMENSIONS", "256"))
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+# The embeddings endpoint caps inputs per request and tokens per input.
+OPENAI_BATCH_SIZE = 256
+MAX_INPUT_CHARS = 8000
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_embedder: Optional["Embedder"] = None
+_embedder_lock = threading.Lock()
+
+
+def normalize(vectors: "np.ndarray") -> "np.ndarray":
+    """Scales each row to unit length, leaving all-zero rows as they are."""
+    import numpy as np
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class Embedder:
+    """Maps texts to an ``(n, dimensions)`` float32 matrix of unit rows.
+
+    ``name`` identifies the vector space: vectors from embedders with
+    different names must never share an index.
+    """
+
+    name: str
+    dimensions: int
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """Signed feature hashing of word unigrams and bigrams.
+
+    Captures lexical overlap only, but is deterministic, fast and needs
+    neither a network nor a model file.
+    """
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS) -> None:
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value >> 63 else -1.0
+                vectors[row, value % self.dimensions] += sign
+        return normalize(vectors)
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings from the OpenAI API, reusing the assistant's client."""
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL) -> None:
+        from app.assistants.openai import get_assistant
+
+        self.client = get_assistant().client
+        self.model = model
+        self.name = f"openai-{model}"
+        self.dimensions = MODEL_DIMENSIONS.get(model) or len(
+            self._request(["dimension probe"])[0]
+        )
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(
+            model=self.model, input=[text[:MAX_INPUT_CHARS] for text in texts]
+        )
+        return [item.embedding for item in response.data]
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        import numpy as np
+
+        rows: List[List[float]] = []
+        for start in range(0, len(texts), OPENAI_BATCH_SIZE):
+            rows.extend(self._request(texts[start : start + OPENAI_BATCH_SIZE]))
+        vectors = np.array(rows, dtype=np.float32).reshape(-1, self.dimensions)
+        return normalize(vectors)
+
+
+def get_embedder() -> Embedder:
+    """Returns the process-wide embedder chosen by ``EMBEDDER``."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                if EMBEDDER == "hashing":
+                    _embedder = HashingEmbedder()
+                elif EMBEDDER == "openai":
+                    _embedder = OpenAIEmbedder()
+                else:
+                    raise ValueError(f"Unknown EMBEDDER: {EMBEDDER}")
+                logger.info(f"Using embedder {_embedder.name}")
+    return _embedder
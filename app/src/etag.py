@@ -0,0 +1,34 @@
+import hashlib
+from http import HTTPStatus
+from typing import Any, Optional
+
+from flask import Response, make_response, request
+
+
+def make_etag(*parts: Any) -> str:
+    """Builds a strong ETag from version counters and the request's query.
+
+    The query string is part of the tag because different pages or filters
+    of the same resource are different representations.
+    """
+    query = hashlib.sha1(request.query_string).hexdigest()[:12]
+    return "-".join(str(part) for part in parts) + f"-{query}"
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """Returns a 304 response if the client already holds ``etag``.
+
+    Uses weak comparison, as RFC 9110 requires for If-None-Match, so tags
+    weakened by response compression still match.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = make_response("", HTTPStatus.NOT_MODIFIED)
+    return with_etag(response, etag)
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Tags a response so clients revalidate it on every use."""
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
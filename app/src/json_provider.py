@@ -0,0 +1,68 @@
+import datetime
+import os
+from typing import Any, Type
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _isoformat(value: datetime.datetime) -> str:
+    """Formats datetimes as ISO 8601; naive values are stored as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.isoformat()
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return _isoformat(value)
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider with ISO 8601 datetimes.
+
+    Matches ``OrjsonProvider`` output so switching providers does not
+    change the API.
+    """
+
+    default = staticmethod(_default)
+    sort_keys = False
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, which encodes straight to bytes."""
+
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(
+            obj, default=_default, option=self.option | orjson.OPT_APPEND_NEWLINE
+        )
+        return self._app.response_class(body, mimetype="application/json")
+
+
+def get_json_provider_class() -> Type[JSONProvider]:
+    """Picks the provider from ``JSON_PROVIDER`` (``orjson`` or ``stdlib``)."""
+    name = os.getenv("JSON_PROVIDER", "orjson").lower()
+    if name == "orjson" and orjson is not None:
+        return OrjsonProvider
+    return StdlibJSONProvider
+
+
+def init_json(app: Flask) -> None:
+    app.json = get_json_provider_class()(app)
@@ -0,0 +1,365 @@
+"""Conversation archival and garbage collection of OpenAI threads.
+
+Conversations idle for ``ARCHIVE_AFTER_DAYS`` are archived: they leave the
+default listing (and its partial index) but stay readable and are revived
+by the next message. With ``REMOTE_DELETE_AFTER_DAYS`` set, archived
+conversations that stay archived that long have their OpenAI thread
+deleted, after optionally snapshotting its messages into
+``conversation_messages``; their history is then served from that copy.
+Threads of deleted conversations are queued in ``thread_deletions``.
+
+Upstream deletes are paced to ``THREAD_GC_RATE`` per second and committed
+in batches, so ``python manage.py lifecycle`` can run alongside live
+traffic without eating into the API rate limit.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.assistants.openai import OpenAIAssistant
+from app.models.conversation_message import ConversationMessage
+from app.models.conversation_thread import ACTIVE, ARCHIVED, ConversationThread
+from app.models.thread_deletion import ThreadDeletion
+from app.models.user import User
+from app.src.search import replace_conversation_messages
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+# Unset: threads of archived conversations are kept upstream.
+REMOTE_DELETE_AFTER_DAYS: Optional[int] = (
+    int(os.environ["REMOTE_DELETE_AFTER_DAYS"])
+    if os.getenv("REMOTE_DELETE_AFTER_DAYS")
+    else None
+)
+THREAD_GC_RATE = float(os.getenv("THREAD_GC_RATE", "5"))
+BATCH_SIZE = 100
+# Queued deletes that keep failing are left for an operator to look at.
+MAX_DELETE_ATTEMPTS = 5
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Pacer:
+    """Spaces calls at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+
+    def wait(self) -> None:
+        now = time.monotonic()
+        if now < self._next:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+def bump_versions(db: Session, user_ids: Iterable[int]) -> None:
+    """Invalidates the cached conversation listings of ``user_ids``."""
+    user_ids = set(user_ids)
+    if user_ids:
+        db.query(User).filter(User.id.in_(user_ids)).update(
+            {User.conversations_version: User.conversations_version + 1},
+            synchronize_session=False,
+        )
+
+
+def archive(db: Session, conversation: ConversationThread) -> None:
+    """Archives a conversation; the caller commits."""
+    db.query(ConversationThread).filter_by(id=conversation.id).update(
+        {
+            ConversationThread.status: ARCHIVED,
+            ConversationThread.archived_at: _utcnow(),
+            ConversationThread.version: ConversationThread.version + 1,
+        },
+        synchronize_session=False,
+    )
+    bump_versions(db, [conversation.user_id])
+
+
+def delete_conversation(db: Session, conversation: ConversationThread) -> None:
+    """Deletes a conversation and its local messages, and queues its thread
+    for deletion upstream."""
+    if conversation.remote_deleted_at is None:
+        db.add(ThreadDeletion(thread_id=conversation.thread_id))
+    db.query(ConversationMessage).filter_by(conversation_id=conversation.id).delete(
+        synchronize_session=False
+    )
+    db.delete(conversation)
+    bump_versions(db, [conversation.user_id])
+    db.commit()
+
+
+def archive_idle(
+    db: Session, idle_for: timedelta, batch_size: int = BATCH_SIZE
+) -> int:
+    """Archives active conversations without messages for ``idle_for``.
+
+    Returns the number archived.
+    """
+    cutoff = _utcnow() - idle_for
+    last_activity = func.coalesce(
+        ConversationThread.last_activity_at, ConversationThread.created_at
+    )
+    archived = 0
+    while True:
+        rows = (
+            db.query(ConversationThread.id, ConversationThread.user_id)
+            .filter(ConversationThread.status == ACTIVE, last_activity < cutoff)
+            .order_by(last_activity)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            break
+        db.query(ConversationThread).filter(
+            ConversationThread.id.in_([row.id for row in rows])
+        ).update(
+            {
+                ConversationThread.status: ARCHIVED,
+                ConversationThread.archived_at: _utcnow(),
+                ConversationThread.version: ConversationThread.version + 1,
+            },
+            synchronize_session=False,
+        )
+        bump_versions(db, [row.user_id for row in rows])
+        db.commit()
+        archived += len(rows)
+    if archived:
+        logger.info(f"Archived {archived} idle conversations")
+    return archived
+
+
+def snapshot_messages(
+    db: Session, assistant: OpenAIAssistant, conversation: Any
+) -> int:
+    """Copies every message of the conversation's thread into
+    ``conversation_messages``, replacing what was captured so far."""
+    messages = list(assistant.iter_thread_messages(conversation.thread_id))
+    return replace_conversation_messages(
+        db, conversation.user_id, conversation.id, messages
+    )
+
+
+def drain_deletions(
+    db: Session,
+    assistant: OpenAIAssistant,
+    pacer: Pacer,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Deletes queued threads upstream; returns the number deleted."""
+    deleted = 0
+    after_id = 0
+    while True:
+        batch = (
+            db.query(ThreadDeletion)
+            .filter(
+                ThreadDeletion.id > after_id,
+                ThreadDeletion.attempts < MAX_DELETE_ATTEMPTS,
+            )
+            .order_by(ThreadDeletion.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        for deletion in batch:
+            pacer.wait()
+            if assistant.delete_thread(deletion.thread_id):
+                db.delete(deletion)
+                deleted += 1
+            else:
+                deletion.attempts += 1
+        after_id = batch[-1].id
+        db.commit()
+    return deleted
+
+
+def delete_archived_threads(
+    db: Session,
+    assistant: OpenAIAssistant,
+    pacer: Pacer,
+    archived_for: timedelta,
+    snapshot: bool = True,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Deletes the OpenAI threads of conversations archived for
+    ``archived_for``; returns the number deleted.
+
+    With ``snapshot`` a conversation whose messages cannot be copied keeps
+    its thread and is retried on the next run.
+    """
+    cutoff = _utcnow() - archived_for
+    deleted = 0
+    after_id = 0
+    while True:
+        batch = (
+            db.query(
+                ConversationThread.id,
+                ConversationThread.user_id,
+                ConversationThread.thread_id,
+            )
+            .filter(
+                ConversationThread.status == ARCHIVED,
+                ConversationThread.remote_deleted_at.is_(None),
+                ConversationThread.archived_at < cutoff,
+                ConversationThread.id > after_id,
+            )
+            .order_by(ConversationThread.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        for conversation in batch:
+            if snapshot:
+                pacer.wait()
+                try:
+                    snapshot_messages(db, assistant, conversation)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(
+                        f"Snapshot of conversation {conversation.id} failed: {str(e)}"
+                    )
+                    continue
+            # Locked and re-checked so a message reviving the conversation
+            # meanwhile either wins (and the thread is kept) or waits and
+            # sees the thread gone.
+            still_archived = (
+                db.query(ConversationThread.id)
+                .filter(
+                    ConversationThread.id == conversation.id,
+                    ConversationThread.status == ARCHIVED,
+                    ConversationThread.remote_deleted_at.is_(None),
+                )
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if still_archived is None:
+                db.rollback()
+                continue
+            pacer.wait()
+            if assistant.delete_thread(conversation.thread_id):
+                db.query(ConversationThread).filter_by(id=conversation.id).update(
+                    {
+                        ConversationThread.remote_deleted_at: _utcnow(),
+                        ConversationThread.version: ConversationThread.version + 1,
+                    },
+                    synchronize_session=False,
+                )
+                deleted += 1
+            db.commit()
+        after_id = batch[-1].id
+    return deleted
+
+
+def revive(db: Session, conversation: ConversationThread) -> bool:
+    """Makes an archived conversation active again, unless its thread has
+    been deleted upstream; the caller commits."""
+    revived = (
+        db.query(ConversationThread)
+        .filter(
+            ConversationThread.id == conversation.id,
+            ConversationThread.status == ARCHIVED,
+            ConversationThread.remote_deleted_at.is_(None),
+        )
+        .update(
+            {
+                ConversationThread.status: ACTIVE,
+                ConversationThread.archived_at: None,
+                ConversationThread.version: ConversationThread.version + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    if revived:
+        bump_versions(db, [conversation.user_id])
+    return bool(revived)
+
+
+def run_lifecycle(
+    db: Session,
+    assistant: OpenAIAssistant,
+    archive_after: Optional[timedelta],
+    remote_delete_after: Optional[timedelta],
+    snapshot: bool = True,
+    rate: float = THREAD_GC_RATE,
+) -> Dict[str, int]:
+    """One pass of the lifecycle job; returns what it did."""
+    pacer = Pacer(rate)
+    summary = {
+        "archived": archive_idle(db, archive_after) if archive_after else 0,
+        "queued_threads_deleted": drain_deletions(db, assistant, pacer),
+        "archived_threads_deleted": (
+            delete_archived_threads(
+                db, assistant, pacer, remote_delete_after, snapshot=snapshot
+            )
+            if remote_delete_after
+            else 0
+        ),
+    }
+    logger.info(f"Lifecycle pass finished: {summary}")
+    return summary
+
+
+def _message_dict(row: Any) -> Dict[str, Any]:
+    """Shapes a stored message like ``OpenAIAssistant`` returns it."""
+    return {
+        "id": row.message_id,
+        "role": row.role,
+        "created_at": int(row.created_at.replace(tzinfo=timezone.utc).timestamp()),
+        "content": [row.content],
+    }
+
+
+def local_messages(
+    db: Session, conversation_id: int, limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Returns a conversation's stored messages, newest first."""
+    query = (
+        db.query(
+            ConversationMessage.message_id,
+            ConversationMessage.role,
+            ConversationMessage.created_at,
+            ConversationMessage.content,
+        )
+        .filter(ConversationMessage.conversation_id == conversation_id)
+        .order_by(ConversationMessage.created_at.desc(), ConversationMessage.id.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    return [_message_dict(row) for row in query]
+
+
+def latest_local_messages(
+    db: Session, conversation_ids: List[int]
+) -> Dict[int, Dict[str, Any]]:
+    """Maps each conversation ID to its newest stored message."""
+    if not conversation_ids:
+        return {}
+    rows = (
+        db.query(
+            ConversationMessage.conversation_id,
+            ConversationMessage.message_id,
+            ConversationMessage.role,
+            ConversationMessage.created_at,
+            ConversationMessage.content,
+        )
+        .filter(ConversationMessage.conversation_id.in_(conversation_ids))
+        .distinct(ConversationMessage.conversation_id)
+        .order_by(
+            ConversationMessage.conversation_id,
+            ConversationMessage.created_at.desc(),
+            ConversationMessage.id.desc(),
+        )
+    )
+    return {row.conversation_id: _message_dict(row) for row in rows}
@@ -0,0 +1,264 @@
+"""Process-wide logging: JSON records written off the request thread.
+
+``configure_logging`` points the root logger at a bounded queue. A
+``QueueListener`` thread formats the records and writes them to stderr
+and, if ``LOG_FILE`` is set, to a size-rotated file, so a request only
+pays for building the record. When the queue is full new records are
+dropped rather than blocking.
+
+Every record carries the id of the request that logged it (see
+``init_request_ids``). Extra fields and messages are cut to
+``LOG_FIELD_MAX_CHARS``, and each INFO/DEBUG call site may log at most
+``LOG_RATE_LIMIT`` records per second; warnings and errors are never
+dropped.
+
+Settings: ``LOG_LEVEL`` (INFO), ``LOG_FORMAT`` (``json`` or ``text``),
+``LOG_FILE`` (``app.log``, but empty under ``gunicorn.conf.py``; empty for
+stderr only, ``{pid}`` is replaced by the process id), ``LOG_MAX_BYTES`` (10 MiB), ``LOG_BACKUP_COUNT`` (5),
+``LOG_FIELD_MAX_CHARS`` (1000), ``LOG_RATE_LIMIT`` (20, 0 disables) and
+``LOG_QUEUE_SIZE`` (10000).
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from flask import Flask, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 2**20)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_FIELD_MAX_CHARS = int(os.getenv("LOG_FIELD_MAX_CHARS", "1000"))
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "20"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "request_id",
+    "suppressed",
+}
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def truncate(value: str, limit: int = LOG_FIELD_MAX_CHARS) -> str:
+    if len(value) <= limit:
+        return value
+    return f"{value[:limit]}...[{len(value) - limit} more chars]"
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request id, on the thread that logs."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets each INFO/DEBUG call site through at most ``rate`` times a second.
+
+    The next record let through from a throttled call site reports how many
+    were suppressed in ``suppressed``.
+    """
+
+    def __init__(self, rate: int) -> None:
+        super().__init__()
+        self.rate = rate
+        self._windows: Dict[Tuple[str, int], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        second = int(time.monotonic())
+        with self._lock:
+            # [window second, records let through, records suppressed]
+            window = self._windows.setdefault(key, [second, 0, 0])
+            if window[0] != second:
+                if window[2]:
+                    record.suppressed = window[2]
+                window[:] = [second, 0, 0]
+            if window[1] >= self.rate:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without blocking; drops them when the queue is full.
+
+    The next record that fits reports the number lost in ``dropped``.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[Any]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+            self.dropped = 0
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback here, as the base class does,
+        # but leave formatting to the listener's handlers.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, request id,
+    message and any ``extra`` fields, each cut to ``LOG_FIELD_MAX_CHARS``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": truncate(record.getMessage()),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = truncate(value) if isinstance(value, str) else value
+        if getattr(record, "suppressed", None):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message)
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().formatMessage(record)
+
+
+def _handlers(filename: Optional[str]) -> List[logging.Handler]:
+    formatter = JSONFormatter() if LOG_FORMAT == "json" else TextFormatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if filename:
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                filename.format(pid=os.getpid()),
+                maxBytes=LOG_MAX_BYTES,
+                backupCount=LOG_BACKUP_COUNT,
+                encoding="utf-8",
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging(filename: Optional[str] = LOG_FILE) -> None:
+    """Sets up the root logger once per process (forked workers included).
+
+    ``RotatingFileHandler`` is not safe across processes, so
+    ``gunicorn.conf.py`` leaves ``LOG_FILE`` empty and the container
+    collects stderr; a file set there needs ``{pid}`` in its name.
+    """
+    global _listener, _listener_pid
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, DroppingQueueHandler):
+                root.removeHandler(handler)
+
+        log_queue: "queue.Queue[Any]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT))
+        queue_handler.addFilter(RequestContextFilter())
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, *_handlers(filename), respect_handler_level=True
+        )
+        _listener.start()
+        _listener_pid = os.getpid()
+        atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Writes out queued records and stops the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def init_request_ids(app: "Flask") -> None:
+    """Tags each request's log records with an id, echoed in ``X-Request-ID``.
+
+    A well-formed id sent by the client or a proxy is reused so logs can
+    be correlated across services.
+    """
+    # Imported here so CLI commands can configure logging without Flask.
+    from flask import request
+
+    @app.before_request
+    def assign_request_id() -> None:
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        request_id_var.set(
+            incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        )
+
+    @app.after_request
+    def echo_request_id(response: "Response") -> "Response":
+        request_id = request_id_var.get()
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        # Cleared once the body is sent, so streamed responses keep the id.
+        response.call_on_close(lambda: request_id_var.set(None))
+        return response
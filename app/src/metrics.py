@@ -0,0 +1,350 @@
+"""Prometheus metrics and per-stage request timing.
+
+``init_metrics`` adds ``GET /metrics`` and records, for every request, its
+duration per route, method and status, and how that time splits into
+stages: ``auth`` (``token_required``), ``db`` (every statement, through
+SQLAlchemy cursor events), ``upstream`` (``OpenAIAssistant`` calls),
+``serialize`` (the JSON provider) and ``app`` for the remainder. Stages are
+exclusive: the query ``token_required`` runs counts as ``db``, not
+``auth``. Durations are taken when the response is closed, so streamed
+bodies are included.
+
+Under gunicorn each worker writes its samples to files in
+``PROMETHEUS_MULTIPROC_DIR`` (set up by ``gunicorn.conf.py``) and any
+worker answering ``/metrics`` aggregates all of them. ``/metrics`` only
+answers requests sent with ``Authorization: Bearer <METRICS_TOKEN>`` and is
+a 404 while ``METRICS_TOKEN`` is unset.
+
+A request can also be profiled with pyinstrument, if it is installed:
+send ``X-Profile: <PROFILE_TOKEN>``, or set ``PROFILE_SAMPLE_RATE`` to
+profile a fraction of all requests. Reports are written as HTML to
+``PROFILE_DIR``, which keeps the newest ``PROFILE_MAX_FILES`` of them.
+Requests profiled by token get the report's file name in the
+``X-Profile-Report`` response header.
+"""
+import hmac
+import inspect
+import logging
+import os
+import random
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http import HTTPStatus
+from typing import Any, Callable, DefaultDict, Iterator, List, Optional
+
+from flask import Flask, Response, abort, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - optional profiler
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+
+# Assistant runs take seconds to minutes, so the buckets reach well past
+# the usual web defaults.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request duration until the response is closed.",
+    ["method", "route", "status"],
+    buckets=DURATION_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "http_request_stage_duration_seconds",
+    "Time each request spent per stage (auth, db, upstream, serialize, app).",
+    ["route", "stage"],
+    buckets=DURATION_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request.",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+UPSTREAM_SECONDS = Histogram(
+    "openai_call_duration_seconds",
+    "Duration of OpenAIAssistant calls, inside requests or not.",
+    ["call", "outcome"],
+    buckets=DURATION_BUCKETS,
+)
+
+
+class _Timings:
+    """Exclusive time per stage for one request.
+
+    ``stack`` holds, per open stage, the time already claimed by stages
+    nested inside it, so each second is counted under exactly one stage.
+    """
+
+    __slots__ = ("stages", "stack", "queries")
+
+    def __init__(self) -> None:
+        self.stages: DefaultDict[str, float] = defaultdict(float)
+        self.stack: List[float] = []
+        self.queries = 0
+
+    def begin(self) -> float:
+        self.stack.append(0.0)
+        return time.perf_counter()
+
+    def end(self, stage: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        nested = self.stack.pop()
+        self.stages[stage] += elapsed - nested
+        if self.stack:
+            self.stack[-1] += elapsed
+
+
+_timings: ContextVar[Optional[_Timings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def request_stage(stage: str) -> Iterator[None]:
+    """Attributes the time spent in the block to ``stage``.
+
+    Does nothing outside a request, e.g. in background threads.
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = timings.begin()
+    try:
+        yield
+    finally:
+        timings.end(stage, started)
+
+
+def upstream_call(func: Callable) -> Callable:
+    """Times an ``OpenAIAssistant`` method as the ``upstream`` stage.
+
+    Generator methods are timed per step, so time the caller spends between
+    items (e.g. writing a streamed response) is not counted.
+    """
+    call = func.__name__
+
+    def observe(started: float, outcome: str) -> None:
+        UPSTREAM_SECONDS.labels(call, outcome).observe(time.perf_counter() - started)
+
+    if inspect.isgeneratorfunction(func):
+
+        @wraps(func)
+        def generator_wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            started = time.perf_counter()
+            outcome = "error"
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    with request_stage("upstream"):
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            outcome = "ok"
+                            return
+                    yield item
+            except GeneratorExit:
+                outcome = "cancelled"
+                raise
+            finally:
+                iterator.close()
+                observe(started, outcome)
+
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with request_stage("upstream"):
+                result = func(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            observe(started, outcome)
+
+    return wrapper
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    timings = _timings.get()
+    if timings is not None:
+        conn.info.setdefault("request_stage_started", []).append(timings.begin())
+
+
+def _end_query(conn: Any) -> None:
+    timings = _timings.get()
+    started = conn.info.get("request_stage_started")
+    if timings is not None and started:
+        timings.end("db", started.pop())
+        timings.queries += 1
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    _end_query(conn)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    if exception_context.connection is not None:
+        _end_query(exception_context.connection)
+
+
+def _time_serialization(provider: Any) -> None:
+    for name in ("dumps", "response"):
+        method = getattr(provider, name)
+
+        def timed(*args: Any, _method: Callable = method, **kwargs: Any) -> Any:
+            with request_stage("serialize"):
+                return _method(*args, **kwargs)
+
+        setattr(provider, name, timed)
+
+
+def _registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    # Built per scrape, as prometheus_client recommends for multiprocess mode.
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def _token_matches(value: Optional[str], token: Optional[str]) -> bool:
+    return bool(value and token) and hmac.compare_digest(value, token)
+
+
+def _metrics_authorized() -> bool:
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and _token_matches(credentials, METRICS_TOKEN)
+
+
+def _profile_trigger() -> Optional[str]:
+    """Returns ``"token"`` or ``"sample"`` if the request is to be profiled."""
+    if Profiler is None:
+        return None
+    if _token_matches(request.headers.get("X-Profile"), PROFILE_TOKEN):
+        return "token"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+def _profile_path(route: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(PROFILE_DIR, f"{stamp}-{os.getpid()}-{slug}.html")
+
+
+def _prune_profiles() -> None:
+    """Deletes the oldest reports beyond ``PROFILE_MAX_FILES``."""
+    reports = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.name.endswith(".html") and entry.is_file():
+            try:
+                reports.append((entry.stat().st_mtime, entry.path))
+            except OSError:  # deleted meanwhile by another worker
+                continue
+    reports.sort()
+    for _, path in reports[: max(len(reports) - PROFILE_MAX_FILES, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+
+
+def _write_profile(profiler: Any, path: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(path, "w") as report:
+        report.write(profiler.output_html())
+    _prune_profiles()
+
+
+def init_metrics(app: Flask) -> None:
+    """Adds ``GET /metrics`` and per-request timing. Call after ``init_json``."""
+    _time_serialization(app.json)
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics() -> Response:
+        if not _metrics_authorized():
+            abort(HTTPStatus.NOT_FOUND)
+        return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+    @app.before_request
+    def start_timing() -> None:
+        g.request_started = time.perf_counter()
+        g.request_timings = _Timings()
+        _timings.set(g.request_timings)
+        g.profiler = None
+        g.profile_trigger = _profile_trigger()
+        if g.profile_trigger is not None:
+            g.profiler = Profiler(interval=PROFILE_INTERVAL)
+            g.profiler.start()
+
+    @app.after_request
+    def record_timing(response: Response) -> Response:
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        timings: _Timings = g.pop("request_timings")
+        profiler = g.pop("profiler", None)
+        profile_trigger = g.pop("profile_trigger", None)
+        # Unmatched paths share one label to keep the series count bounded.
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        method = request.method
+        status = str(response.status_code)
+
+        report = None
+        if profiler is not None:
+            report = _profile_path(route)
+            if profile_trigger == "token":
+                response.headers["X-Profile-Report"] = os.path.basename(report)
+
+        def finish() -> None:
+            total = time.perf_counter() - started
+            _timings.set(None)
+            REQUEST_SECONDS.labels(method, route, status).observe(total)
+            for stage, seconds in timings.stages.items():
+                STAGE_SECONDS.labels(route, stage).observe(seconds)
+            STAGE_SECONDS.labels(route, "app").observe(
+                max(total - sum(timings.stages.values()), 0.0)
+            )
+            REQUEST_QUERIES.labels(route).observe(timings.queries)
+            if profiler is not None:
+                profiler.stop()
+                try:
+                    _write_profile(profiler, report)
+                    logger.info(f"Wrote profile of {method} {route} to {report}")
+                except OSError as e:
+                    logger.error(f"Failed to write profile: {str(e)}")
+
+        response.call_on_close(finish)
+        return response
@@ -0,0 +1,145 @@
+"""Speculative prefetch of the newest conversation's messages.
+
+Opening the app lists conversations and then fetches the newest one's
+messages, which is a cold OpenAI round trip. ``schedule_prefetch`` starts
+that fetch in the background on login and on a first-page listing that is
+not answered with 304 (a revalidating client already has the data), and
+``GET /conversations/<id>/messages`` takes the result from here when it
+matches. Entries are keyed by the thread's version, so a new message makes
+them unreachable, and they expire after ``PREFETCH_TTL_SECONDS``.
+
+The cache is per process. The front end keeps its connection alive, so its
+follow-up request normally reaches the worker that did the prefetch;
+``include_latest_messages=1`` on the listing avoids relying on that.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.assistants.openai import get_assistant
+from app.models.conversation_thread import ACTIVE, ConversationThread
+from app.src.db import SessionLocal, get_engine
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_MESSAGES = int(os.getenv("PREFETCH_MESSAGES", "50"))
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "30"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+# How long a request waits for a prefetch still in flight before fetching
+# on its own; the upstream call is already under way, so waiting is cheaper.
+PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", "5"))
+MAX_ENTRIES = 1000
+
+# (conversation ID, thread version) -> (expiry, future of the message page)
+_Key = Tuple[int, int]
+_cache: "OrderedDict[_Key, Tuple[float, Future]]" = OrderedDict()
+_scheduled: Set[int] = set()
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=PREFETCH_CONCURRENCY, thread_name_prefix="prefetch"
+                )
+    return _executor
+
+
+def _lookup(key: _Key) -> Optional[Future]:
+    """Returns the live entry for ``key``; call with ``_lock`` held."""
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _cache[key]
+        return None
+    return entry[1]
+
+
+def _fetch(thread_id: str) -> Optional[List[Dict[str, Any]]]:
+    return get_assistant().get_thread_messages(thread_id, limit=PREFETCH_MESSAGES)
+
+
+def prefetch(conversation_id: int, version: int, thread_id: str) -> Future:
+    """Starts fetching the conversation's newest messages unless a fetch
+    for this version is already cached or in flight."""
+    key = (conversation_id, version)
+    executor = _get_executor()
+    with _lock:
+        future = _lookup(key)
+        if future is not None:
+            return future
+        future = executor.submit(_fetch, thread_id)
+        _cache[key] = (time.monotonic() + PREFETCH_TTL_SECONDS, future)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return future
+
+
+def _prefetch_latest(user_id: int) -> None:
+    with _lock:
+        _scheduled.discard(user_id)
+    get_engine()
+    db = SessionLocal()
+    try:
+        latest = (
+            db.query(
+                ConversationThread.id,
+                ConversationThread.version,
+                ConversationThread.thread_id,
+            )
+            .filter(
+                ConversationThread.user_id == user_id,
+                ConversationThread.status == ACTIVE,
+            )
+            .order_by(
+                ConversationThread.created_at.desc(), ConversationThread.id.desc()
+            )
+            .first()
+        )
+    except Exception as e:
+        logger.error(f"Prefetch lookup failed for user {user_id}: {str(e)}")
+        return
+    finally:
+        db.close()
+    if latest is not None:
+        prefetch(latest.id, latest.version, latest.thread_id)
+
+
+def schedule_prefetch(user_id: int) -> None:
+    """Prefetches the user's newest conversation off the request path."""
+    with _lock:
+        if user_id in _scheduled:
+            return
+        _scheduled.add(user_id)
+    _get_executor().submit(_prefetch_latest, user_id)
+
+
+def take_prefetched(
+    conversation_id: int, version: int, limit: Optional[int]
+) -> Optional[List[Dict[str, Any]]]:
+    """Returns the prefetched newest ``limit`` messages, or None if there is
+    no usable prefetch and the caller should fetch them itself."""
+    if not limit or limit > PREFETCH_MESSAGES:
+        return None
+    with _lock:
+        future = _lookup((conversation_id, version))
+    if future is None:
+        return None
+    try:
+        messages = future.result(timeout=PREFETCH_WAIT_SECONDS)
+    except Exception as e:
+        logger.warning(f"Prefetch for conversation {conversation_id} unusable: {e}")
+        return None
+    if messages is None:
+        return None
+    logger.debug(f"Served conversation {conversation_id} from prefetch")
+    return messages[:limit]
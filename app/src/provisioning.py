@@ -0,0 +1,302 @@
+"""Bulk provisioning of users from CSV or JSONL.
+
+Rows are read and validated as a stream and handled in batches of
+``PROVISION_BATCH_SIZE``. For each batch, emails already registered are
+found with one query and skipped before any hashing. The remaining
+passwords are hashed across a process pool: ``PROVISION_HASH_PROCESSES``
+(one per CPU by default) for the CLI, ``PROVISION_WEB_HASH_PROCESSES`` (2)
+in each web worker, which shuts its pool down on exit. The batch is then
+stored with a single ``INSERT ... ON CONFLICT (email) DO NOTHING``, which
+also settles races with concurrent registrations. If a batch insert fails,
+its rows are retried one at a time so the error is reported against the
+row that caused it.
+
+``provision_users`` yields one result per row that was not created, with
+the row's line number, and ends with a ``summary``.
+"""
+import codecs
+import csv
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from werkzeug.security import generate_password_hash
+
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+PROVISION_BATCH_SIZE = int(os.getenv("PROVISION_BATCH_SIZE", "1000"))
+PROVISION_HASH_PROCESSES = int(
+    os.getenv("PROVISION_HASH_PROCESSES", str(os.cpu_count() or 1))
+)
+# Every gunicorn worker keeps a pool of its own, so uploads get a small one;
+# large files are better provisioned with the CLI.
+PROVISION_WEB_HASH_PROCESSES = int(os.getenv("PROVISION_WEB_HASH_PROCESSES", "2"))
+PROVISION_FORMATS = ("csv", "jsonl")
+# The table rather than the mapped class, so the CLI need not load every
+# model that ``User`` has relationships with.
+USERS = User.__table__
+EMAIL_LENGTH = USERS.c.email.type.length
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_lock = threading.Lock()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _invalid(line: int, email: Any, error: str) -> Dict[str, Any]:
+    return {
+        "line": line,
+        "email": email if isinstance(email, str) else None,
+        "status": "invalid",
+        "error": error,
+    }
+
+
+def _row(line: int, email: Any, password: Any) -> Dict[str, Any]:
+    """Validates one input row; the caller reports ``invalid`` rows."""
+    if not isinstance(email, str) or not email.strip():
+        return _invalid(line, email, "Email is required")
+    email = email.strip()
+    if (
+        "@" not in email
+        or len(email) > EMAIL_LENGTH
+        or any(char.isspace() or not char.isprintable() for char in email)
+    ):
+        return _invalid(line, email, "Email is not valid")
+    if not isinstance(password, str) or not password:
+        return _invalid(line, email, "Password is required")
+    return {"line": line, "email": email, "password": password}
+
+
+def _decode(lines: Iterable[bytes], undecodable: Set[int]) -> Iterator[str]:
+    """Decodes line by line, replacing bad bytes and adding the line's
+    number to ``undecodable`` so its row can be reported as invalid."""
+    for line_number, raw in enumerate(lines, start=1):
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            undecodable.add(line_number)
+            line = raw.decode("utf-8", errors="replace")
+        yield line.lstrip(codecs.BOM_UTF8.decode()) if line_number == 1 else line
+
+
+def _parse_csv(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    undecodable: Set[int] = set()
+    reader = csv.reader(_decode(lines, undecodable))
+    try:
+        header = [column.strip().lower() for column in next(reader, [])]
+    except csv.Error as e:
+        raise ValueError(f"The CSV header could not be read: {str(e)}") from e
+    if "email" not in header or "password" not in header:
+        raise ValueError("The CSV header must name 'email' and 'password' columns")
+    email_at, password_at = header.index("email"), header.index("password")
+
+    def rows() -> Iterator[Dict[str, Any]]:
+        # A quoted field can span lines, so a record covers (start, line_num].
+        start = reader.line_num
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield _invalid(reader.line_num, None, f"Malformed CSV: {str(e)}")
+                start = reader.line_num
+                continue
+            line, first = reader.line_num, start + 1
+            start = line
+            if any(n in undecodable for n in range(first, line + 1)):
+                yield _invalid(line, None, "Line is not valid UTF-8")
+                continue
+            if not any(field.strip() for field in record):
+                continue
+            if len(record) != len(header):
+                yield _invalid(line, None, "Wrong number of columns")
+                continue
+            yield _row(line, record[email_at], record[password_at])
+
+    return rows()
+
+
+def _parse_jsonl(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    for line_number, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield _invalid(line_number, None, "Line is not valid JSON")
+            continue
+        if not isinstance(record, dict):
+            yield _invalid(line_number, None, "Line is not a JSON object")
+            continue
+        yield _row(line_number, record.get("email"), record.get("password"))
+
+
+def parse_users(lines: Iterable[bytes], fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yields ``{"line", "email", "password"}`` rows, or ``invalid`` results
+    for rows that cannot be provisioned.
+
+    Raises ``ValueError`` at once for an unknown format or a CSV header
+    without ``email`` and ``password`` columns.
+    """
+    if fmt not in PROVISION_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(PROVISION_FORMATS)}")
+    return _parse_csv(lines) if fmt == "csv" else _parse_jsonl(lines)
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned, not forked: the caller may be a threaded web worker.
+            _pool = ProcessPoolExecutor(
+                max_workers=processes, mp_context=get_context("spawn")
+            )
+            _pool_size = processes
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stops the hashing processes, e.g. when a web worker exits."""
+    global _pool, _pool_size
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool, _pool_size = None, 0
+
+
+def hash_passwords(
+    passwords: List[str], processes: int = PROVISION_HASH_PROCESSES
+) -> List[str]:
+    """Hashes like ``User.set_password``, spread over ``processes``."""
+    if processes <= 1 or len(passwords) < 2 * processes:
+        return [generate_password_hash(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (processes * 4))
+    return list(
+        _get_pool(processes).map(generate_password_hash, passwords, chunksize=chunksize)
+    )
+
+
+def _insert(db: Session, rows: List[Dict[str, Any]]) -> Set[str]:
+    """Inserts ``rows``, skipping emails taken meanwhile; returns the emails
+    inserted."""
+    statement = (
+        pg_insert(USERS)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[USERS.c.email])
+        .returning(USERS.c.email)
+    )
+    return {row.email for row in db.execute(statement)}
+
+
+def _store(
+    db: Session, batch: List[Dict[str, Any]], processes: int
+) -> Iterator[Dict[str, Any]]:
+    """Stores a batch of valid rows, yielding a result for each row that was
+    not created."""
+    emails = [row["email"] for row in batch]
+    existing = set(
+        db.execute(select(USERS.c.email).where(USERS.c.email.in_(emails))).scalars()
+    )
+    fresh = [row for row in batch if row["email"] not in existing]
+    if fresh:
+        hashes = hash_passwords([row["password"] for row in fresh], processes)
+        now = _utcnow()
+        values = [
+            {"email": row["email"], "password_hash": password_hash, "created_at": now}
+            for row, password_hash in zip(fresh, hashes)
+        ]
+        failed: Set[str] = set()
+        try:
+            created = _insert(db, values)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # The first line only: the rest echoes the statement, hashes included.
+            error = str(e).splitlines()[0]
+            logger.warning(f"Batch insert failed, retrying rows one by one: {error}")
+            created = set()
+            for row, value in zip(fresh, values):
+                try:
+                    created |= _insert(db, [value])
+                    db.commit()
+                except Exception as row_error:
+                    db.rollback()
+                    failed.add(row["email"])
+                    yield {
+                        "line": row["line"],
+                        "email": row["email"],
+                        "status": "error",
+                        "error": str(row_error).splitlines()[0],
+                    }
+        # Rows that lost a race with a concurrent registration.
+        existing.update(
+            row["email"]
+            for row in fresh
+            if row["email"] not in created and row["email"] not in failed
+        )
+
+    for row in batch:
+        if row["email"] in existing:
+            yield {"line": row["line"], "email": row["email"], "status": "exists"}
+
+
+def provision_users(
+    db: Session,
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int = PROVISION_BATCH_SIZE,
+    processes: int = PROVISION_HASH_PROCESSES,
+) -> Iterator[Dict[str, Any]]:
+    """Creates users from ``parse_users`` rows, committing each batch.
+
+    Yields a result for every row that was not created (``invalid``,
+    ``duplicate`` of an earlier row, ``exists`` or ``error``) and finally
+    ``{"summary": {...}}`` with the count of each outcome.
+    """
+    counts = dict.fromkeys(("created", "invalid", "duplicate", "exists", "error"), 0)
+    seen: Set[str] = set()
+    batch: List[Dict[str, Any]] = []
+
+    def flush() -> Iterator[Dict[str, Any]]:
+        failed = 0
+        for result in _store(db, batch, processes):
+            counts[result["status"]] += 1
+            failed += 1
+            yield result
+        counts["created"] += len(batch) - failed
+
+    for row in rows:
+        if "status" in row:
+            counts[row["status"]] += 1
+            yield row
+            continue
+        if row["email"] in seen:
+            counts["duplicate"] += 1
+            yield {"line": row["line"], "email": row["email"], "status": "duplicate"}
+            continue
+        seen.add(row["email"])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield from flush()
+            batch = []
+    if batch:
+        yield from flush()
+
+    logger.info(f"Provisioned users: {counts}")
+    yield {"summary": counts}
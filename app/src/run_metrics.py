@@ -0,0 +1,248 @@
+"""Per-run latency and token telemetry.
+
+``OpenAIAssistant`` reports every finished run through ``record_run``,
+which only enqueues a row: a background thread writes rows to
+``run_metrics`` in batches, so the request thread never waits on the
+insert. If the queue is full (the database is down) new rows are dropped
+rather than blocking replies.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.models.run_metric import RunMetric
+from app.src.db import SessionLocal, get_engine
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SECONDS = float(os.getenv("RUN_METRICS_FLUSH_SECONDS", "5"))
+FLUSH_ROWS = 200
+MAX_QUEUED_ROWS = 10_000
+
+BUCKETS = ("minute", "hour", "day")
+GROUPS = {"none": "NULL", "model": "model", "user": "user_id"}
+
+_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=MAX_QUEUED_ROWS)
+_writer: Optional[threading.Thread] = None
+_writer_pid: Optional[int] = None
+_writer_lock = threading.Lock()
+_pending = threading.Event()
+_dropped = 0
+
+
+def _timestamp(value: Optional[int]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def run_metric_row(
+    run: Any,
+    thread_id: str,
+    user_id: Optional[int],
+    wall_ms: int,
+    polls: int = 0,
+    streamed: bool = False,
+) -> Dict[str, Any]:
+    """Flattens an Assistants ``Run`` object into a ``run_metrics`` row."""
+    usage = getattr(run, "usage", None)
+    finished_at = (
+        run.completed_at
+        or getattr(run, "failed_at", None)
+        or getattr(run, "cancelled_at", None)
+        or getattr(run, "expired_at", None)
+    )
+    return {
+        "run_id": run.id,
+        "thread_id": thread_id,
+        "user_id": user_id,
+        "model": getattr(run, "model", None),
+        "status": run.status,
+        "streamed": streamed,
+        "created_at": _timestamp(run.created_at),
+        "started_at": _timestamp(run.started_at),
+        "completed_at": _timestamp(finished_at),
+        "wall_ms": wall_ms,
+        "polls": polls,
+        "prompt_tokens": usage.prompt_tokens if usage else None,
+        "completion_tokens": usage.completion_tokens if usage else None,
+    }
+
+
+def _write(rows: List[Dict[str, Any]]) -> None:
+    get_engine()
+    db = SessionLocal()
+    try:
+        db.execute(insert(RunMetric), rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to write {len(rows)} run metrics: {str(e)}")
+    finally:
+        db.close()
+
+
+def _drain(limit: int) -> List[Dict[str, Any]]:
+    rows = []
+    while len(rows) < limit:
+        try:
+            rows.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return rows
+
+
+def _run_writer() -> None:
+    while True:
+        _pending.wait()
+        # Let rows accumulate so a busy server writes one insert per flush.
+        # They stay queued meanwhile, so flush() at exit still sees them.
+        time.sleep(FLUSH_SECONDS)
+        _pending.clear()
+        flush()
+
+
+def _ensure_writer() -> None:
+    """Starts the writer thread once per process (forked workers included)."""
+    global _writer, _writer_pid
+    if _writer is not None and _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = threading.Thread(
+                target=_run_writer, name="run-metrics", daemon=True
+            )
+            _writer.start()
+            _writer_pid = os.getpid()
+            atexit.register(flush)
+
+
+def record_run(row: Dict[str, Any]) -> None:
+    """Queues a row for the background writer; never blocks."""
+    global _dropped
+    _ensure_writer()
+    try:
+        _queue.put_nowait(row)
+        _pending.set()
+    except queue.Full:
+        _dropped += 1
+        if _dropped % 1000 == 1:
+            logger.warning(f"Run metrics queue full; {_dropped} rows dropped so far")
+
+
+def flush() -> None:
+    """Writes whatever is still queued, e.g. when a worker exits."""
+    while True:
+        rows = _drain(FLUSH_ROWS)
+        if not rows:
+            return
+        _write(rows)
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+SUMMARY_SQL = """
+SELECT date_trunc(:bucket, created_at) AS window_start,
+       {group} AS group_key,
+       count(*) AS runs,
+       count(*) FILTER (WHERE status <> 'completed') AS failed,
+       percentile_cont({quantiles}) WITHIN GROUP (ORDER BY wall_ms) AS wall_ms,
+       percentile_cont({quantiles}) WITHIN GROUP (
+           ORDER BY extract(epoch FROM started_at - created_at) * 1000
+       ) FILTER (WHERE started_at IS NOT NULL) AS queue_ms,
+       percentile_cont({quantiles}) WITHIN GROUP (
+           ORDER BY extract(epoch FROM completed_at - started_at) * 1000
+       ) FILTER (WHERE completed_at IS NOT NULL) AS model_ms,
+       percentile_cont({quantiles}) WITHIN GROUP (
+           ORDER BY wall_ms - extract(epoch FROM completed_at - created_at) * 1000
+       ) FILTER (WHERE completed_at IS NOT NULL) AS overhead_ms,
+       sum(prompt_tokens) AS prompt_tokens,
+       sum(completion_tokens) AS completion_tokens,
+       sum(completion_tokens) / nullif(
+           sum(extract(epoch FROM completed_at - started_at))
+               FILTER (WHERE completion_tokens IS NOT NULL),
+           0
+       ) AS tokens_per_second
+FROM run_metrics
+WHERE created_at >= :since AND created_at < :until {filters}
+GROUP BY 1, 2
+ORDER BY 1, 2
+"""
+
+
+def _percentiles(values: Optional[List[float]]) -> Optional[Dict[str, float]]:
+    if values is None:
+        return None
+    return {
+        f"p{round(quantile * 100)}": round(value, 1)
+        for quantile, value in zip(QUANTILES, values)
+    }
+
+
+def summarize(
+    db: Session,
+    bucket: str = "hour",
+    group_by: str = "none",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    model: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Aggregates runs per time window and group.
+
+    Latencies are p50/p95/p99 in milliseconds: ``wall_ms`` is the whole
+    send as seen by this server, split into upstream ``queue_ms`` and
+    ``model_ms`` and our own ``overhead_ms``. Upstream timestamps have
+    one-second resolution, so the split is coarse for short runs.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    if group_by not in GROUPS:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUPS)}")
+    until = until or datetime.now(timezone.utc).replace(tzinfo=None)
+    since = since or until - timedelta(days=1)
+
+    params: Dict[str, Any] = {
+        "bucket": bucket,
+        "since": since,
+        "until": until,
+    }
+    filters = ""
+    if model:
+        filters += " AND model = :model"
+        params["model"] = model
+    if user_id is not None:
+        filters += " AND user_id = :user_id"
+        params["user_id"] = user_id
+
+    sql = SUMMARY_SQL.format(
+        group=GROUPS[group_by],
+        filters=filters,
+        quantiles=f"ARRAY{list(QUANTILES)}::float8[]",
+    )
+    summary = []
+    for row in db.execute(text(sql), params):
+        entry: Dict[str, Any] = {"window_start": row.window_start}
+        if group_by != "none":
+            entry[group_by] = row.group_key
+        entry["runs"] = row.runs
+        entry["failed"] = row.failed
+        for column in ("wall_ms", "queue_ms", "model_ms", "overhead_ms"):
+            entry[column] = _percentiles(getattr(row, column))
+        entry["prompt_tokens"] = row.prompt_tokens
+        entry["completion_tokens"] = row.completion_tokens
+        entry["tokens_per_second"] = (
+            round(float(row.tokens_per_second), 1)
+            if row.tokens_per_second is not None
+            else None
+        )
+        summary.append(entry)
+    return summary
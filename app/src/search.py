@@ -0,0 +1,276 @@
+"""Full-text search over a user's conversation history.
+
+Message text is captured into ``conversation_messages`` as it is sent and
+received, and ``python manage.py search-backfill`` copies older history
+from OpenAI. Postgres keeps a stored ``tsvector`` per message in a GIN
+index that leads with ``user_id``, so a query only touches the searching
+user's postings.
+"""
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import REAL, bindparam, cast, func, literal_column, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.assistants.openai import OpenAIAssistant
+from app.models.conversation_message import SEARCH_CONFIG, ConversationMessage
+from app.models.conversation_thread import ConversationThread
+from app.src.batch import run_bounded
+from app.src.pagination import encode_rank_cursor
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CONCURRENCY = int(os.getenv("SEARCH_BACKFILL_CONCURRENCY", "8"))
+BACKFILL_CHUNK_SIZE = 200
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+# Snippets are HTML: the message text is escaped before ``<mark>`` is added,
+# so stored markup comes back as text rather than as live tags.
+HTML_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"))
+# Columns a backfill refreshes on rows it matches to upstream messages.
+UPSERT_COLUMNS = ("message_id", "role", "content", "created_at")
+
+
+def _message_row(
+    user_id: int, conversation_id: int, message: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Maps a message dict from ``OpenAIAssistant`` to a table row."""
+    created_at = message.get("created_at")
+    if isinstance(created_at, (int, float)):
+        created_at = datetime.fromtimestamp(created_at, timezone.utc)
+    return {
+        "user_id": user_id,
+        "conversation_id": conversation_id,
+        "message_id": message.get("id"),
+        "role": message["role"],
+        "content": "\n".join(message["content"]),
+        "created_at": (created_at or datetime.now(timezone.utc)).replace(
+            tzinfo=None
+        ),
+    }
+
+
+def capture_messages(
+    db: Session, conversation: ConversationThread, messages: List[Dict[str, Any]]
+) -> None:
+    """Adds messages to the search index within the caller's transaction.
+
+    Runs in a savepoint and only logs on failure, so indexing problems
+    never fail the chat request that triggered them.
+    """
+    rows = [
+        _message_row(conversation.user_id, conversation.id, message)
+        for message in messages
+        if message.get("content")
+    ]
+    if not rows:
+        return
+    try:
+        with db.begin_nested():
+            db.bulk_insert_mappings(ConversationMessage, rows)
+    except Exception as e:
+        logger.error(
+            f"Failed to index messages of conversation {conversation.id}: {str(e)}"
+        )
+
+
+def replace_conversation_messages(
+    db: Session, user_id: int, conversation_id: int, messages: List[Dict[str, Any]]
+) -> int:
+    """Makes a conversation's indexed messages match ``messages``.
+
+    Stored rows are matched by upstream ID, or, for rows captured from a
+    plain send without one, by role and text. Matched rows keep their ID
+    and, if their text is unchanged, their embedding; changed rows are
+    re-embedded, new ones inserted and the rest deleted. Returns the number
+    of messages the conversation now has.
+    """
+    rows = [
+        _message_row(user_id, conversation_id, message)
+        for message in messages
+        if message.get("content")
+    ]
+    stored = (
+        db.query(
+            ConversationMessage.id,
+            ConversationMessage.message_id,
+            ConversationMessage.role,
+            ConversationMessage.content,
+            ConversationMessage.created_at,
+        )
+        .filter(ConversationMessage.conversation_id == conversation_id)
+        .order_by(ConversationMessage.id)
+        .all()
+    )
+    by_message_id = {row.message_id: row for row in stored if row.message_id}
+    captured: Dict[Tuple[str, str], List[Any]] = {}
+    for row in stored:
+        if not row.message_id:
+            captured.setdefault((row.role, row.content), []).append(row)
+
+    kept = set()
+    updates = []
+    inserts = []
+    for row in rows:
+        match = by_message_id.pop(row["message_id"], None)
+        if match is None:
+            candidates = captured.get((row["role"], row["content"]))
+            match = candidates.pop(0) if candidates else None
+        if match is None:
+            inserts.append(row)
+            continue
+        kept.add(match.id)
+        changed = {
+            column: value
+            for column, value in row.items()
+            if column in UPSERT_COLUMNS and getattr(match, column) != value
+        }
+        if changed.keys() & {"role", "content"}:
+            changed["embedded"] = False
+        if changed:
+            updates.append({"id": match.id, **changed})
+
+    stale = [row.id for row in stored if row.id not in kept]
+    if stale:
+        db.query(ConversationMessage).filter(
+            ConversationMessage.id.in_(stale)
+        ).delete(synchronize_session=False)
+    if updates:
+        db.bulk_update_mappings(ConversationMessage, updates)
+    if inserts:
+        db.bulk_insert_mappings(ConversationMessage, inserts)
+    db.commit()
+    return len(rows)
+
+
+def backfill(
+    db: Session,
+    assistant: OpenAIAssistant,
+    user_id: Optional[int] = None,
+    after_id: int = 0,
+    concurrency: int = BACKFILL_CONCURRENCY,
+) -> int:
+    """Indexes every conversation (optionally of one user) from OpenAI.
+
+    Conversations are processed in ID order and the last finished chunk is
+    logged, so an interrupted run can be resumed with ``after_id``.
+    Returns the number of messages indexed.
+    """
+    indexed = 0
+    while True:
+        # Plain tuples, not ORM objects: fetches run on other threads while
+        # this session commits and expires its instances.
+        query = db.query(
+            ConversationThread.id,
+            ConversationThread.user_id,
+            ConversationThread.thread_id,
+        ).filter(ConversationThread.id > after_id)
+        if user_id is not None:
+            query = query.filter(ConversationThread.user_id == user_id)
+        chunk = query.order_by(ConversationThread.id).limit(BACKFILL_CHUNK_SIZE).all()
+        if not chunk:
+            break
+
+        results = run_bounded(
+            chunk,
+            lambda row: list(assistant.iter_thread_messages(row.thread_id)),
+            concurrency,
+        )
+        for row, messages in results:
+            if isinstance(messages, Exception):
+                logger.error(f"Backfill skipped conversation {row.id}: {messages}")
+                continue
+            indexed += replace_conversation_messages(
+                db, row.user_id, row.id, messages
+            )
+
+        after_id = chunk[-1].id
+        logger.info(
+            f"Search backfill reached conversation {after_id} ({indexed} messages)"
+        )
+    return indexed
+
+
+def _escaped_html(column: Any) -> Any:
+    for char, entity in HTML_ESCAPES:
+        column = func.replace(column, char, entity)
+    return column
+
+
+def search_messages(
+    db: Session,
+    user_id: int,
+    query_text: str,
+    limit: int,
+    after: Optional[Tuple[float, int]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Returns one page of ranked hits with highlighted snippets.
+
+    Pages are keyset-paginated on ``(rank, id)``; the cursor's rank is cast
+    back to ``real`` so it compares equal to the value it came from.
+    Snippets are only built for the rows on the page, from HTML-escaped
+    text with matches wrapped in ``<mark>``.
+    """
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    tsquery = func.websearch_to_tsquery(config, query_text)
+    rank = func.ts_rank_cd(ConversationMessage.search_vector, tsquery).label("rank")
+
+    hits = select(ConversationMessage.id, rank).where(
+        ConversationMessage.user_id == user_id,
+        ConversationMessage.search_vector.op("@@")(tsquery),
+    )
+    if after:
+        hits = hits.where(
+            tuple_(rank, ConversationMessage.id)
+            < tuple_(cast(bindparam("after_rank", after[0]), REAL), after[1])
+        )
+    # Fetch one extra row to know whether another page exists.
+    hits = (
+        hits.order_by(rank.desc(), ConversationMessage.id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+
+    rows = db.execute(
+        select(
+            ConversationMessage.id,
+            ConversationMessage.conversation_id,
+            ConversationMessage.message_id,
+            ConversationMessage.role,
+            ConversationMessage.created_at,
+            ConversationThread.title,
+            func.ts_headline(
+                config,
+                _escaped_html(ConversationMessage.content),
+                tsquery,
+                HEADLINE_OPTIONS,
+            ).label("snippet"),
+            hits.c.rank,
+        )
+        .join(hits, hits.c.id == ConversationMessage.id)
+        .join(
+            ConversationThread,
+            ConversationThread.id == ConversationMessage.conversation_id,
+        )
+        .order_by(hits.c.rank.desc(), ConversationMessage.id.desc())
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_rank_cursor(rows[-1].rank, rows[-1].id) if has_more else None
+    results = [
+        {
+            "conversation_id": row.conversation_id,
+            "conversation_title": row.title,
+            "message_id": row.message_id,
+            "role": row.role,
+            "created_at": row.created_at,
+            "snippet": row.snippet,
+            "rank": row.rank,
+        }
+        for row in rows
+    ]
+    return results, next_cursor
@@ -0,0 +1,227 @@
+"""Semantic search over a user's conversation history.
+
+Messages captured for full-text search (see ``app.src.search``) are
+embedded after the request that captured them has committed, on a small
+background pool, and appended to the user's vector index. Rows track
+whether they have been embedded, so ``python manage.py semantic-index``
+can catch up on anything the background pool missed (a crash, a backfill)
+and the two never race: indexing a user happens under that user's lock.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.conversation_message import ConversationMessage
+from app.models.conversation_thread import ConversationThread
+from app.src.db import SessionLocal, get_engine
+from app.src.embeddings import Embedder, get_embedder
+from app.src.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = 256
+# Messages considered per requested conversation, since several of the
+# nearest messages often belong to the same conversation.
+CANDIDATES_PER_RESULT = 5
+SNIPPET_CHARS = 300
+INDEX_CONCURRENCY = int(os.getenv("SEMANTIC_INDEX_CONCURRENCY", "2"))
+
+_index: Optional[VectorIndex] = None
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_scheduled: Set[int] = set()
+
+
+def get_index(embedder: Optional[Embedder] = None) -> VectorIndex:
+    """Returns the vector index matching the configured embedder."""
+    global _index
+    if embedder is not None:
+        return VectorIndex(embedder.name, embedder.dimensions)
+    if _index is None:
+        with _lock:
+            if _index is None:
+                embedder = get_embedder()
+                _index = VectorIndex(embedder.name, embedder.dimensions)
+    return _index
+
+
+def index_pending(
+    db: Session,
+    user_id: int,
+    embedder: Optional[Embedder] = None,
+    index: Optional[VectorIndex] = None,
+) -> int:
+    """Embeds the user's messages that are not indexed yet.
+
+    Returns the number of messages appended to the index.
+    """
+    embedder = embedder or get_embedder()
+    index = index or get_index()
+    indexed = 0
+    with index.lock(user_id):
+        while True:
+            rows = (
+                db.query(
+                    ConversationMessage.id,
+                    ConversationMessage.conversation_id,
+                    ConversationMessage.content,
+                )
+                .filter(
+                    ConversationMessage.user_id == user_id,
+                    ConversationMessage.embedded.is_(False),
+                )
+                .order_by(ConversationMessage.id)
+                .limit(EMBED_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            vectors = embedder.embed([row.content for row in rows])
+            index.append(
+                user_id, vectors, [(row.id, row.conversation_id) for row in rows]
+            )
+            # A crash before this commit re-embeds the batch; duplicate rows
+            # are harmless because results are grouped per conversation.
+            db.query(ConversationMessage).filter(
+                ConversationMessage.id.in_([row.id for row in rows])
+            ).update({ConversationMessage.embedded: True}, synchronize_session=False)
+            db.commit()
+            indexed += len(rows)
+    if indexed:
+        logger.info(f"Embedded {indexed} messages for user {user_id}")
+    return indexed
+
+
+def rebuild(db: Session, user_id: int) -> int:
+    """Drops the user's vectors and embeds every message again."""
+    index = get_index()
+    with index.lock(user_id):
+        index.delete(user_id)
+        db.query(ConversationMessage).filter_by(user_id=user_id).update(
+            {ConversationMessage.embedded: False}, synchronize_session=False
+        )
+        db.commit()
+    return index_pending(db, user_id, index=index)
+
+
+def users_with_pending(db: Session) -> List[int]:
+    return [
+        user_id
+        for (user_id,) in db.query(ConversationMessage.user_id)
+        .filter(ConversationMessage.embedded.is_(False))
+        .distinct()
+    ]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=INDEX_CONCURRENCY, thread_name_prefix="embed"
+                )
+    return _executor
+
+
+def _index_in_background(user_id: int) -> None:
+    with _lock:
+        _scheduled.discard(user_id)
+    get_engine()
+    db = SessionLocal()
+    try:
+        index_pending(db, user_id)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Background embedding failed for user {user_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def schedule_indexing(user_id: int) -> None:
+    """Embeds the user's new messages off the request path.
+
+    Call after the messages are committed. Requests arriving while a run
+    is queued for the same user are coalesced into it.
+    """
+    with _lock:
+        if user_id in _scheduled:
+            return
+        _scheduled.add(user_id)
+    _get_executor().submit(_index_in_background, user_id)
+
+
+def _candidate_messages(
+    db: Session, user_id: int, candidates: List[int]
+) -> Dict[int, Any]:
+    return {
+        row.id: row
+        for row in db.query(
+            ConversationMessage.id,
+            ConversationMessage.conversation_id,
+            ConversationMessage.message_id,
+            ConversationMessage.role,
+            ConversationMessage.created_at,
+            ConversationMessage.content,
+            ConversationThread.title,
+        )
+        .join(
+            ConversationThread,
+            ConversationThread.id == ConversationMessage.conversation_id,
+        )
+        .filter(
+            ConversationMessage.user_id == user_id,
+            ConversationMessage.id.in_(candidates),
+        )
+    }
+
+
+def semantic_search(
+    db: Session, user_id: int, query_text: str, limit: int
+) -> List[Dict[str, Any]]:
+    """Returns the user's conversations closest in meaning to
+    ``query_text``, each with its best-matching message, best first.
+
+    Vectors of messages deleted or changed since they were embedded stay in
+    the index until the next ``rebuild``. They are skipped, and while they
+    leave the page short the search is repeated over more candidates.
+    """
+    embedder = get_embedder()
+    query = embedder.embed([query_text])[0]
+    index = get_index()
+    k = limit * CANDIDATES_PER_RESULT
+    while True:
+        ids, scores = index.search(user_id, query, k)
+        if not len(ids):
+            return []
+        candidates = [row_id for row_id, _ in ids.tolist()]
+        messages = _candidate_messages(db, user_id, candidates)
+
+        results = []
+        seen: Set[int] = set()
+        for row_id, score in zip(candidates, scores.tolist()):
+            message = messages.get(row_id)
+            if message is None or message.conversation_id in seen:
+                continue
+            seen.add(message.conversation_id)
+            results.append(
+                {
+                    "conversation_id": message.conversation_id,
+                    "conversation_title": message.title,
+                    "message_id": message.message_id,
+                    "role": message.role,
+                    "created_at": message.created_at,
+                    "snippet": message.content[:SNIPPET_CHARS],
+                    "score": score,
+                }
+            )
+            if len(results) == limit:
+                return results
+        dead = sum(1 for row_id in candidates if row_id not in messages)
+        if not dead or len(candidates) < k:
+            return results
+        k += dead * CANDIDATES_PER_RESULT
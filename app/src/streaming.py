@@ -0,0 +1,55 @@
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+SSE_MIMETYPE = "text/event-stream"
+
+
+def ndjson_lines(
+    items: Iterable[Any], dumps: Callable[[Any], str]
+) -> Iterator[str]:
+    """Yields one JSON document per line.
+
+    If ``items`` fails part-way, a final ``{"error": ...}`` line is emitted
+    since the status code has already been sent.
+    """
+    try:
+        for item in items:
+            yield dumps(item) + "\n"
+    except Exception as e:
+        logger.error(f"Streaming NDJSON response failed: {str(e)}")
+        yield dumps({"error": "Stream interrupted"}) + "\n"
+
+
+def json_object_chunks(
+    fields: Dict[str, Any],
+    key: str,
+    items: Iterable[Any],
+    dumps: Callable[[Any], str],
+) -> Iterator[str]:
+    """Yields ``{**fields, key: [items...]}`` as a JSON object, item by item.
+
+    If ``items`` fails part-way, the array is closed and an ``error`` field
+    is appended so the document stays valid JSON.
+    """
+    head = dumps(fields)
+    yield head[:-1] + ("," if fields else "") + dumps(key) + ":["
+    error = None
+    try:
+        for index, item in enumerate(items):
+            yield ("," if index else "") + dumps(item)
+    except Exception as e:
+        logger.error(f"Streaming JSON response failed: {str(e)}")
+        error = "Stream interrupted"
+    yield "]" + ("," + dumps("error") + ":" + dumps(error) if error else "") + "}"
+
+
+def sse_events(
+    events: Iterable[Dict[str, Any]], dumps: Callable[[Any], str]
+) -> Iterator[str]:
+    """Formats ``{"type": ..., **data}`` dicts as server-sent events."""
+    for event in events:
+        data = {key: value for key, value in event.items() if key != "type"}
+        yield f"event: {event['type']}\ndata: {dumps(data)}\n\n"
@@ -0,0 +1,488 @@
+"""Bulk export and import of a user's conversations as NDJSON.
+
+An export line is one conversation with its messages, oldest first::
+
+    {"thread_id": ..., "assistant_id": ..., "title": ..., "created_at": ...,
+     "status": ..., "last_activity_at": ..., "archived_at": ...,
+     "remote_deleted_at": ..., "messages": [...]}
+
+Conversations are read from the database in keyset-paginated chunks and
+their messages are fetched from OpenAI a few threads at a time, so memory
+is bounded by the fetch window rather than by the size of the account.
+Conversations whose thread the lifecycle job deleted upstream are exported
+from their stored messages.
+
+Importing restores the conversation rows and stores their messages in
+``conversation_messages``, so they are searchable and conversations whose
+thread is gone upstream stay readable. The threads themselves stay in
+OpenAI, so an import only makes sense against the same OpenAI project.
+Threads that are already registered are skipped, and threads queued for
+deletion upstream are rejected.
+"""
+import csv
+import json
+import logging
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from sqlalchemy import insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.assistants.openai import OpenAIAssistant
+from app.models.conversation_message import ConversationMessage
+from app.models.conversation_thread import (
+    ACTIVE,
+    ARCHIVED,
+    TITLE_LENGTH,
+    ConversationThread,
+)
+from app.models.thread_deletion import ThreadDeletion
+from app.models.user import User
+from app.src.lifecycle import local_messages
+from app.src.pagination import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "8"))
+LOAD_CHUNK_SIZE = 500
+INSERT_CHUNK_SIZE = 1000
+# Rows buffered in memory before the COPY payload spills to disk.
+COPY_SPOOL_BYTES = 8 * 2**20
+IMPORT_METHODS = ("copy", "insert")
+# Timestamps a conversation record carries besides ``created_at``.
+LIFECYCLE_FIELDS = ("last_activity_at", "archived_at", "remote_deleted_at")
+THREAD_COLUMNS = (
+    "thread_id",
+    "assistant_id",
+    "title",
+    "created_at",
+    "status",
+    *LIFECYCLE_FIELDS,
+)
+ROLE_LENGTH = ConversationMessage.__table__.c.role.type.length
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_ordered(
+    items: Iterable[T], fn: Callable[[T], R], concurrency: int
+) -> Iterator[Tuple[T, Any]]:
+    """Runs ``fn`` over ``items`` with at most ``concurrency`` calls in
+    flight, yielding ``(item, result)`` pairs in input order. A raised
+    exception is yielded in place of the result.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="export"
+    )
+    window: Deque[Tuple[T, Future]] = deque()
+
+    def take() -> Tuple[T, Any]:
+        item, future = window.popleft()
+        error = future.exception()
+        return item, error if error is not None else future.result()
+
+    try:
+        for item in items:
+            window.append((item, executor.submit(fn, item)))
+            if len(window) >= concurrency:
+                yield take()
+        while window:
+            yield take()
+    finally:
+        # A disconnected client should not keep queued fetches running.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_user_conversations(
+    db: Session, user_id: int
+) -> Iterator[ConversationThread]:
+    """Yields a user's conversations oldest first, one chunk at a time."""
+    after = None
+    while True:
+        query = db.query(ConversationThread).filter(
+            ConversationThread.user_id == user_id
+        )
+        if after:
+            query = query.filter(
+                tuple_(ConversationThread.created_at, ConversationThread.id)
+                > tuple_(*after)
+            )
+        chunk = (
+            query.order_by(ConversationThread.created_at, ConversationThread.id)
+            .limit(LOAD_CHUNK_SIZE)
+            .all()
+        )
+        if not chunk:
+            return
+        yield from chunk
+        after = (chunk[-1].created_at, chunk[-1].id)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def export_records(
+    db: Session,
+    user_id: int,
+    assistant: OpenAIAssistant,
+    concurrency: int = EXPORT_CONCURRENCY,
+) -> Iterator[Dict[str, Any]]:
+    """Yields one export record per conversation.
+
+    A thread whose messages cannot be fetched is exported with an
+    ``error`` instead of ``messages`` rather than aborting the export.
+    """
+    conversations = (
+        (
+            conversation.thread_id,
+            # Set for threads already deleted upstream.
+            conversation.id if conversation.remote_deleted_at is not None else None,
+            {
+                "thread_id": conversation.thread_id,
+                "assistant_id": conversation.assistant_id,
+                "title": conversation.title,
+                "created_at": _isoformat(conversation.created_at),
+                "status": conversation.status,
+                **{
+                    field: _isoformat(getattr(conversation, field))
+                    for field in LIFECYCLE_FIELDS
+                },
+            },
+        )
+        for conversation in iter_user_conversations(db, user_id)
+    )
+
+    def fetch(
+        item: Tuple[str, Optional[int], Dict[str, Any]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        if item[1] is not None:
+            return None  # read from the database below, on this thread
+        messages = list(assistant.iter_thread_messages(item[0]))
+        messages.reverse()
+        return messages
+
+    count = 0
+    for (thread_id, conversation_id, record), messages in map_ordered(
+        conversations, fetch, concurrency
+    ):
+        if conversation_id is not None:
+            messages = local_messages(db, conversation_id)
+            messages.reverse()
+        if isinstance(messages, Exception):
+            logger.error(f"Error exporting messages of thread {thread_id}: {messages}")
+            record["error"] = "Failed to fetch messages"
+        else:
+            record["messages"] = messages
+        count += 1
+        yield record
+    logger.info(f"Exported {count} conversations for user {user_id}")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_messages(
+    line_number: int, messages: Any, default_time: datetime
+) -> List[Dict[str, Any]]:
+    """Maps a record's ``messages`` to ``conversation_messages`` columns."""
+    if messages is None:
+        return []
+    if not isinstance(messages, list):
+        raise ValueError(f"Line {line_number} has an invalid 'messages'")
+    rows = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if (
+            not isinstance(content, list)
+            or not all(isinstance(part, str) for part in content)
+            or not isinstance(message.get("role"), str)
+            or not 0 < len(message["role"]) <= ROLE_LENGTH
+        ):
+            raise ValueError(f"Line {line_number} has an invalid message")
+        if not content:
+            continue
+        message_id = message.get("id")
+        created_at = message.get("created_at")
+        if created_at is not None and not isinstance(created_at, (int, float)):
+            raise ValueError(f"Line {line_number} has a message with invalid time")
+        rows.append(
+            {
+                "message_id": str(message_id)[:120] if message_id else None,
+                "role": message["role"],
+                "content": "\n".join(content),
+                "created_at": (
+                    datetime.fromtimestamp(created_at, timezone.utc).replace(
+                        tzinfo=None
+                    )
+                    if created_at is not None
+                    else default_time
+                ),
+            }
+        )
+    return rows
+
+
+def parse_conversations(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """Yields conversation rows, each with its ``messages``, from export
+    lines.
+
+    Raises ``ValueError`` naming the first line that is not a valid record.
+    """
+    now = _utcnow()
+    for line_number, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number} is not valid JSON") from e
+        thread_id = record.get("thread_id") if isinstance(record, dict) else None
+        if not isinstance(thread_id, str) or not 0 < len(thread_id) <= 120:
+            raise ValueError(f"Line {line_number} has no valid 'thread_id'")
+        timestamps = {}
+        for field in ("created_at",) + LIFECYCLE_FIELDS:
+            try:
+                timestamps[field] = parse_timestamp(record.get(field))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Line {line_number} has an invalid '{field}'") from e
+        # Listings only serve these, so any other status would be unreachable.
+        status = record.get("status") or ACTIVE
+        if status not in (ACTIVE, ARCHIVED):
+            raise ValueError(
+                f"Line {line_number} has an invalid 'status'"
+                f" (expected '{ACTIVE}' or '{ARCHIVED}')"
+            )
+        if status == ARCHIVED:
+            # The lifecycle job counts the remote-delete delay from here.
+            timestamps["archived_at"] = timestamps["archived_at"] or now
+        else:
+            timestamps["archived_at"] = None
+        created_at = timestamps.pop("created_at") or now
+        assistant_id = record.get("assistant_id")
+        title = record.get("title")
+        yield {
+            "thread_id": thread_id,
+            "assistant_id": str(assistant_id)[:120] if assistant_id else None,
+            "title": title[:TITLE_LENGTH] if isinstance(title, str) else None,
+            "created_at": created_at,
+            "status": status,
+            **timestamps,
+            "messages": _parse_messages(
+                line_number, record.get("messages"), created_at
+            ),
+        }
+
+
+def _insert_rows(
+    db: Session, user_id: int, rows: Iterable[Dict[str, Any]]
+) -> Dict[str, int]:
+    """Multi-row ``INSERT ... ON CONFLICT DO NOTHING`` per chunk, then the
+    messages of the conversations that were inserted."""
+    counts = dict.fromkeys(("imported", "rejected", "messages", "total"), 0)
+    chunk: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        counts["total"] += len(chunk)
+        queued = set(
+            db.execute(
+                select(ThreadDeletion.thread_id).where(
+                    ThreadDeletion.thread_id.in_([row["thread_id"] for row in chunk])
+                )
+            ).scalars()
+        )
+        accepted = [row for row in chunk if row["thread_id"] not in queued]
+        counts["rejected"] += len(chunk) - len(accepted)
+        if not accepted:
+            return
+        statement = (
+            pg_insert(ConversationThread)
+            .values(
+                [
+                    {"user_id": user_id, **{c: row[c] for c in THREAD_COLUMNS}}
+                    for row in accepted
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[ConversationThread.thread_id])
+            .returning(ConversationThread.id, ConversationThread.thread_id)
+        )
+        inserted = {row.thread_id: row.id for row in db.execute(statement)}
+        counts["imported"] += len(inserted)
+        messages = [
+            {"user_id": user_id, "conversation_id": inserted[row["thread_id"]], **m}
+            for row in accepted
+            if row["thread_id"] in inserted
+            for m in row["messages"]
+        ]
+        if messages:
+            db.execute(insert(ConversationMessage), messages)
+            counts["messages"] += len(messages)
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            flush()
+            chunk = []
+    if chunk:
+        flush()
+    return counts
+
+
+def _csv_time(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _copy(db: Session, table: str, payload: Any) -> None:
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} FROM STDIN WITH (FORMAT csv)", payload)
+    finally:
+        cursor.close()
+
+
+def _copy_rows(
+    db: Session, user_id: int, rows: Iterable[Dict[str, Any]]
+) -> Dict[str, int]:
+    """``COPY`` into temporary tables, then one set-based insert."""
+    total = 0
+    with tempfile.SpooledTemporaryFile(
+        max_size=COPY_SPOOL_BYTES, mode="w+", newline=""
+    ) as threads, tempfile.SpooledTemporaryFile(
+        max_size=COPY_SPOOL_BYTES, mode="w+", newline=""
+    ) as messages:
+        thread_writer = csv.writer(threads)
+        message_writer = csv.writer(messages)
+        ordinal = 0
+        for row in rows:
+            thread_writer.writerow(
+                (
+                    row["thread_id"],
+                    row["assistant_id"],
+                    row["title"],
+                    _csv_time(row["created_at"]),
+                    row["status"],
+                    *(_csv_time(row[field]) for field in LIFECYCLE_FIELDS),
+                )
+            )
+            for message in row["messages"]:
+                ordinal += 1
+                message_writer.writerow(
+                    (
+                        ordinal,
+                        row["thread_id"],
+                        message["message_id"],
+                        message["role"],
+                        message["content"],
+                        _csv_time(message["created_at"]),
+                    )
+                )
+            total += 1
+        threads.seek(0)
+        messages.seek(0)
+
+        db.execute(
+            text(
+                "CREATE TEMP TABLE conversation_import ("
+                "thread_id varchar(120), assistant_id varchar(120), "
+                f"title varchar({TITLE_LENGTH}), created_at timestamp, "
+                "status varchar(50), last_activity_at timestamp, "
+                "archived_at timestamp, remote_deleted_at timestamp) ON COMMIT DROP"
+            )
+        )
+        db.execute(
+            text(
+                "CREATE TEMP TABLE conversation_message_import ("
+                "ordinal bigint, thread_id varchar(120), message_id varchar(120), "
+                f"role varchar({ROLE_LENGTH}), content text, created_at timestamp) "
+                "ON COMMIT DROP"
+            )
+        )
+        _copy(db, "conversation_import", threads)
+        _copy(db, "conversation_message_import", messages)
+
+    columns = ", ".join(THREAD_COLUMNS)
+    counts = db.execute(
+        text(
+            "WITH imported AS ("
+            f"INSERT INTO conversation_threads (user_id, {columns}) "
+            f"SELECT :user_id, {columns} FROM conversation_import i "
+            "WHERE NOT EXISTS (SELECT 1 FROM thread_deletions d "
+            "WHERE d.thread_id = i.thread_id) "
+            "ON CONFLICT (thread_id) DO NOTHING RETURNING id, thread_id), "
+            "messages AS ("
+            "INSERT INTO conversation_messages "
+            "(user_id, conversation_id, message_id, role, content, created_at) "
+            "SELECT :user_id, imported.id, m.message_id, m.role, m.content, "
+            "m.created_at FROM conversation_message_import m "
+            "JOIN imported USING (thread_id) ORDER BY m.ordinal RETURNING 1) "
+            "SELECT (SELECT count(*) FROM imported) AS imported, "
+            "(SELECT count(*) FROM messages) AS messages, "
+            "(SELECT count(*) FROM conversation_import "
+            "JOIN thread_deletions USING (thread_id)) AS rejected"
+        ),
+        {"user_id": user_id},
+    ).one()
+    return {
+        "imported": counts.imported,
+        "rejected": counts.rejected,
+        "messages": counts.messages,
+        "total": total,
+    }
+
+
+def import_conversations(
+    db: Session,
+    user_id: int,
+    rows: Iterable[Dict[str, Any]],
+    method: str = "copy",
+) -> Dict[str, int]:
+    """Stores conversation rows for a user in one transaction.
+
+    Returns how many rows were imported with how many messages, how many
+    were skipped because their thread is already registered and how many
+    were rejected because their thread is queued for deletion. Nothing is
+    committed if ``rows`` raises; the caller rolls back.
+    """
+    if method not in IMPORT_METHODS:
+        raise ValueError(f"method must be one of: {', '.join(IMPORT_METHODS)}")
+    store = _copy_rows if method == "copy" else _insert_rows
+    counts = store(db, user_id, rows)
+    imported, total = counts["imported"], counts["total"]
+    if imported:
+        db.query(User).filter_by(id=user_id).update(
+            {User.conversations_version: User.conversations_version + 1},
+            synchronize_session=False,
+        )
+    db.commit()
+    logger.info(
+        f"Imported {imported} of {total} conversations with {counts['messages']}"
+        f" messages for user {user_id} ({method})"
+    )
+    return {
+        "imported": imported,
+        "skipped": total - imported - counts["rejected"],
+        "rejected": counts["rejected"],
+        "messages": counts["messages"],
+    }
@@ -0,0 +1,130 @@
+"""Append-only, memory-mapped embedding matrices, one per user.
+
+Each user has two files under ``VECTOR_INDEX_DIR/<embedder name>/``:
+
+- ``<user_id>.vec``: a contiguous ``(n, dimensions)`` float32 matrix;
+- ``<user_id>.ids``: a ``(n, 2)`` int64 matrix of ``(message row id,
+  conversation id)`` for the same rows.
+
+Writers append under an exclusive ``flock``, so gunicorn workers and the
+CLI can index concurrently. Vectors are written before IDs and readers
+only trust rows present in both files, so a torn append is never read
+and is trimmed by the next writer.
+"""
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/vectors")
+# Rows scored per matrix-vector product; bounds the scratch memory of a
+# query independently of the index size.
+SCAN_BLOCK_ROWS = 65536
+ID_COLUMNS = 2
+ID_BYTES = 8 * ID_COLUMNS
+
+
+class VectorIndex:
+    def __init__(
+        self, name: str, dimensions: int, root: str = VECTOR_INDEX_DIR
+    ) -> None:
+        self.dimensions = dimensions
+        self.directory = os.path.join(root, name)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, user_id: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{user_id}.{suffix}")
+
+    def count(self, user_id: int) -> int:
+        """Number of complete rows for a user."""
+        try:
+            vectors = os.path.getsize(self._path(user_id, "vec"))
+            ids = os.path.getsize(self._path(user_id, "ids"))
+        except FileNotFoundError:
+            return 0
+        return min(vectors // (4 * self.dimensions), ids // ID_BYTES)
+
+    @contextmanager
+    def lock(self, user_id: int) -> Iterator[None]:
+        """Holds the user's writer lock, across threads and processes."""
+        with open(self._path(user_id, "lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def append(
+        self, user_id: int, vectors: "np.ndarray", ids: List[Tuple[int, int]]
+    ) -> None:
+        """Appends rows; the caller must hold ``lock(user_id)``."""
+        import numpy as np
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(ids), self.dimensions):
+            raise ValueError(f"Expected {len(ids)} vectors of {self.dimensions}")
+        rows = self.count(user_id)
+        with open(self._path(user_id, "vec"), "ab") as vec_file:
+            vec_file.truncate(rows * 4 * self.dimensions)
+            vec_file.write(vectors.tobytes())
+            vec_file.flush()
+            os.fsync(vec_file.fileno())
+        with open(self._path(user_id, "ids"), "ab") as ids_file:
+            ids_file.truncate(rows * ID_BYTES)
+            ids_file.write(np.asarray(ids, dtype=np.int64).tobytes())
+
+    def delete(self, user_id: int) -> None:
+        """Drops a user's index; the caller must hold ``lock(user_id)``."""
+        for suffix in ("vec", "ids"):
+            try:
+                os.remove(self._path(user_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def search(
+        self, user_id: int, query: "np.ndarray", k: int
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Returns the ``(ids, scores)`` of the ``k`` rows most similar to
+        the unit vector ``query``, best first.
+
+        The matrix is memory-mapped and scored block by block, keeping a
+        running top-k, so pages are read on demand and never copied whole.
+        """
+        import numpy as np
+
+        rows = self.count(user_id)
+        if rows == 0 or k <= 0:
+            return np.empty((0, ID_COLUMNS), np.int64), np.empty(0, np.float32)
+        matrix = np.memmap(
+            self._path(user_id, "vec"),
+            dtype=np.float32,
+            mode="r",
+            shape=(rows, self.dimensions),
+        )
+        ids = np.memmap(
+            self._path(user_id, "ids"),
+            dtype=np.int64,
+            mode="r",
+            shape=(rows, ID_COLUMNS),
+        )
+        query = np.asarray(query, dtype=np.float32)
+
+        best_rows = np.empty(0, np.int64)
+        best_scores = np.empty(0, np.float32)
+        for start in range(0, rows, SCAN_BLOCK_ROWS):
+            scores = matrix[start : start + SCAN_BLOCK_ROWS] @ query
+            if len(scores) > k:
+                top = np.argpartition(scores, -k)[-k:]
+            else:
+                top = np.arange(len(scores))
+            best_rows = np.concatenate((best_rows, top + start))
+            best_scores = np.concatenate((best_scores, scores[top]))
+            if len(best_scores) > k:
+                keep = np.argpartition(best_scores, -k)[-k:]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return np.array(ids[best_rows[order]]), best_scores[order]
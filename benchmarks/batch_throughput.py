@@ -0,0 +1,91 @@
+"""Throughput of the batch worker's per-prompt pipeline.
+
+Drives ``answer_prompt`` through ``run_bounded`` (the same code the
+``threads`` mode of ``manage.py batch-worker`` uses) against a local fake
+assistant whose calls sleep for a configurable, jittered latency, and
+reports prompts per second for each concurrency level.
+
+    python benchmarks/batch_throughput.py --prompts 500 --latency-ms 200
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.src.batch import answer_prompt, run_bounded  # noqa: E402
+
+
+class FakeAssistant:
+    """Stands in for ``OpenAIAssistant`` with simulated upstream latency."""
+
+    def __init__(self, latency_ms: float, error_rate: float) -> None:
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _wait(self, scale: float = 1.0) -> None:
+        time.sleep(random.uniform(0.5, 1.5) * self.latency * scale)
+
+    def create_thread(self) -> Optional[str]:
+        self._wait(0.1)
+        with self._lock:
+            return f"thread_{next(self._ids)}"
+
+    def get_assistant_id(self) -> str:
+        return "asst_fake"
+
+    def send_message(
+        self,
+        thread_id: str,
+        assistant_id: str,
+        message: str,
+        user_id: Optional[int] = None,
+    ) -> Optional[str]:
+        self._wait()
+        if random.random() < self.error_rate:
+            return None
+        return message[::-1]
+
+    def delete_thread(self, thread_id: str) -> bool:
+        self._wait(0.1)
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32, 64]
+    )
+    args = parser.parse_args()
+
+    assistant = FakeAssistant(args.latency_ms, args.error_rate)
+    prompts = [f"prompt {index}" for index in range(args.prompts)]
+    for concurrency in args.concurrency:
+        if concurrency == 1 and args.prompts * args.latency_ms > 60_000:
+            print(f"{concurrency:>4} workers: skipped (would take over a minute)")
+            continue
+        failed = 0
+        start = time.perf_counter()
+        for _, result in run_bounded(
+            prompts, lambda prompt: answer_prompt(assistant, prompt), concurrency
+        ):
+            failed += isinstance(result, Exception)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{concurrency:>4} workers: {args.prompts / elapsed:8.1f} prompts/s"
+            f"  ({elapsed:6.2f} s, {failed} failed)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Bulk user provisioning throughput against one-at-a-time registration.
+
+Writes ``--users`` users (default 100k) to a temporary CSV, repeating a
+``--duplicates`` fraction of the rows, and provisions the file with
+``provision_users`` once for each ``--processes`` count. The path
+``/register`` takes for every user (duplicate-email ``SELECT``, hash,
+single-row commit) is timed on ``--serial-sample`` users and extrapolated
+to the same count. Password hashing dominates both, so the cost of one
+hash is printed too. Run against a migrated scratch database:
+
+    DATABASE_URL=postgresql://... python benchmarks/bulk_provisioning.py \\
+        --users 100000 --processes 1,4,8
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Loaded so the User mapper can resolve its relationship.
+from app.models.conversation_thread import ConversationThread  # noqa: E402,F401
+from app.models.user import User  # noqa: E402
+from app.src.provisioning import parse_users, provision_users  # noqa: E402
+
+
+def write_users(path: str, count: int, duplicates: float) -> None:
+    run = uuid.uuid4().hex[:8]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("email", "password"))
+        for n in range(count):
+            writer.writerow((f"bulk-{run}-{n}@example.com", uuid.uuid4().hex))
+            if random.random() < duplicates:
+                writer.writerow((f"bulk-{run}-{n}@example.com", "again"))
+
+
+def register_serially(db: Session, count: int) -> float:
+    """Returns the seconds ``/register``'s per-user path takes for ``count``."""
+    run = uuid.uuid4().hex[:8]
+    start = time.perf_counter()
+    for n in range(count):
+        email = f"serial-{run}-{n}@example.com"
+        if db.query(User).filter_by(email=email).first() is None:
+            user = User(email=email)
+            user.set_password(uuid.uuid4().hex)
+            db.add(user)
+            db.commit()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=float, default=0.01)
+    parser.add_argument(
+        "--processes",
+        default=str(os.cpu_count() or 1),
+        help="comma-separated hashing process counts",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--serial-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    start = time.perf_counter()
+    for _ in range(20):
+        generate_password_hash("password")
+    print(f"One password hash: {(time.perf_counter() - start) / 20 * 1000:.1f} ms")
+
+    with Session(engine) as db:
+        if args.serial_sample:
+            elapsed = register_serially(db, args.serial_sample)
+            rate = args.serial_sample / elapsed
+            print(
+                f"register, one at a time: {rate:8.1f} users/s"
+                f" (~{args.users / rate / 60:.1f} min for {args.users})"
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "users.csv")
+            for processes in [int(value) for value in args.processes.split(",")]:
+                write_users(path, args.users, args.duplicates)
+                with open(path, "rb") as source:
+                    start = time.perf_counter()
+                    results = provision_users(
+                        db,
+                        parse_users(source, "csv"),
+                        batch_size=args.batch_size,
+                        processes=processes,
+                    )
+                    summary = [r for r in results if "summary" in r][0]["summary"]
+                    elapsed = time.perf_counter() - start
+                print(
+                    f"bulk, {processes:>2} processes: "
+                    f"{summary['created'] / elapsed:8.1f} users/s"
+                    f" ({elapsed / 60:.1f} min, {summary})"
+                )
+
+
+if __name__ == "__main__":
+    main()
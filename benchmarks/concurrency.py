@@ -0,0 +1,133 @@
+"""Checks that long-running sends do not block short GETs.
+
+Fires ``--senders`` concurrent ``POST /conversations/<id>/messages`` calls
+(each holds a worker thread for the whole assistant run) while a probe
+thread keeps issuing ``GET /healthz`` and ``GET /user``. Probe latency is
+reported as it was before the sends started and while they were in flight;
+with enough threads configured the two should be close.
+
+    gunicorn -c gunicorn.conf.py wsgi:app &
+    python benchmarks/concurrency.py --base-url http://localhost:5000 --senders 16
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+from _stats import percentile
+
+
+def login(base_url: str) -> str:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    password = uuid.uuid4().hex
+    requests.post(
+        f"{base_url}/register", json={"email": email, "password": password}
+    ).raise_for_status()
+    response = requests.post(
+        f"{base_url}/login", json={"email": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.cookies["token"]
+
+
+def probe(
+    base_url: str, token: str, stop: threading.Event, samples: List[float]
+) -> None:
+    session = requests.Session()
+    session.cookies.set("token", token)
+    while not stop.is_set():
+        for path in ("/healthz", "/user"):
+            start = time.perf_counter()
+            session.get(f"{base_url}{path}", timeout=30).raise_for_status()
+            samples.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+
+def send(base_url: str, token: str, conversation_id: int) -> float:
+    start = time.perf_counter()
+    requests.post(
+        f"{base_url}/conversations/{conversation_id}/messages",
+        json={"message": "Reply with a long answer about load testing."},
+        cookies={"token": token},
+        timeout=600,
+    ).raise_for_status()
+    return time.perf_counter() - start
+
+
+def summarize(label: str, values: List[float]) -> Dict[str, float]:
+    millis = [value * 1000 for value in values]
+    row = {
+        "n": len(millis),
+        "p50": percentile(millis, 50),
+        "p95": percentile(millis, 95),
+        "p99": percentile(millis, 99),
+    }
+    print(
+        f"{label:>22}: n={row['n']:5d}  p50={row['p50']:8.1f} ms"
+        f"  p95={row['p95']:8.1f} ms  p99={row['p99']:8.1f} ms"
+    )
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--senders", type=int, default=16)
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=5.0,
+        help="fail if probe p95 under load exceeds baseline p95 by this factor",
+    )
+    args = parser.parse_args()
+
+    token = login(args.base_url)
+    conversations = []
+    for _ in range(args.senders):
+        response = requests.post(
+            f"{args.base_url}/conversations", cookies={"token": token}
+        )
+        response.raise_for_status()
+        conversations.append(response.json()["conversation_id"])
+
+    baseline: List[float] = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe, args=(args.base_url, token, stop, baseline))
+    prober.start()
+    time.sleep(args.baseline_seconds)
+    stop.set()
+    prober.join()
+
+    loaded: List[float] = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe, args=(args.base_url, token, stop, loaded))
+    prober.start()
+    with ThreadPoolExecutor(max_workers=args.senders) as pool:
+        send_times = list(
+            pool.map(lambda cid: send(args.base_url, token, cid), conversations)
+        )
+    stop.set()
+    prober.join()
+
+    summarize("short GETs (idle)", baseline)
+    summarize("short GETs (loaded)", loaded)
+    summarize("sends", send_times)
+    print(f"{'send wall time mean':>22}: {statistics.mean(send_times):8.2f} s")
+
+    idle_p95 = percentile(baseline, 95)
+    loaded_p95 = percentile(loaded, 95)
+    if loaded_p95 > idle_p95 * args.max_slowdown:
+        raise SystemExit(
+            f"Short GETs were blocked: p95 {loaded_p95 * 1000:.1f} ms under load "
+            f"vs {idle_p95 * 1000:.1f} ms idle"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmarks GET /conversations query patterns on a seeded table.
+
+Seeds ``--rows`` conversations (default 1M) spread over ``--users`` users
+with ``generate_series``, then times the old unbounded listing against
+the keyset-paginated query (first page and a deep page), printing the
+plan for each. Run against a scratch database that is already migrated:
+
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python benchmarks/conversation_listing.py --seed
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+
+SEED_USERS = """
+INSERT INTO users (email, password_hash, created_at)
+SELECT 'bench-' || g || '@example.com', 'x', now()
+FROM generate_series(1, :users) AS g
+ON CONFLICT (email) DO NOTHING
+"""
+
+# Skews rows towards low-numbered users so a few of them are very heavy.
+SEED_CONVERSATIONS = """
+INSERT INTO conversation_threads (user_id, thread_id, created_at, assistant_id, status)
+SELECT u.id,
+       'thread_bench_' || s.g,
+       now() - (s.g || ' seconds')::interval,
+       'asst_bench',
+       CASE WHEN s.g % 10 = 0 THEN 'archived' ELSE 'active' END
+FROM (
+    SELECT g, 1 + floor(:users * power(random(), 4))::int AS n
+    FROM generate_series(1, :rows) AS g
+) AS s
+JOIN users u ON u.email = 'bench-' || s.n || '@example.com'
+"""
+
+UNBOUNDED = "SELECT * FROM conversation_threads WHERE user_id = :user_id"
+
+FIRST_PAGE = """
+SELECT * FROM conversation_threads
+WHERE user_id = :user_id
+ORDER BY created_at DESC, id DESC
+LIMIT :limit
+"""
+
+NEXT_PAGE = """
+SELECT * FROM conversation_threads
+WHERE user_id = :user_id AND (created_at, id) < (:created_at, :id)
+ORDER BY created_at DESC, id DESC
+LIMIT :limit
+"""
+
+
+def seed(connection: Connection, users: int, rows: int) -> None:
+    start = time.perf_counter()
+    connection.execute(text(SEED_USERS), {"users": users})
+    connection.execute(text(SEED_CONVERSATIONS), {"users": users, "rows": rows})
+    connection.execute(text("ANALYZE conversation_threads"))
+    print(f"Seeded {rows} conversations in {time.perf_counter() - start:.1f}s")
+
+
+def time_query(
+    connection: Connection, sql: str, params: Dict[str, Any], repeat: int
+) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def explain(connection: Connection, sql: str, params: Dict[str, Any]) -> str:
+    rows = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+    return "\n".join(f"    {row[0]}" for row in rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        if args.seed:
+            seed(connection, args.users, args.rows)
+
+        heavy_user = connection.execute(
+            text(
+                "SELECT user_id FROM conversation_threads "
+                "GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+            )
+        ).scalar()
+        total = connection.execute(
+            text("SELECT count(*) FROM conversation_threads WHERE user_id = :u"),
+            {"u": heavy_user},
+        ).scalar()
+        deep = connection.execute(
+            text(
+                "SELECT created_at, id FROM conversation_threads WHERE user_id = :u "
+                "ORDER BY created_at DESC, id DESC OFFSET :o LIMIT 1"
+            ),
+            {"u": heavy_user, "o": total // 2},
+        ).one()
+        print(f"Heaviest user {heavy_user} owns {total} conversations\n")
+
+        cases = [
+            ("unbounded list", UNBOUNDED, {"user_id": heavy_user}),
+            ("first page", FIRST_PAGE, {"user_id": heavy_user, "limit": args.limit}),
+            (
+                "page at 50% depth",
+                NEXT_PAGE,
+                {
+                    "user_id": heavy_user,
+                    "limit": args.limit,
+                    "created_at": deep.created_at,
+                    "id": deep.id,
+                },
+            ),
+        ]
+        for label, sql, params in cases:
+            samples = time_query(connection, sql, params, args.repeat)
+            print(
+                f"{label:>18}: median {statistics.median(samples):8.2f} ms"
+                f"  max {max(samples):8.2f} ms"
+            )
+            print(explain(connection, sql, params))
+            print()
+
+
+if __name__ == "__main__":
+    main()
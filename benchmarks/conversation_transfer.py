@@ -0,0 +1,164 @@
+"""Benchmarks bulk conversation import and NDJSON export.
+
+Builds a synthetic export of ``--conversations`` threads (default 10k),
+imports it for a scratch user with both the ``COPY`` and the batched
+``INSERT`` path, then exports the account again against a fake assistant
+whose message fetches sleep for ``--latency-ms``. Reports rows/s for the
+imports, and wall time and tracemalloc peak per export concurrency level;
+the peak should stay flat as the account grows. Run against a scratch
+database that is already migrated:
+
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python benchmarks/conversation_transfer.py
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.src.transfer import (  # noqa: E402
+    export_records,
+    import_conversations,
+    parse_conversations,
+)
+
+
+class FakeAssistant:
+    """Serves synthetic thread messages with simulated upstream latency."""
+
+    def __init__(self, latency_ms: float, messages: int, chars: int) -> None:
+        self.latency = latency_ms / 1000
+        self.messages = messages
+        self.text = ("lorem ipsum dolor sit amet " * (chars // 27 + 1))[:chars]
+
+    def iter_thread_messages(self, thread_id: str) -> Iterator[Dict[str, Any]]:
+        time.sleep(self.latency)
+        for index in range(self.messages):
+            yield {
+                "id": f"msg_{thread_id}_{index}",
+                "role": "assistant" if index % 2 else "user",
+                "created_at": 1_700_000_000 - index,
+                "content": [self.text],
+            }
+
+
+def export_lines(prefix: str, count: int, messages: int, chars: int) -> List[bytes]:
+    body = ("lorem ipsum dolor sit amet " * (chars // 27 + 1))[:chars]
+    return [
+        json.dumps(
+            {
+                "thread_id": f"thread_{prefix}_{index}",
+                "assistant_id": "asst_bench",
+                "title": f"Conversation {index}",
+                "created_at": f"2026-01-01T00:00:{index % 60:02d}+00:00",
+                "status": "active",
+                "messages": [
+                    {"id": f"msg_{index}_{m}", "role": "user", "content": [body]}
+                    for m in range(messages)
+                ],
+            }
+        ).encode()
+        + b"\n"
+        for index in range(count)
+    ]
+
+
+def create_user(session: Session) -> int:
+    return session.execute(
+        text(
+            "INSERT INTO users (email, password_hash, created_at) "
+            "VALUES (:email, 'x', now()) RETURNING id"
+        ),
+        {"email": f"bench-transfer-{uuid.uuid4().hex[:12]}@example.com"},
+    ).scalar()
+
+
+def time_import(
+    session: Session, user_id: int, lines: List[bytes], method: str
+) -> Dict[str, int]:
+    start = time.perf_counter()
+    counts = import_conversations(
+        session, user_id, parse_conversations(lines), method=method
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'import ' + method:>16}: {len(lines) / elapsed:10.0f} rows/s"
+        f"  ({elapsed:6.2f} s, {counts['imported']} imported,"
+        f" {counts['skipped']} skipped)"
+    )
+    return counts
+
+
+def time_export(
+    session: Session, user_id: int, assistant: FakeAssistant, concurrency: int
+) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = count = 0
+    for record in export_records(session, user_id, assistant, concurrency):
+        size += len(json.dumps(record)) + 1
+        count += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{'export x' + str(concurrency):>16}: {count / elapsed:10.0f} conv/s"
+        f"  ({elapsed:6.2f} s, {size / 2**20:8.1f} MiB,"
+        f" peak {peak / 2**20:6.2f} MiB)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--conversations", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--chars", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    session = Session(bind=engine)
+    users = []
+    try:
+        for method in ("copy", "insert"):
+            user_id = create_user(session)
+            session.commit()
+            users.append(user_id)
+            lines = export_lines(
+                uuid.uuid4().hex[:8], args.conversations, args.messages, args.chars
+            )
+            time_import(session, user_id, lines, method)
+        # Re-importing the same export only exercises conflict handling.
+        time_import(session, users[-1], lines, "copy")
+
+        assistant = FakeAssistant(args.latency_ms, args.messages, args.chars)
+        for concurrency in args.concurrency:
+            time_export(session, users[0], assistant, concurrency)
+    finally:
+        if not args.keep and users:
+            session.rollback()
+            session.execute(
+                text("DELETE FROM conversation_threads WHERE user_id = ANY(:ids)"),
+                {"ids": users},
+            )
+            session.execute(
+                text("DELETE FROM users WHERE id = ANY(:ids)"), {"ids": users}
+            )
+            session.commit()
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
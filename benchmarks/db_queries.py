@@ -0,0 +1,291 @@
+"""Latency and plans of the app's hot queries on a seeded database.
+
+Builds each query with the ORM the way the app issues it:
+
+* ``user by id``: ``token_required`` on every authenticated request;
+* ``user by email``: ``/login`` and the duplicate check in ``/register``;
+* ``conversation list``: the first page of ``GET /conversations`` for a
+  typical user and for the heaviest one, a page at 50% depth of the
+  heaviest user's list, and the archived listing;
+* ``conversation by (id, user_id)``: every per-conversation route.
+
+Each case runs ``--repeat`` times with parameters drawn from the data and
+reports p50/p95/p99 latency, followed by the shape of its ``EXPLAIN`` plan
+(node types, relations and indexes, without costs). ``--save-baseline``
+stores both; ``--baseline`` compares against a stored run and exits with
+status 1 if a plan changed or a p95 grew by more than ``--tolerance`` (and
+at least ``--min-delta-ms``). Run it before and after a migration, on the
+same seeded database, to see what the migration did to these queries.
+
+    DATABASE_URL=postgresql://... python benchmarks/seed_db.py
+    DATABASE_URL=postgresql://... python benchmarks/db_queries.py \\
+        --save-baseline before.json
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python benchmarks/db_queries.py \\
+        --baseline before.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from _stats import percentile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.conversation_thread import (  # noqa: E402
+    ACTIVE,
+    ARCHIVED,
+    ConversationThread,
+)
+from app.models.user import User  # noqa: E402
+from app.src.pagination import DEFAULT_PAGE_SIZE  # noqa: E402
+
+# A case builds its query from a dict of sampled parameters.
+Case = Tuple[str, Callable[[Session, Dict[str, Any]], Query], List[Dict[str, Any]]]
+
+
+def user_by_id(db: Session, params: Dict[str, Any]) -> Query:
+    return db.query(User).filter_by(id=params["user_id"]).limit(1)
+
+
+def user_by_email(db: Session, params: Dict[str, Any]) -> Query:
+    return db.query(User).filter_by(email=params["email"]).limit(1)
+
+
+def conversation_list(db: Session, params: Dict[str, Any]) -> Query:
+    """The listing query of ``GET /conversations``, without filters."""
+    query = db.query(ConversationThread).filter(
+        ConversationThread.user_id == params["user_id"],
+        ConversationThread.status == params.get("status", ACTIVE),
+    )
+    if params.get("after"):
+        query = query.filter(
+            tuple_(ConversationThread.created_at, ConversationThread.id)
+            < tuple_(*params["after"])
+        )
+    return query.order_by(
+        ConversationThread.created_at.desc(), ConversationThread.id.desc()
+    ).limit(DEFAULT_PAGE_SIZE + 1)
+
+
+def conversation_by_owner(db: Session, params: Dict[str, Any]) -> Query:
+    return (
+        db.query(ConversationThread)
+        .filter_by(id=params["id"], user_id=params["user_id"])
+        .limit(1)
+    )
+
+
+def sample(db: Session, sql: str, count: int, **params: Any) -> List[Dict[str, Any]]:
+    rows = db.execute(text(sql), dict(params, count=count)).mappings().all()
+    if not rows:
+        raise SystemExit("No rows to sample; seed the database first")
+    return [dict(row) for row in rows]
+
+
+def build_cases(db: Session, count: int) -> List[Case]:
+    users = sample(
+        db,
+        "SELECT id AS user_id, email FROM users ORDER BY random() LIMIT :count",
+        count,
+    )
+    owners = sample(
+        db,
+        "SELECT id, user_id FROM conversation_threads ORDER BY random() LIMIT :count",
+        count,
+    )
+    heavy = sample(
+        db,
+        "SELECT user_id, count(*) AS total FROM conversation_threads "
+        "WHERE status = :status GROUP BY user_id ORDER BY total DESC LIMIT :count",
+        1,
+        status=ACTIVE,
+    )[0]
+    deep = sample(
+        db,
+        "SELECT created_at, id FROM conversation_threads "
+        "WHERE user_id = :user_id AND status = :status "
+        "ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT :count",
+        1,
+        user_id=heavy["user_id"],
+        status=ACTIVE,
+        offset=heavy["total"] // 2,
+    )[0]
+    print(
+        f"Heaviest user {heavy['user_id']} has {heavy['total']} active conversations"
+    )
+    heavy_params = {"user_id": heavy["user_id"]}
+    return [
+        ("user by id", user_by_id, users),
+        ("user by email", user_by_email, users),
+        ("conversation list, typical user", conversation_list, owners),
+        ("conversation list, heaviest user", conversation_list, [heavy_params]),
+        (
+            "conversation list, heaviest user at 50% depth",
+            conversation_list,
+            [dict(heavy_params, after=(deep["created_at"], deep["id"]))],
+        ),
+        (
+            "archived conversation list, typical user",
+            conversation_list,
+            [dict(owner, status=ARCHIVED) for owner in owners],
+        ),
+        ("conversation by (id, user_id)", conversation_by_owner, owners),
+    ]
+
+
+def plan_shape(node: Dict[str, Any], depth: int = 0) -> List[str]:
+    """Flattens an ``EXPLAIN (FORMAT JSON)`` plan into one line per node,
+    keeping what identifies the plan and dropping estimates."""
+    line = "  " * depth + node["Node Type"]
+    if "Index Name" in node:
+        line += f" using {node['Index Name']}"
+    if "Relation Name" in node:
+        line += f" on {node['Relation Name']}"
+    lines = [line]
+    for child in node.get("Plans", []):
+        lines.extend(plan_shape(child, depth + 1))
+    return lines
+
+
+def explain(db: Session, query: Query, analyze: bool = False) -> Any:
+    statement = query.statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    options = "ANALYZE, BUFFERS" if analyze else "FORMAT JSON"
+    rows = db.execute(text(f"EXPLAIN ({options}) {statement}")).all()
+    if analyze:
+        return "\n".join(f"    {row[0]}" for row in rows)
+    return plan_shape(rows[0][0][0]["Plan"])
+
+
+def run_case(db: Session, case: Case, repeat: int) -> Dict[str, Any]:
+    _, build, params = case
+    for values in params[:10]:  # warm-up
+        build(db, values).all()
+    samples = []
+    for _ in range(repeat):
+        values = random.choice(params)
+        start = time.perf_counter()
+        build(db, values).all()
+        samples.append((time.perf_counter() - start) * 1000)
+        db.expunge_all()
+    return {
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "plan": explain(db, build(db, params[0])),
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], args: argparse.Namespace
+) -> List[str]:
+    """Returns a description of each regression against ``baseline``."""
+    regressions = []
+    for name, expected in baseline["cases"].items():
+        actual = current["cases"].get(name)
+        if actual is None:
+            continue
+        if actual["plan"] != expected["plan"]:
+            regressions.append(
+                f"{name}: plan changed\n"
+                + "\n".join(f"      was: {line}" for line in expected["plan"])
+                + "\n"
+                + "\n".join(f"      now: {line}" for line in actual["plan"])
+            )
+        grown = actual["p95_ms"] - expected["p95_ms"]
+        if (
+            actual["p95_ms"] > expected["p95_ms"] * (1 + args.tolerance)
+            and grown >= args.min_delta_ms
+        ):
+            regressions.append(
+                f"{name}: p95 {actual['p95_ms']} ms > baseline {expected['p95_ms']} ms"
+            )
+    for table, rows in baseline.get("rows", {}).items():
+        now = current["rows"].get(table, 0)
+        if rows and abs(now - rows) / rows > 0.1:
+            print(
+                f"warning: {table} has {now} rows, the baseline had {rows}",
+                file=sys.stderr,
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument(
+        "--sample", type=int, default=1000, help="distinct parameters per case"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="also print EXPLAIN (ANALYZE, BUFFERS) for each case",
+    )
+    parser.add_argument("--baseline", help="fail on regressions against this file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.5,
+        help="smaller p95 increases are never regressions",
+    )
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    engine = create_engine(args.database_url)
+    results: Dict[str, Any] = {"cases": {}, "rows": {}}
+    with Session(engine) as db:
+        for table in ("users", "conversation_threads"):
+            results["rows"][table] = db.execute(
+                text(f"SELECT count(*) FROM {table}")
+            ).scalar()
+        print(
+            f"{results['rows']['users']} users,"
+            f" {results['rows']['conversation_threads']} conversations\n"
+        )
+        for case in build_cases(db, args.sample):
+            name = case[0]
+            result = run_case(db, case, args.repeat)
+            results["cases"][name] = result
+            print(
+                f"{name}: p50 {result['p50_ms']:.3f} ms"
+                f"  p95 {result['p95_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms"
+            )
+            for line in result["plan"]:
+                print(f"    {line}")
+            if args.analyze:
+                print(explain(db, case[1](db, case[2][0]), analyze=True))
+            print()
+        db.rollback()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""A local stand-in for the OpenAI Assistants API, for load tests.
+
+Implements the subset of the Assistants (v2) API that ``OpenAIAssistant``
+uses: threads (create, retrieve, delete), messages (create, list with
+cursors) and runs (create, retrieve, and ``stream=true`` as server-sent
+events). Runs take a sampled time to finish and then append a generated
+reply, so the backend's polling, streaming and pagination paths all do
+real work without spending money. State is kept in memory.
+
+Latencies are given as ``fixed:MS``, ``uniform:LOW,HIGH``, ``exp:MEAN`` or
+``lognormal:MEDIAN,SIGMA`` (milliseconds). ``--error-rate`` answers that
+fraction of requests with a 500 and ``--rate-limit-rate`` with a 429 and a
+``retry-after-ms`` header; the SDK retries both, as it would upstream.
+
+    python benchmarks/fake_openai.py --port 8081 --run-latency lognormal:1500,0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8081/v1 OPENAI_API_KEY=fake python app.py
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from flask import Flask, Response, jsonify, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+WORDS = (
+    "the assistant considers your question and answers it with a few "
+    "sentences of plausible text so that replies have a realistic size"
+).split()
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Turns a latency spec into a sampler returning seconds."""
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(",")]
+    except ValueError:
+        values = []
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "exp" and len(values) == 1 and values[0] > 0:
+        return lambda: random.expovariate(1 / values[0]) / 1000
+    if kind == "lognormal" and len(values) == 2 and values[0] > 0:
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma) / 1000
+    raise argparse.ArgumentTypeError(f"invalid latency spec: {spec!r}")
+
+
+def _error(message: str, status: HTTPStatus, kind: str, code: Optional[str] = None):
+    body = {"error": {"message": message, "type": kind, "param": None, "code": code}}
+    return jsonify(body), status
+
+
+class FakeAssistants:
+    """In-memory threads, messages and runs."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.api_latency = args.api_latency
+        self.run_latency = args.run_latency
+        self.error_rate = args.error_rate
+        self.rate_limit_rate = args.rate_limit_rate
+        self.run_failure_rate = args.run_failure_rate
+        self.reply_words = args.reply_words
+        self.stream_chunks = args.stream_chunks
+        self.threads: Dict[str, Dict[str, Any]] = {}
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def new_id(prefix: str) -> str:
+        return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+    def message(self, thread_id: str, role: str, text: str, **extra: Any):
+        message = {
+            "id": self.new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "status": "completed",
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "assistant_id": None,
+            "run_id": None,
+            "attachments": [],
+            "metadata": {},
+            "incomplete_details": None,
+            "completed_at": int(time.time()),
+            "incomplete_at": None,
+        }
+        message.update(extra)
+        # Messages created in the same second still list in creation order.
+        message["_seq"] = next(self._sequence)
+        return message
+
+    def reply_text(self) -> str:
+        count = max(1, int(random.gauss(self.reply_words, self.reply_words / 4)))
+        return " ".join(random.choice(WORDS) for _ in range(count)).capitalize() + "."
+
+    def new_run(self, thread_id: str, assistant_id: str) -> Dict[str, Any]:
+        now = time.time()
+        duration = self.run_latency()
+        run = {
+            "id": self.new_id("run"),
+            "object": "thread.run",
+            "created_at": int(now),
+            "thread_id": thread_id,
+            "assistant_id": assistant_id,
+            "status": "queued",
+            "started_at": None,
+            "completed_at": None,
+            "failed_at": None,
+            "cancelled_at": None,
+            "expired_at": None,
+            "last_error": None,
+            "model": "fake-model",
+            "instructions": "",
+            "tools": [],
+            "metadata": {},
+            "usage": None,
+            "_start": now + duration * 0.1,
+            "_finish": now + duration,
+            "_fails": random.random() < self.run_failure_rate,
+        }
+        with self.lock:
+            self.runs[run["id"]] = run
+        return run
+
+    def draft_reply(self, run: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Returns the reply a run will add, or None if it is going to fail."""
+        if run["_fails"]:
+            return None
+        return self.message(
+            run["thread_id"],
+            "assistant",
+            self.reply_text(),
+            assistant_id=run["assistant_id"],
+            run_id=run["id"],
+        )
+
+    def finish_run(self, run: Dict[str, Any], reply: Optional[Dict[str, Any]]) -> None:
+        """Completes a run with ``reply``, or fails it without one; call with
+        ``lock`` held."""
+        now = int(time.time())
+        run["started_at"] = run["started_at"] or now
+        if reply is None:
+            run.update(
+                status="failed",
+                failed_at=now,
+                last_error={"code": "server_error", "message": "Injected failure"},
+            )
+            return
+        thread = self.threads.get(run["thread_id"])
+        messages = thread["messages"] if thread is not None else []
+        prompt_tokens = sum(
+            len(message["content"][0]["text"]["value"].split()) for message in messages
+        )
+        messages.append(reply)
+        completion_tokens = len(reply["content"][0]["text"]["value"].split())
+        run.update(
+            status="completed",
+            completed_at=now,
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def advance(self, run: Dict[str, Any]) -> None:
+        """Moves a polled run along its timeline; call with ``lock`` held."""
+        if run["status"] not in ("queued", "in_progress"):
+            return
+        now = time.time()
+        if now >= run["_finish"]:
+            self.finish_run(run, self.draft_reply(run))
+        elif now >= run["_start"]:
+            run["status"] = "in_progress"
+            run["started_at"] = run["started_at"] or int(now)
+
+
+def public(obj: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in obj.items() if not key.startswith("_")}
+
+
+def sse(event: str, data: Any) -> str:
+    payload = orjson.dumps(data).decode() if orjson else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def create_app(fake: FakeAssistants) -> Flask:
+    app = Flask(__name__)
+
+    @app.before_request
+    def inject() -> Any:
+        time.sleep(fake.api_latency())
+        roll = random.random()
+        if roll < fake.rate_limit_rate:
+            response, status = _error(
+                "Rate limit reached for requests",
+                HTTPStatus.TOO_MANY_REQUESTS,
+                "requests",
+                "rate_limit_exceeded",
+            )
+            response.headers["retry-after-ms"] = "200"
+            return response, status
+        if roll < fake.rate_limit_rate + fake.error_rate:
+            return _error(
+                "The server had an error processing your request.",
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                "server_error",
+            )
+        return None
+
+    def thread_or_404(thread_id: str) -> Optional[Dict[str, Any]]:
+        with fake.lock:
+            return fake.threads.get(thread_id)
+
+    def not_found(kind: str, object_id: str):
+        return _error(
+            f"No {kind} found with id '{object_id}'.",
+            HTTPStatus.NOT_FOUND,
+            "invalid_request_error",
+        )
+
+    @app.route("/v1/threads", methods=["POST"])
+    def create_thread():
+        thread = {
+            "id": fake.new_id("thread"),
+            "object": "thread",
+            "created_at": int(time.time()),
+            "metadata": {},
+            "tool_resources": None,
+        }
+        with fake.lock:
+            fake.threads[thread["id"]] = dict(thread, messages=[])
+        return jsonify(thread)
+
+    @app.route("/v1/threads/<thread_id>", methods=["GET"])
+    def retrieve_thread(thread_id: str):
+        thread = thread_or_404(thread_id)
+        if thread is None:
+            return not_found("thread", thread_id)
+        return jsonify({k: v for k, v in thread.items() if k != "messages"})
+
+    @app.route("/v1/threads/<thread_id>", methods=["DELETE"])
+    def delete_thread(thread_id: str):
+        with fake.lock:
+            thread = fake.threads.pop(thread_id, None)
+        if thread is None:
+            return not_found("thread", thread_id)
+        return jsonify({"id": thread_id, "object": "thread.deleted", "deleted": True})
+
+    @app.route("/v1/threads/<thread_id>/messages", methods=["POST"])
+    def create_message(thread_id: str):
+        data = request.get_json(silent=True) or {}
+        content = data.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content)
+        message = fake.message(thread_id, data.get("role", "user"), content or "")
+        with fake.lock:
+            thread = fake.threads.get(thread_id)
+            if thread is None:
+                return not_found("thread", thread_id)
+            thread["messages"].append(message)
+        return jsonify(public(message))
+
+    @app.route("/v1/threads/<thread_id>/messages", methods=["GET"])
+    def list_messages(thread_id: str):
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        descending = request.args.get("order", "desc") == "desc"
+        after = request.args.get("after")
+        before = request.args.get("before")
+        with fake.lock:
+            thread = fake.threads.get(thread_id)
+            if thread is None:
+                return not_found("thread", thread_id)
+            ordered: List[Dict[str, Any]] = sorted(
+                thread["messages"], key=lambda m: m["_seq"], reverse=descending
+            )
+        ids = [message["id"] for message in ordered]
+        start, end = 0, len(ordered)
+        if after in ids:
+            start = ids.index(after) + 1
+        if before in ids:
+            end = ids.index(before)
+            start = max(start, end - limit)
+        page = ordered[start:end][:limit]
+        return jsonify(
+            {
+                "object": "list",
+                "data": [public(message) for message in page],
+                "first_id": page[0]["id"] if page else None,
+                "last_id": page[-1]["id"] if page else None,
+                "has_more": start + len(page) < end,
+            }
+        )
+
+    @app.route("/v1/threads/<thread_id>/runs", methods=["POST"])
+    def create_run(thread_id: str):
+        data = request.get_json(silent=True) or {}
+        if thread_or_404(thread_id) is None:
+            return not_found("thread", thread_id)
+        run = fake.new_run(thread_id, data.get("assistant_id", ""))
+        if data.get("stream"):
+            return Response(stream_run(run), mimetype="text/event-stream")
+        return jsonify(public(run))
+
+    def stream_run(run: Dict[str, Any]) -> Iterator[str]:
+        yield sse("thread.run.created", public(run))
+        yield sse("thread.run.queued", public(run))
+        time.sleep(max(0.0, run["_start"] - time.time()))
+        with fake.lock:
+            run.update(status="in_progress", started_at=int(time.time()))
+        yield sse("thread.run.in_progress", public(run))
+
+        reply = fake.draft_reply(run)
+        if reply is None:
+            time.sleep(max(0.0, run["_finish"] - time.time()))
+            with fake.lock:
+                fake.finish_run(run, None)
+                failed = public(run)
+            yield sse("thread.run.failed", failed)
+            yield "event: done\ndata: [DONE]\n\n"
+            return
+
+        pending = dict(public(reply), status="in_progress", content=[])
+        pending["completed_at"] = None
+        yield sse("thread.message.created", pending)
+        yield sse("thread.message.in_progress", pending)
+        words = reply["content"][0]["text"]["value"].split(" ")
+        step = math.ceil(len(words) / max(1, min(fake.stream_chunks, len(words))))
+        chunks = math.ceil(len(words) / step)
+        pause = max(0.0, run["_finish"] - time.time()) / chunks
+        for index in range(0, len(words), step):
+            time.sleep(pause)
+            text = " ".join(words[index : index + step])
+            delta = {
+                "id": reply["id"],
+                "object": "thread.message.delta",
+                "delta": {
+                    "content": [
+                        {
+                            "index": 0,
+                            "type": "text",
+                            "text": {
+                                "value": f" {text}" if index else text,
+                                "annotations": [],
+                            },
+                        }
+                    ]
+                },
+            }
+            yield sse("thread.message.delta", delta)
+        with fake.lock:
+            fake.finish_run(run, reply)
+            completed = public(run)
+        yield sse("thread.message.completed", public(reply))
+        yield sse("thread.run.completed", completed)
+        yield "event: done\ndata: [DONE]\n\n"
+
+    @app.route("/v1/threads/<thread_id>/runs/<run_id>", methods=["GET"])
+    def retrieve_run(thread_id: str, run_id: str):
+        with fake.lock:
+            run = fake.runs.get(run_id)
+            if run is None or run["thread_id"] != thread_id:
+                return not_found("run", run_id)
+            fake.advance(run)
+            return jsonify(public(run))
+
+    @app.route("/v1/stats", methods=["GET"])
+    def stats():
+        with fake.lock:
+            statuses: Dict[str, int] = {}
+            for run in fake.runs.values():
+                statuses[run["status"]] = statuses.get(run["status"], 0) + 1
+            return jsonify({"threads": len(fake.threads), "runs": statuses})
+
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "--api-latency",
+        type=parse_latency,
+        default=parse_latency("lognormal:30,0.4"),
+        help="latency added to every request",
+    )
+    parser.add_argument(
+        "--run-latency",
+        type=parse_latency,
+        default=parse_latency("lognormal:1500,0.5"),
+        help="time from creating a run to its completion",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--run-failure-rate",
+        type=float,
+        default=0.0,
+        help="fraction of runs that end with status 'failed'",
+    )
+    parser.add_argument("--reply-words", type=int, default=120)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--seed", type=int)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    app = create_app(FakeAssistants(args))
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
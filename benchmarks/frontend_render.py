@@ -0,0 +1,90 @@
+"""Per-rerun render cost of the chat on a long synthetic thread.
+
+Compares re-rendering every message on each rerun (the old
+``load_messages``) with ``MessageHistory``, which renders each message
+once, appends only new ones and emits the visible window. Only the
+Python-side HTML work is timed; the old path additionally sent one
+Streamlit element per message, the new one sends a single element.
+
+    python benchmarks/frontend_render.py --messages 2000 --reruns 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontend.utils.message_history import (  # noqa: E402
+    MessageHistory,
+    render_message,
+)
+
+
+def synthetic_thread(count: int, chars: int) -> List[Dict[str, Any]]:
+    """Newest first, like the backend returns it."""
+    text = ("lorem ipsum dolor sit amet " * (chars // 27 + 1))[:chars]
+    return [
+        {
+            "id": f"msg_{index:08d}",
+            "role": "user" if index % 2 else "assistant",
+            "created_at": index,
+            "content": [text],
+        }
+        for index in range(count, 0, -1)
+    ]
+
+
+def full_rerender(thread: List[Dict[str, Any]]) -> int:
+    return len("".join(render_message(message) for message in reversed(thread)))
+
+
+def report(label: str, samples: List[float]) -> None:
+    millis = sorted(sample * 1000 for sample in samples)
+    print(
+        f"{label:>22}: median {statistics.median(millis):8.3f} ms"
+        f"  p95 {millis[int(len(millis) * 0.95)]:8.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--chars", type=int, default=400)
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    thread = synthetic_thread(args.messages, args.chars)
+
+    full: List[float] = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        full_rerender(thread)
+        full.append(time.perf_counter() - start)
+
+    history = MessageHistory(args.page_size)
+    history.prepend_older(thread)
+    idle: List[float] = []
+    appended: List[float] = []
+    for index in range(args.reruns):
+        start = time.perf_counter()
+        history.render()
+        idle.append(time.perf_counter() - start)
+
+        new_message = {**thread[-1], "id": f"new_{index:08d}"}
+        start = time.perf_counter()
+        history.append_newer([new_message])
+        history.render()
+        appended.append(time.perf_counter() - start)
+
+    print(f"{args.messages} messages, window of {args.page_size}\n")
+    report("full re-render", full)
+    report("incremental, no change", idle)
+    report("incremental, 1 new", appended)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Per-call latency of one-shot ``requests`` calls vs the pooled session.
+
+Starts a local keep-alive HTTP server (or targets ``--base-url``) and times
+``--calls`` sequential GETs with module-level ``requests.get`` (a new TCP
+connection per call) and with ``frontend.utils.http.session``.
+
+    python benchmarks/http_session.py --calls 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontend.utils.http import session  # noqa: E402
+
+BODY = b'{"conversations": [], "next_cursor": null}'
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def time_calls(
+    label: str, get: Callable[[str], requests.Response], url: str, calls: int
+) -> None:
+    samples: List[float] = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        get(url).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(
+        f"{label:>16}: mean {statistics.mean(samples):6.3f} ms"
+        f"  p50 {samples[len(samples) // 2]:6.3f} ms"
+        f"  p99 {samples[int(len(samples) * 0.99)]:6.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url")
+    parser.add_argument("--path", default="/healthz")
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if not base_url:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    url = f"{base_url}{args.path}"
+    time_calls("requests.get", requests.get, url, args.calls)
+    time_calls("pooled session", session.get, url, args.calls)
+
+
+if __name__ == "__main__":
+    main()
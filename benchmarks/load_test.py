@@ -0,0 +1,329 @@
+"""End-to-end load test: N virtual users against a running backend.
+
+Each virtual user registers, logs in and creates a conversation, then
+until ``--duration`` runs out keeps sending messages (a ``--stream-ratio``
+share of them streamed), listing its conversations and reading messages,
+with ``--think-ms`` between steps and a new conversation every
+``--messages-per-conversation`` sends. Point the backend at
+``benchmarks/fake_openai.py`` so no OpenAI calls are made.
+
+The report gives throughput and, per endpoint, p50/p95/p99 latency and the
+error rate; streamed sends also report time to the first event. With
+``--baseline`` the run fails (exit status 1) if any endpoint's p95 grew by
+more than ``--tolerance`` (once it has ``--min-samples`` requests), its
+error rate by more than ``--error-margin``, or throughput fell by more than
+``--tolerance``. ``--save-baseline`` writes the current results in the same
+format. Compare runs made with the same options, fake server settings and
+machine.
+
+    python benchmarks/fake_openai.py --port 8081 &
+    OPENAI_BASE_URL=http://127.0.0.1:8081/v1 OPENAI_API_KEY=fake \\
+        gunicorn -c gunicorn.conf.py wsgi:app &
+    python benchmarks/load_test.py --base-url http://localhost:5000 --users 50 \\
+        --duration 120 --save-baseline load_test_baseline.json
+    # later, after a change, with the same options:
+    python benchmarks/load_test.py --base-url http://localhost:5000 --users 50 \\
+        --duration 120 --baseline load_test_baseline.json
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from _stats import percentile
+
+REGISTER = "POST /register"
+LOGIN = "POST /login"
+CREATE = "POST /conversations"
+SEND = "POST /conversations/<id>/messages"
+SEND_STREAM = "POST /conversations/<id>/messages (stream)"
+STREAM_FIRST_EVENT = "POST /conversations/<id>/messages (stream, first event)"
+LIST = "GET /conversations"
+MESSAGES = "GET /conversations/<id>/messages"
+
+
+class Recorder:
+    """Collects latency samples and failures per endpoint, across threads."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, status: Any, ok: bool) -> None:
+        with self._lock:
+            self.samples[endpoint].append(seconds * 1000)
+            self.statuses[endpoint][str(status)] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        total = 0
+        for endpoint, samples in sorted(self.samples.items()):
+            if endpoint != STREAM_FIRST_EVENT:
+                total += len(samples)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "throughput": round(len(samples) / elapsed, 2),
+                "error_rate": round(self.errors[endpoint] / len(samples), 4),
+                "p50_ms": round(percentile(samples, 50), 1),
+                "p95_ms": round(percentile(samples, 95), 1),
+                "p99_ms": round(percentile(samples, 99), 1),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        errors = sum(
+            count for name, count in self.errors.items() if name != STREAM_FIRST_EVENT
+        )
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "requests": total,
+            "throughput": round(total / elapsed, 2),
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+class VirtualUser:
+    def __init__(
+        self, number: int, args: argparse.Namespace, recorder: Recorder
+    ) -> None:
+        self.args = args
+        self.recorder = recorder
+        self.session = requests.Session()
+        self.email = f"load-{uuid.uuid4().hex[:12]}-{number}@example.com"
+        self.password = uuid.uuid4().hex
+        self.conversation_id: Optional[int] = None
+        self.sent = 0
+
+    def call(self, endpoint: str, method: str, path: str, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                f"{self.args.base_url}{path}",
+                timeout=self.args.timeout,
+                **kwargs,
+            )
+        except requests.RequestException as e:
+            elapsed = time.perf_counter() - start
+            self.recorder.record(endpoint, elapsed, type(e).__name__, False)
+            return None
+        self.recorder.record(
+            endpoint, time.perf_counter() - start, response.status_code, response.ok
+        )
+        return response
+
+    def stream(self, path: str, body: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        status: Any = None
+        ok = False
+        try:
+            with self.session.post(
+                f"{self.args.base_url}{path}",
+                json=body,
+                stream=True,
+                timeout=self.args.timeout,
+            ) as response:
+                status = response.status_code
+                ok = response.ok
+                first = True
+                for line in response.iter_lines():
+                    if first and line:
+                        self.recorder.record(
+                            STREAM_FIRST_EVENT, time.perf_counter() - start, status, ok
+                        )
+                        first = False
+                    if line == b"event: error":
+                        ok = False
+        except requests.RequestException as e:
+            status, ok = type(e).__name__, False
+        self.recorder.record(SEND_STREAM, time.perf_counter() - start, status, ok)
+
+    def think(self) -> None:
+        if self.args.think_ms:
+            time.sleep(random.uniform(0.5, 1.5) * self.args.think_ms / 1000)
+
+    def start(self) -> bool:
+        credentials = {"email": self.email, "password": self.password}
+        response = self.call(REGISTER, "POST", "/register", json=credentials)
+        if response is None or not response.ok:
+            return False
+        response = self.call(LOGIN, "POST", "/login", json=credentials)
+        return response is not None and response.ok
+
+    def step(self) -> None:
+        if (
+            self.conversation_id is None
+            or self.sent >= self.args.messages_per_conversation
+        ):
+            response = self.call(CREATE, "POST", "/conversations")
+            if response is None or not response.ok:
+                self.think()
+                return
+            self.conversation_id = response.json()["conversation_id"]
+            self.sent = 0
+            self.think()
+
+        path = f"/conversations/{self.conversation_id}/messages"
+        body = {"message": f"Load test message {self.sent} from {self.email}"}
+        if random.random() < self.args.stream_ratio:
+            self.stream(path, dict(body, stream=True))
+        else:
+            self.call(SEND, "POST", path, json=body)
+        self.sent += 1
+        self.think()
+
+        self.call(LIST, "GET", "/conversations", params={"limit": 20})
+        self.think()
+        self.call(MESSAGES, "GET", path, params={"limit": 20})
+        self.think()
+
+    def run(self, deadline: float) -> None:
+        if not self.start():
+            return
+        while time.monotonic() < deadline:
+            self.step()
+
+
+def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    recorder = Recorder()
+    started = time.monotonic()
+    deadline = started + args.ramp_up + args.duration
+    threads = []
+    for number in range(args.users):
+        user = VirtualUser(number, args, recorder)
+        thread = threading.Thread(target=user.run, args=(deadline,), daemon=True)
+        threads.append(thread)
+        thread.start()
+        if args.ramp_up:
+            time.sleep(args.ramp_up / args.users)
+    for thread in threads:
+        thread.join()
+    summary = recorder.summary(time.monotonic() - started)
+    summary["options"] = {
+        "users": args.users,
+        "duration": args.duration,
+        "ramp_up": args.ramp_up,
+        "stream_ratio": args.stream_ratio,
+        "think_ms": args.think_ms,
+        "messages_per_conversation": args.messages_per_conversation,
+    }
+    return summary
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], args: argparse.Namespace
+) -> List[str]:
+    """Returns a description of each regression against ``baseline``."""
+    regressions = []
+    if current["throughput"] < baseline["throughput"] * (1 - args.tolerance):
+        regressions.append(
+            f"throughput {current['throughput']} req/s"
+            f" < baseline {baseline['throughput']} req/s"
+        )
+    for endpoint, expected in baseline["endpoints"].items():
+        actual = current["endpoints"].get(endpoint)
+        if actual is None:
+            regressions.append(f"{endpoint}: no requests made")
+            continue
+        # A p95 over a handful of samples (register, login) is mostly noise.
+        enough = min(actual["requests"], expected["requests"]) >= args.min_samples
+        if enough and actual["p95_ms"] > expected["p95_ms"] * (1 + args.tolerance):
+            regressions.append(
+                f"{endpoint}: p95 {actual['p95_ms']} ms"
+                f" > baseline {expected['p95_ms']} ms"
+            )
+        if actual["error_rate"] > expected["error_rate"] + args.error_margin:
+            regressions.append(
+                f"{endpoint}: error rate {actual['error_rate']:.2%}"
+                f" > baseline {expected['error_rate']:.2%}"
+            )
+    if current.get("options") != baseline.get("options"):
+        print(
+            "warning: options differ from the baseline's"
+            f" ({baseline.get('options')})",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(
+        f"{summary['requests']} requests in {summary['elapsed_s']} s:"
+        f" {summary['throughput']} req/s, {summary['error_rate']:.2%} errors"
+    )
+    width = max([len("endpoint")] + [len(name) for name in summary["endpoints"]])
+    print(
+        f"{'endpoint':<{width}}  {'count':>6}  {'req/s':>7}  {'errors':>7}"
+        f"  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}"
+    )
+    for endpoint, stats in summary["endpoints"].items():
+        print(
+            f"{endpoint:<{width}}  {stats['requests']:>6}  {stats['throughput']:>7}"
+            f"  {stats['error_rate']:>7.2%}  {stats['p50_ms']:>8}"
+            f"  {stats['p95_ms']:>8}  {stats['p99_ms']:>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument(
+        "--ramp-up", type=float, default=5, help="seconds to start all users over"
+    )
+    parser.add_argument("--stream-ratio", type=float, default=0.5)
+    parser.add_argument("--think-ms", type=float, default=200)
+    parser.add_argument("--messages-per-conversation", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--baseline", help="fail on regressions against this file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed p95/throughput change"
+    )
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=30,
+        help="requests an endpoint needs before its p95 is compared",
+    )
+    parser.add_argument(
+        "--error-margin", type=float, default=0.01, help="allowed error rate increase"
+    )
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    summary = run_load(args)
+    print_report(summary)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Request latency with logging off, the old synchronous setup and the queue.
+
+Serves a route that logs like ``send_message`` does (a few INFO lines and
+the user's text plus the assistant's reply) through the Flask test client,
+so no database or API key is needed, and reports latency per mode:
+
+* ``off``: logging disabled;
+* ``sync``: the previous setup, ``FileHandler`` plus console on the
+  request thread, with the payloads logged in full at INFO;
+* ``queue``: ``configure_logging`` with JSON records, payloads at DEBUG
+  and a rotating file written by the listener thread. Its per-call-site
+  rate limit applies too; ``LOG_RATE_LIMIT=0`` measures the queue alone.
+
+Console output goes to ``/dev/null`` in every mode so the terminal does not
+dominate; ``--fsync`` makes the file handlers sync each record, standing in
+for a slow or busy disk.
+
+    python benchmarks/logging_overhead.py --requests 5000 --threads 8
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, List
+
+from flask import Flask, jsonify
+
+from _stats import percentile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.src import logging_setup  # noqa: E402
+
+logger = logging.getLogger("bench")
+
+
+def fsync_after_emit(handler: logging.StreamHandler) -> None:
+    emit = handler.emit
+
+    def emit_and_sync(record: logging.LogRecord) -> None:
+        emit(record)
+        handler.flush()
+        os.fsync(handler.stream.fileno())
+
+    handler.emit = emit_and_sync
+
+
+def build_app(payload_level: int) -> Flask:
+    app = Flask(__name__)
+    logging_setup.init_request_ids(app)
+    message = "How do I keep p99 latency down? " * 20
+    reply = "Measure first, then remove work from the request path. " * 300
+
+    @app.route("/send", methods=["POST"])
+    def send():
+        logger.info("Sending message to thread thread_abc with assistant asst_abc.")
+        logger.log(payload_level, f"Message sent: {message}")
+        logger.info("Assistant response completed for thread thread_abc.")
+        logger.log(payload_level, f"Assistant response: {reply}")
+        logger.info("Message sent to conversation 1")
+        return jsonify({"reply": reply[:200]})
+
+    return app
+
+
+def measure(app: Flask, requests: int, threads: int) -> List[float]:
+    def worker(count: int) -> List[float]:
+        client = app.test_client()
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            client.post("/send")
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    per_thread = requests // threads
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = pool.map(worker, [per_thread] * threads)
+    return [sample for samples in results for sample in samples]
+
+
+def reset_root() -> None:
+    logging_setup.stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    logging.disable(logging.NOTSET)
+
+
+def run_mode(
+    mode: str, directory: str, args: argparse.Namespace, devnull: IO[str]
+) -> List[float]:
+    reset_root()
+    sys.stderr = devnull
+    try:
+        path = os.path.join(directory, f"{mode}.log")
+        if mode == "off":
+            logging.disable(logging.CRITICAL)
+            app = build_app(logging.INFO)
+        elif mode == "sync":
+            file_handler = logging.FileHandler(path)
+            if args.fsync:
+                fsync_after_emit(file_handler)
+            logging.basicConfig(
+                level=logging.INFO,
+                format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                handlers=[file_handler, logging.StreamHandler()],
+            )
+            app = build_app(logging.INFO)
+        else:
+            logging_setup.configure_logging(filename=path)
+            if args.fsync:
+                for handler in logging_setup._listener.handlers:
+                    if isinstance(handler, logging.FileHandler):
+                        fsync_after_emit(handler)
+            app = build_app(logging.DEBUG)
+        measure(app, min(200, args.requests), args.threads)  # warm-up
+        samples = measure(app, args.requests, args.threads)
+        reset_root()
+        return samples
+    finally:
+        sys.stderr = sys.__stderr__
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--fsync", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        for mode in ("off", "sync", "queue"):
+            results[mode] = run_mode(mode, directory, args, devnull)
+        sizes = {
+            name: os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        }
+
+    for mode, samples in results.items():
+        print(
+            f"{mode:>6}: p50 {statistics.median(samples):7.3f} ms"
+            f"  p95 {percentile(samples, 95):7.3f} ms"
+            f"  p99 {percentile(samples, 99):7.3f} ms"
+        )
+    for name, size in sorted(sizes.items()):
+        print(f"{name}: {size / 2**20:.1f} MiB written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Benchmarks GET /search query latency on a seeded message corpus.
+
+Seeds ``--messages`` rows (default 1M) into ``conversation_messages``,
+built from a fixed vocabulary with ``generate_series`` and skewed so a
+few users own most of the corpus, then times ``search_messages`` for the
+heaviest user with common, rare and phrase queries (first page and the
+page behind its cursor), printing the plan of the hit query. Run against
+a scratch database that is already migrated:
+
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python benchmarks/search_latency.py --seed
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, List
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.src.pagination import decode_rank_cursor  # noqa: E402
+from app.src.search import search_messages  # noqa: E402
+
+# Word frequencies fall off with position, roughly like natural text.
+VOCABULARY = (
+    "the of and to in is you that it for was on are with as be this have from "
+    "database query index postgres python flask thread assistant message search "
+    "latency throughput memory cache vector embedding token stream batch worker "
+    "migration schema cursor pagination deploy docker gunicorn benchmark profile "
+    "kubernetes terraform observability tracing histogram quantile regression"
+).split()
+
+SEED_USERS = """
+INSERT INTO users (email, password_hash, created_at)
+SELECT 'bench-search-' || g || '@example.com', 'x', now()
+FROM generate_series(1, :users) AS g
+ON CONFLICT (email) DO NOTHING
+"""
+
+SEED_CONVERSATIONS = """
+INSERT INTO conversation_threads (user_id, thread_id, created_at, assistant_id, status)
+SELECT u.id, 'thread_bench_search_' || u.id || '_' || c, now(), 'asst_bench', 'active'
+FROM users u, generate_series(1, :per_user) AS c
+WHERE u.email LIKE 'bench-search-%'
+"""
+
+# Each message is 30 words drawn with a power-law skew over the vocabulary.
+SEED_MESSAGES = """
+INSERT INTO conversation_messages (user_id, conversation_id, role, content, created_at)
+SELECT t.user_id,
+       t.id,
+       CASE WHEN s.g % 2 = 0 THEN 'user' ELSE 'assistant' END,
+       (
+           SELECT string_agg(
+               (:words)[1 + floor(power(random(), 3) * array_length(:words, 1))::int],
+               ' '
+           )
+           FROM generate_series(1, 30) WHERE s.g > 0
+       ),
+       now() - (s.g || ' seconds')::interval
+FROM (
+    SELECT g, 1 + floor(:conversations * power(random(), 4))::int AS n
+    FROM generate_series(1, :rows) AS g
+) AS s
+JOIN (
+    SELECT id, user_id, row_number() OVER (ORDER BY id) AS n
+    FROM conversation_threads
+    WHERE thread_id LIKE 'thread_bench_search_%'
+) AS t ON t.n = s.n
+"""
+
+QUERIES = (
+    ("common term", "database"),
+    ("rare term", "quantile"),
+    ("two terms", "postgres latency"),
+    ("phrase", '"vector embedding"'),
+    ("no match", "zyzzyva"),
+)
+
+
+def seed(session: Session, users: int, per_user: int, rows: int) -> None:
+    start = time.perf_counter()
+    session.execute(text(SEED_USERS), {"users": users})
+    session.execute(text(SEED_CONVERSATIONS), {"per_user": per_user})
+    session.execute(
+        text(SEED_MESSAGES),
+        {"words": VOCABULARY, "conversations": users * per_user, "rows": rows},
+    )
+    session.execute(text("ANALYZE conversation_messages"))
+    session.commit()
+    print(f"Seeded {rows} messages in {time.perf_counter() - start:.1f}s")
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--conversations-per-user", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    session = Session(bind=create_engine(args.database_url))
+    if args.seed:
+        seed(session, args.users, args.conversations_per_user, args.messages)
+
+    heavy_user, total = session.execute(
+        text(
+            "SELECT user_id, count(*) FROM conversation_messages "
+            "GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+        )
+    ).one()
+    print(f"Heaviest user {heavy_user} owns {total} messages\n")
+
+    for label, query in QUERIES:
+        results, cursor = search_messages(session, heavy_user, query, args.limit)
+        first = time_call(
+            lambda: search_messages(session, heavy_user, query, args.limit),
+            args.repeat,
+        )
+        line = (
+            f"{label:>12}: first page median {statistics.median(first):8.2f} ms"
+            f"  max {max(first):8.2f} ms"
+        )
+        if cursor:
+            after = decode_rank_cursor(cursor)
+            second = time_call(
+                lambda: search_messages(
+                    session, heavy_user, query, args.limit, after
+                ),
+                args.repeat,
+            )
+            line += f"  | next page median {statistics.median(second):8.2f} ms"
+        print(f"{line}  ({len(results)} hits shown)")
+
+    plan = session.execute(
+        text(
+            "EXPLAIN (ANALYZE, BUFFERS) SELECT id FROM conversation_messages "
+            "WHERE user_id = :user_id "
+            "AND search_vector @@ websearch_to_tsquery('english', :q)"
+        ),
+        {"user_id": heavy_user, "q": QUERIES[0][1]},
+    )
+    print("\nPlan for the common-term match:")
+    print("\n".join(f"    {row[0]}" for row in plan))
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Bulk-loads synthetic users and conversations for database benchmarks.
+
+Inserts ``--users`` users and ``--conversations`` conversations in batches
+of ``--batch-size``, either streamed with ``COPY`` (the default) or as
+multi-row ``INSERT`` batches (``--method executemany``), and reports rows
+per second for each table. Conversations are skewed towards a few heavy
+users (``--skew``), spread over ``--days`` days, and ``--archived-ratio``
+of them are archived, so the per-user listings look like production.
+
+The columns loaded are read from the model tables (all but the primary
+key), so a column added to a model that the seeder does not fill stops it
+with an error instead of silently seeding a stale shape. Every
+run tags its rows with a random token, so it can be repeated to grow the
+tables. All users share the password ``--password``, hashed once.
+
+Run it against a scratch database that is already migrated:
+
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python benchmarks/seed_db.py \\
+        --users 1000000 --conversations 5000000
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import Engine
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.conversation_thread import (  # noqa: E402
+    ACTIVE,
+    ARCHIVED,
+    TITLE_LENGTH,
+    ConversationThread,
+)
+from app.models.user import User  # noqa: E402
+
+USERS = User.__table__
+CONVERSATIONS = ConversationThread.__table__
+USER_COLUMNS = tuple(c.name for c in USERS.columns if not c.primary_key)
+CONVERSATION_COLUMNS = tuple(
+    c.name for c in CONVERSATIONS.columns if not c.primary_key
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def user_rows(
+    count: int, run: str, password_hash: str, days: int
+) -> Iterator[Dict[str, Any]]:
+    now = _utcnow()
+    for n in range(count):
+        yield {
+            "email": f"seed-{run}-{n}@example.com",
+            "password_hash": password_hash,
+            "created_at": now - timedelta(seconds=random.uniform(0, days * 86400)),
+            "conversations_version": 0,
+        }
+
+
+def conversation_rows(
+    count: int, run: str, user_ids: List[int], args: argparse.Namespace
+) -> Iterator[Dict[str, Any]]:
+    now = _utcnow()
+    for n in range(count):
+        # random() ** skew piles conversations onto the first few users.
+        owner = user_ids[int(len(user_ids) * random.random() ** args.skew)]
+        created_at = now - timedelta(seconds=random.uniform(0, args.days * 86400))
+        idle = (now - created_at) * random.random()
+        last_activity_at = now - idle
+        archived = random.random() < args.archived_ratio
+        yield {
+            "user_id": owner,
+            "thread_id": f"thread_seed_{run}_{n}",
+            "created_at": created_at,
+            "assistant_id": "asst_seed",
+            "title": f"Seeded conversation {n} about topic {n % 997}"[:TITLE_LENGTH],
+            "status": ARCHIVED if archived else ACTIVE,
+            "version": random.randint(0, 40),
+            "last_activity_at": last_activity_at,
+            "archived_at": last_activity_at + idle / 2 if archived else None,
+            "remote_deleted_at": None,
+        }
+
+
+def batches(
+    rows: Iterator[Dict[str, Any]], size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def copy_batch(
+    engine: Engine, table: str, columns: tuple, batch: List[Dict[str, Any]]
+) -> None:
+    payload = io.StringIO()
+    writer = csv.writer(payload)
+    for row in batch:
+        # csv writes None as an empty field, which COPY reads as NULL.
+        values = [row[column] for column in columns]
+        writer.writerow(
+            [v.isoformat() if isinstance(v, datetime) else v for v in values]
+        )
+    payload.seek(0)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            payload,
+        )
+        cursor.close()
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def load(
+    engine: Engine,
+    table: Any,
+    columns: tuple,
+    rows: Iterator[Dict[str, Any]],
+    args: argparse.Namespace,
+) -> int:
+    """Inserts ``rows`` into ``table``, committing each batch; returns the
+    number of rows."""
+    total = 0
+    start = time.perf_counter()
+    for batch in batches(rows, args.batch_size):
+        if not total:
+            missing = set(columns) - set(batch[0])
+            if missing:
+                raise SystemExit(
+                    f"The seeder does not fill {table.name}."
+                    f"{', '.join(sorted(missing))}; update it for the new columns"
+                )
+        if args.method == "copy":
+            copy_batch(engine, table.name, columns, batch)
+        else:
+            with engine.begin() as connection:
+                connection.execute(insert(table), batch)
+        total += len(batch)
+        if total % (args.batch_size * 10) == 0:
+            rate = total / (time.perf_counter() - start)
+            print(f"  {table.name}: {total} rows ({rate:,.0f} rows/s)")
+    elapsed = time.perf_counter() - start
+    print(
+        f"{table.name}: {total} rows in {elapsed:.1f}s"
+        f" ({total / elapsed if elapsed else 0:,.0f} rows/s, {args.method})"
+    )
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--conversations", type=int, default=1_000_000)
+    parser.add_argument("--method", choices=("copy", "executemany"), default="copy")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--skew", type=float, default=4.0, help="higher piles more on heavy users"
+    )
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--archived-ratio", type=float, default=0.1)
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    engine = create_engine(args.database_url)
+    run = uuid.uuid4().hex[:8]
+    password_hash = generate_password_hash(args.password)
+    print(f"Seeding run {run}")
+
+    load(
+        engine,
+        USERS,
+        USER_COLUMNS,
+        user_rows(args.users, run, password_hash, args.days),
+        args,
+    )
+    with engine.connect() as connection:
+        user_ids = [
+            row[0]
+            for row in connection.execute(
+                text("SELECT id FROM users WHERE email LIKE :pattern ORDER BY id"),
+                {"pattern": f"seed-{run}-%"},
+            )
+        ]
+    if args.conversations and user_ids:
+        load(
+            engine,
+            CONVERSATIONS,
+            CONVERSATION_COLUMNS,
+            conversation_rows(args.conversations, run, user_ids, args),
+            args,
+        )
+
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE users"))
+        connection.execute(text("ANALYZE conversation_threads"))
+    print(f"ANALYZE took {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Query latency and memory of the memory-mapped vector index.
+
+Appends ``--vectors`` random unit vectors (default 1M) to a scratch
+``VectorIndex`` in chunks, the way incremental indexing does, then times
+top-k queries against it. The index is scanned through ``np.memmap`` in
+blocks, so the traced (heap) peak per query should stay small and flat;
+for comparison the same search is run on a matrix loaded fully into RAM.
+Also reports ``HashingEmbedder`` throughput. Needs no database or API key.
+
+    python benchmarks/semantic_search.py --vectors 1000000 --dimensions 256
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+from _stats import percentile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.src.embeddings import HashingEmbedder, normalize  # noqa: E402
+from app.src.vector_index import VectorIndex  # noqa: E402
+
+USER_ID = 1
+APPEND_CHUNK = 50_000
+
+
+def build(index: VectorIndex, count: int, dimensions: int) -> None:
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    with index.lock(USER_ID):
+        for offset in range(0, count, APPEND_CHUNK):
+            rows = min(APPEND_CHUNK, count - offset)
+            vectors = normalize(rng.standard_normal((rows, dimensions), np.float32))
+            ids = [(offset + row, (offset + row) // 20) for row in range(rows)]
+            index.append(USER_ID, vectors, ids)
+    elapsed = time.perf_counter() - start
+    print(f"Appended {count:,} vectors in {elapsed:.1f}s ({count / elapsed:,.0f}/s)")
+
+
+def measure(
+    label: str, search: Callable[[np.ndarray], object], queries: np.ndarray
+) -> None:
+    samples, peaks = [], []
+    for query in queries:
+        tracemalloc.start()
+        start = time.perf_counter()
+        search(query)
+        samples.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+        tracemalloc.stop()
+    print(
+        f"{label:>10}: p50 {statistics.median(samples):8.2f} ms"
+        f"  p95 {percentile(samples, 95):8.2f} ms"
+        f"  heap peak {max(peaks):8.2f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder()
+    texts = [f"how do I tune postgres query {i} for latency" for i in range(2000)]
+    start = time.perf_counter()
+    embedder.embed(texts)
+    rate = len(texts) / (time.perf_counter() - start)
+    print(f"HashingEmbedder: {rate:,.0f} texts/s")
+
+    with tempfile.TemporaryDirectory() as root:
+        index = VectorIndex("bench", args.dimensions, root=root)
+        build(index, args.vectors, args.dimensions)
+        size = os.path.getsize(os.path.join(index.directory, f"{USER_ID}.vec"))
+        print(f"Index file: {size / 2**20:,.0f} MiB\n")
+
+        rng = np.random.default_rng(1)
+        queries = normalize(
+            rng.standard_normal((args.queries, args.dimensions), np.float32)
+        )
+        # First pass pages the file in; the timed pass measures a warm cache.
+        for query in queries[:2]:
+            index.search(USER_ID, query, args.k)
+        measure("mmap", lambda q: index.search(USER_ID, q, args.k), queries)
+
+        matrix = np.fromfile(
+            os.path.join(index.directory, f"{USER_ID}.vec"), dtype=np.float32
+        ).reshape(-1, args.dimensions)
+
+        def in_memory(query: np.ndarray) -> np.ndarray:
+            scores = matrix @ query
+            top = np.argpartition(scores, -args.k)[-args.k :]
+            return top[np.argsort(-scores[top])]
+
+        measure("in-RAM", in_memory, queries)
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nMax RSS: {max_rss:,.0f} MiB (includes the in-RAM copy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Payload size and serialize time for large message histories.
+
+Builds a synthetic ``get_conversation_messages`` payload and reports, per
+JSON encoder, the serialize time, and per content encoding, the bytes on
+the wire and compression time.
+
+    python benchmarks/serialization.py --messages 5000 --chars 800
+"""
+import argparse
+import datetime
+import gzip
+import json
+import random
+import string
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def synthetic_payload(messages: int, chars: int) -> Dict[str, Any]:
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(2000)
+    ]
+    created = int(time.time())
+    data: List[Dict[str, Any]] = []
+    for index in range(messages):
+        text = []
+        while sum(len(word) + 1 for word in text) < chars:
+            text.append(rng.choice(words))
+        data.append(
+            {
+                "id": f"msg_{index:024d}",
+                "role": "user" if index % 2 else "assistant",
+                "created_at": created - index,
+                "content": [" ".join(text)],
+            }
+        )
+    return {
+        "conversation_id": 1,
+        "messages": data,
+        "fetched_at": datetime.datetime.now(datetime.timezone.utc),
+    }
+
+
+def stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(
+        obj, default=lambda value: value.isoformat(), separators=(",", ":")
+    ).encode()
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> Tuple[bytes, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--chars", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--level", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = synthetic_payload(args.messages, args.chars)
+
+    encoders: Dict[str, Callable[[], bytes]] = {
+        "stdlib json": lambda: stdlib_dumps(payload)
+    }
+    if orjson is not None:
+        encoders["orjson"] = lambda: orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC)
+
+    print(f"{args.messages} messages, ~{args.chars} chars each\n")
+    body = b""
+    for name, fn in encoders.items():
+        body, ms = timed(fn, args.repeat)
+        print(f"{name:>12}: {ms:8.2f} ms  {len(body):>12,} bytes")
+
+    codecs: Dict[str, Callable[[bytes], bytes]] = {
+        "identity": lambda data: data,
+        "gzip": lambda data: gzip.compress(data, compresslevel=min(args.level, 9)),
+    }
+    if brotli is not None:
+        codecs["br"] = lambda data: brotli.compress(data, quality=min(args.level, 11))
+    if zstandard is not None:
+        codecs["zstd"] = lambda data: zstandard.ZstdCompressor(
+            level=args.level
+        ).compress(data)
+
+    print()
+    for name, codec in codecs.items():
+        compressed, ms = timed(lambda: codec(body), args.repeat)
+        ratio = len(body) / len(compressed)
+        print(
+            f"{name:>12}: {ms:8.2f} ms  {len(compressed):>12,} bytes  ({ratio:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Streamlit rerun time of the conversation page for a user with many
+conversations.
+
+Runs ``front.py`` headless with ``streamlit.testing`` against an
+in-memory fake of ``ConversationService.list_conversations`` holding
+``--conversations`` rows, and times reruns with the paginated sidebar vs
+one page holding every conversation (the old behaviour).
+
+    python benchmarks/sidebar_rerun.py --conversations 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from frontend.services.conversation import ConversationService  # noqa: E402
+
+
+def install_fake_backend(count: int) -> None:
+    rows: List[Dict[str, Any]] = [
+        {
+            "id": index,
+            "thread_id": f"thread_{index}",
+            "assistant_id": "asst_bench",
+            "title": f"Benchmark conversation {index}",
+            "created_at": f"2026-01-01T00:00:{index % 60:02d}+00:00",
+            "status": "active",
+        }
+        for index in range(count, 0, -1)
+    ]
+
+    def list_conversations(
+        cls: type,
+        token: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        title_prefix: Optional[str] = None,
+        created_after: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        start = int(cursor or 0)
+        end = start + (limit or 50)
+        return {
+            "conversations": rows[start:end],
+            "next_cursor": str(end) if end < len(rows) else None,
+        }
+
+    ConversationService.list_conversations = classmethod(list_conversations)
+
+
+def time_reruns(page_size: int, reruns: int) -> List[float]:
+    os.environ["FRONTEND_SIDEBAR_PAGE_SIZE"] = str(page_size)
+    app = AppTest.from_file(os.path.join(ROOT, "front.py"), default_timeout=120)
+    app.session_state["logged_in"] = True
+    app.session_state["token"] = "benchmark"
+    app.run()
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+
+    install_fake_backend(args.conversations)
+    for label, page_size in (
+        (f"paginated ({args.page_size})", args.page_size),
+        (f"all ({args.conversations})", args.conversations),
+    ):
+        samples = time_reruns(page_size, args.reruns)
+        print(
+            f"{label:>18}: median {statistics.median(samples):9.1f} ms"
+            f"  max {max(samples):9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Peak memory of buffered vs streamed message responses.
+
+Feeds a synthetic thread (default 50k messages) through the same body
+builders the backend uses and reports tracemalloc peaks. The buffered
+path grows with thread length; both streaming modes should stay flat.
+Exits non-zero if a streaming peak exceeds ``--max-stream-mb``.
+
+    python benchmarks/streaming_memory.py --messages 50000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.src.streaming import json_object_chunks, ndjson_lines  # noqa: E402
+
+
+def synthetic_messages(count: int, chars: int) -> Iterator[Dict[str, Any]]:
+    """Yields messages lazily, like paging through the upstream API."""
+    text = ("lorem ipsum dolor sit amet " * (chars // 27 + 1))[:chars]
+    created = int(time.time())
+    for index in range(count):
+        yield {
+            "id": f"msg_{index:024d}",
+            "role": "user" if index % 2 else "assistant",
+            "created_at": created - index,
+            "content": [text],
+        }
+
+
+def buffered(count: int, chars: int) -> int:
+    messages = list(synthetic_messages(count, chars))
+    body = json.dumps({"conversation_id": 1, "messages": messages})
+    return len(body)
+
+
+def drain(chunks: Iterator[str]) -> int:
+    return sum(len(chunk) for chunk in chunks)
+
+
+def measure(label: str, fn: Callable[[], int]) -> float:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_mb = peak / 2**20
+    print(f"{label:>10}: peak {peak_mb:8.2f} MiB  {size:>14,} chars  {elapsed:6.2f} s")
+    return peak_mb
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--chars", type=int, default=500)
+    parser.add_argument("--max-stream-mb", type=float, default=5.0)
+    args = parser.parse_args()
+
+    count, chars = args.messages, args.chars
+    measure("buffered", lambda: buffered(count, chars))
+    peaks = [
+        measure(
+            "ndjson",
+            lambda: drain(ndjson_lines(synthetic_messages(count, chars), json.dumps)),
+        ),
+        measure(
+            "json",
+            lambda: drain(
+                json_object_chunks(
+                    {"conversation_id": 1},
+                    "messages",
+                    synthetic_messages(count, chars),
+                    json.dumps,
+                )
+            ),
+        ),
+    ]
+    if max(peaks) > args.max_stream_mb:
+        raise SystemExit(f"Streaming peak {max(peaks):.2f} MiB exceeds budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
 import streamlit as st
 from frontend.services.auth import AuthService
 from frontend.services.conversation import ConversationService
 from frontend.utils.logger import setup_logger
+from frontend.utils.message_history import MessageHistory
+from frontend.utils.session_cache import SessionCache
 
 logger = setup_logger(__name__)
 
+MESSAGES_PAGE_SIZE = 50
+SIDEBAR_PAGE_SIZE = int(os.getenv("FRONTEND_SIDEBAR_PAGE_SIZE", "20"))
+
+
+def truncate_title(title: str, max_length: int = 40) -> str:
+    return title if len(title) <= max_length else title[:max_length] + "..."
+
 
 class ChatApp:
     def __init__(self):
@@ -13,6 +26,7 @@ class ChatApp:
             st.session_state.logged_in = False
         if "token" not in st.session_state:
             st.session_state.token = None
+        self.cache = SessionCache()
 
     def run(self) -> None:
         if not st.session_state.logged_in:
@@ -50,40 +64,18 @@ class ChatApp:
 
     def show_conversation_page(self) -> None:
         try:
-            # Fetch the list of conversations
-            conversations = ConversationService.get_conversations(
-                st.session_state.token
-            )
-
-            if conversations:
-                # Store the conversations into the session state
-                st.session_state.conversations = conversations
-
-                # Function to truncate titles
-                def truncate_title(title, max_length=40):
-                    return (
-                        title
-                        if len(title) <= max_length
-                        else title[:max_length] + "..."
-                    )
-
-                # Display Conversations in sidebar
-                st.sidebar.title("Conversations")
+            # Display Conversations in sidebar
+            st.sidebar.title("Conversations")
 
-                # Button to create a new conversation
-                if st.sidebar.button("Create New Conversation"):
-                    self.create_new_conversation()
+            # Button to create a new conversation
+            if st.sidebar.button("Create New Conversation"):
+                self.create_new_conversation()
 
-                # Iterate over all conversations to display them
-                for conv in conversations:
-                    # Create a readable title with truncation if necessary
-                    title = f"Conversation {conv['id']} ({conv['created_at']})"
-                    truncated_title = truncate_title(title)
+            conversations = self.show_conversation_sidebar()
 
-                    # Use a button for each truncated conversation to handle selection
-                    if st.sidebar.button(truncated_title):
-                        # Set the selected conversation ID
-                        st.session_state.selected_conversation_id = conv["id"]
+            if conversations is not None:
+                # Store the conversations into the session state
+                st.session_state.conversations = conversations
 
                 # Load and display messages for the selected conversation
                 if "selected_conversation_id" in st.session_state:
@@ -100,10 +92,69 @@ class ChatApp:
             st.error("An error occurred while loading conversations.")
             logger.error(f"Exception: {ex}")
 
+    def show_conversation_sidebar(self) -> Optional[List[Dict[str, Any]]]:
+        """Lists the most recent conversations a page at a time.
+
+        The filter box and date are applied by the backend, and "Show more"
+        fetches the next page, so a rerun renders only what was asked for.
+        """
+        token = st.session_state.token
+        title_prefix = st.sidebar.text_input(
+            "Search conversations", placeholder="Title starts with..."
+        ).strip()
+        since = st.sidebar.date_input("Created since", value=None)
+        created_after = since.isoformat() if since else None
+
+        filters = (title_prefix, created_after)
+        if st.session_state.get("sidebar_filters") != filters:
+            st.session_state.sidebar_filters = filters
+            st.session_state.sidebar_pages = 1
+
+        conversations: List[Dict[str, Any]] = []
+        cursor = None
+        for _ in range(st.session_state.sidebar_pages):
+            page = self.cache.get_or_load(
+                ("conversations", token, title_prefix, created_after, cursor),
+                lambda cursor=cursor: ConversationService.list_conversations(
+                    token,
+                    limit=SIDEBAR_PAGE_SIZE,
+                    cursor=cursor,
+                    title_prefix=title_prefix,
+                    created_after=created_after,
+                ),
+            )
+            if page is None:
+                return None
+            conversations.extend(page["conversations"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        # Iterate over the loaded conversations to display them
+        for conv in conversations:
+            # Create a readable title with truncation if necessary
+            title = conv.get("title") or (
+                f"Conversation {conv['id']} ({conv['created_at']})"
+            )
+
+            # Use a button for each truncated conversation to handle selection
+            if st.sidebar.button(
+                truncate_title(title), key=f"conversation_{conv['id']}"
+            ):
+                # Set the selected conversation ID
+                st.session_state.selected_conversation_id = conv["id"]
+
+        if cursor and st.sidebar.button("Show more"):
+            st.session_state.sidebar_pages += 1
+            st.rerun()
+
+        return conversations
+
     def create_new_conversation(self) -> None:
         try:
             response = ConversationService.create_conversation(st.session_state.token)
             if response:
+                self.cache.invalidate_prefix(("conversations", st.session_state.token))
                 st.success("New conversation created successfully!")
                 st.rerun()  # Refresh to update the conversation list
             else:
@@ -115,11 +166,15 @@ class ChatApp:
     def load_messages(self) -> None:
         if "selected_conversation_id" in st.session_state:
             try:
-                # Fetch messages using the ConversationService
-                messages = ConversationService.get_messages(
-                    st.session_state.token, st.session_state.selected_conversation_id
+                # Fetch only messages newer than the ones already rendered
+                token = st.session_state.token
+                conversation_id = st.session_state.selected_conversation_id
+                history = self.cache.get_or_load(
+                    ("messages", token, conversation_id),
+                    lambda: self.sync_messages(token, conversation_id),
                 )
-                if messages:
+                if history:
+                    start = time.perf_counter()
                     # Implement CSS for fixed layout
                     st.markdown(
                         """
@@ -140,38 +195,72 @@ class ChatApp:
                         unsafe_allow_html=True,
                     )
                     st.write("Messages:")
-                    # Wrap messages in a scrollable container
+                    if (history.hidden_count or history.has_earlier) and st.button(
+                        "Load earlier messages"
+                    ):
+                        self.load_earlier_messages(token, conversation_id, history)
+
+                    # Render the visible window, oldest first, in one element
                     st.markdown(
-                        '<div class="message-container">', unsafe_allow_html=True
+                        f'<div class="message-container">{history.render()}</div>',
+                        unsafe_allow_html=True,
+                    )
+                    logger.debug(
+                        f"Rendered conversation {conversation_id} in "
+                        f"{(time.perf_counter() - start) * 1000:.1f} ms"
                     )
-
-                    # Reverse the order of messages for display
-                    for message in reversed(messages["messages"]):
-                        # Set border color based on role
-                        if message["role"] == "user":
-                            border_color = "#0288d1"  # Blue for user messages
-                        elif message["role"] == "assistant":
-                            border_color = "#7cb342"  # Green for assistant messages
-                        else:
-                            border_color = "#c2185b"  # Pink for other roles
-
-                        # Join content of each message for display
-                        content = " ".join(message["content"])
-                        message_html = f"""
-                        <div class="message-box" style="border: 2px solid {border_color};">
-                            <strong>{message['role']}:</strong> {content}
-                        </div>
-                        """
-                        # Use st.markdown with unsafe_allow_html=True to render each message
-                        st.markdown(message_html, unsafe_allow_html=True)
-                    # Close the scrollable message container
-                    st.markdown("</div>", unsafe_allow_html=True)
                 else:
                     st.error("Failed to load messages.")
             except Exception as ex:
                 st.error("An error occurred while loading messages.")
                 logger.error(f"Exception: {ex}")
 
+    def sync_messages(
+        self, token: str, conversation_id: int
+    ) -> Optional[MessageHistory]:
+        """Brings the stored history of a conversation up to date.
+
+        The first call fetches the latest page; later calls fetch only
+        messages newer than the last one already rendered.
+        """
+        histories = st.session_state.setdefault("message_histories", {})
+        history = histories.get((token, conversation_id))
+        if history is None or history.last_id is None:
+            response = ConversationService.get_messages(
+                token, conversation_id, limit=MESSAGES_PAGE_SIZE
+            )
+            if not response:
+                return None
+            history = MessageHistory(MESSAGES_PAGE_SIZE)
+            history.prepend_older(response["messages"])
+            histories[(token, conversation_id)] = history
+            return history
+
+        response = ConversationService.get_messages(
+            token, conversation_id, after=history.last_id
+        )
+        if not response:
+            return None
+        added = history.append_newer(response["messages"])
+        logger.debug(f"Appended {added} new messages to conversation {conversation_id}")
+        return history
+
+    def load_earlier_messages(
+        self, token: str, conversation_id: int, history: MessageHistory
+    ) -> None:
+        if history.hidden_count < history.page_size and history.has_earlier:
+            response = ConversationService.get_messages(
+                token,
+                conversation_id,
+                limit=MESSAGES_PAGE_SIZE,
+                before=history.oldest_id,
+            )
+            if response:
+                history.prepend_older(response["messages"])
+            else:
+                st.error("Failed to load earlier messages.")
+        history.show_earlier()
+
     def send_message(self) -> None:
         new_message = st.text_input(
             "Your message:", placeholder="Type your message here...", key="new_message"
@@ -179,15 +268,36 @@ class ChatApp:
 
         if st.button("Send"):
             try:
-                response = ConversationService.send_message(
-                    st.session_state.token,
-                    st.session_state.selected_conversation_id,
-                    new_message,  # Use the session state value
-                )
-                if response:
+                token = st.session_state.token
+                conversation_id = st.session_state.selected_conversation_id
+                final: Dict[str, Any] = {}
+
+                def reply_text() -> Iterator[str]:
+                    for event in ConversationService.stream_message(
+                        token, conversation_id, new_message
+                    ):
+                        if event["type"] == "delta":
+                            yield event["text"]
+                        else:
+                            final.update(event)
+
+                # Show the reply token by token while the assistant runs
+                st.write_stream(reply_text())
+
+                if final.get("type") == "done":
+                    # Append the final messages locally instead of refetching
+                    histories = st.session_state.get("message_histories", {})
+                    history = histories.get((token, conversation_id))
+                    if history is not None:
+                        history.append_newer(final["messages"])
+                    else:
+                        self.cache.invalidate(("messages", token, conversation_id))
+                    # The first message also sets the conversation's title
+                    self.cache.invalidate_prefix(("conversations", token))
                     st.rerun()
                 else:
                     st.error("Failed to send message.")
+                    logger.error(f"Streaming send failed: {final.get('error')}")
             except Exception as ex:
                 st.error("An error occurred while sending the message.")
                 logger.error(f"Exception: {ex}")
@@ -1,5 +1,6 @@
 import requests
 from typing import Dict, Any, Optional
+from frontend.utils.http import session
 from frontend.utils.logger import setup_logger
 from dotenv import load_dotenv
 import os
@@ -14,7 +15,7 @@ class AuthService:
     @classmethod
     def register(cls, email: str, password: str) -> Optional[Dict[str, Any]]:
         try:
-            response = requests.post(
+            response = session.post(
                 f"{cls.BASE_URL}/register", json={"email": email, "password": password}
             )
             response.raise_for_status()
@@ -26,7 +27,7 @@ class AuthService:
     @classmethod
     def login(cls, email: str, password: str) -> Optional[str]:
         try:
-            response = requests.post(
+            response = session.post(
                 f"{cls.BASE_URL}/login", json={"email": email, "password": password}
             )
             response.raise_for_status()
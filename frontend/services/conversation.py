@@ -1,5 +1,9 @@
+import json
 import requests
-from typing import Dict, Any, Optional
+from urllib.parse import urlencode
+from typing import Dict, Any, Iterator, Optional
+from frontend.utils.etag_cache import ETagCache
+from frontend.utils.http import ASSISTANT_READ_TIMEOUT, CONNECT_TIMEOUT, session
 from frontend.utils.logger import setup_logger
 from dotenv import load_dotenv
 import os
@@ -10,15 +14,55 @@ load_dotenv()
 
 class ConversationService:
     BASE_URL = os.getenv("BACKEND_URL")
+    _etag_cache = ETagCache()
 
     @classmethod
-    def get_conversations(cls, token: str) -> Optional[Dict[str, Any]]:
-        # Set token as 'token' in the cookies
-        cookies = {"token": token}
+    def _conditional_get(cls, token: str, path: str) -> Any:
+        """GETs ``path``, reusing the cached body when the server answers 304."""
+        key = (token, path)
+        cached = cls._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = session.get(
+            f"{cls.BASE_URL}{path}", headers=headers, cookies={"token": token}
+        )
+        if response.status_code == 304 and cached:
+            logger.debug(f"Not modified: {path}")
+            return cached[1]
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            cls._etag_cache.put(key, etag, body)
+        return body
+
+    @classmethod
+    def list_conversations(
+        cls,
+        token: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        title_prefix: Optional[str] = None,
+        created_after: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Fetches one page of conversations, newest first.
+
+        Returns ``{"conversations": [...], "next_cursor": ...}``.
+        """
+        params = {
+            key: value
+            for key, value in (
+                ("limit", limit),
+                ("cursor", cursor),
+                ("q", title_prefix),
+                ("created_after", created_after),
+            )
+            if value
+        }
+        path = "/conversations"
+        if params:
+            path = f"{path}?{urlencode(params)}"
         try:
-            response = requests.get(f"{cls.BASE_URL}/conversations", cookies=cookies)
-            response.raise_for_status()
-            return response.json()
+            return cls._conditional_get(token, path)
         except requests.RequestException as e:
             logger.error(f"Fetching conversations failed: {e}")
             return None
@@ -28,7 +72,7 @@ class ConversationService:
         # Set token as 'token' in the cookies
         cookies = {"token": token}
         try:
-            response = requests.post(f"{cls.BASE_URL}/conversations", cookies=cookies)
+            response = session.post(f"{cls.BASE_URL}/conversations", cookies=cookies)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -36,16 +80,25 @@ class ConversationService:
             return None
 
     @classmethod
-    def get_messages(cls, token: str, conversation_id: str) -> Optional[Dict[str, Any]]:
-        # Set token as 'token' in the cookies
-        cookies = {"token": token}
+    def get_messages(
+        cls,
+        token: str,
+        conversation_id: str,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Fetches messages newest first; ``after``/``before`` are message ids."""
+        params = {
+            key: value
+            for key, value in (("limit", limit), ("after", after), ("before", before))
+            if value is not None
+        }
+        path = f"/conversations/{conversation_id}/messages"
+        if params:
+            path = f"{path}?{urlencode(params)}"
         try:
-            response = requests.get(
-                f"{cls.BASE_URL}/conversations/{conversation_id}/messages",
-                cookies=cookies,
-            )
-            response.raise_for_status()
-            return response.json()
+            return cls._conditional_get(token, path)
         except requests.RequestException as e:
             logger.error(f"Fetching messages failed: {e}")
             return None
@@ -57,13 +110,43 @@ class ConversationService:
         # Set token as 'token' in the cookies
         cookies = {"token": token}
         try:
-            response = requests.post(
+            response = session.post(
                 f"{cls.BASE_URL}/conversations/{conversation_id}/messages",
                 json={"message": message},
                 cookies=cookies,
+                timeout=(CONNECT_TIMEOUT, ASSISTANT_READ_TIMEOUT),
             )
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             logger.error(f"Sending message failed: {e}")
             return None
+
+    @classmethod
+    def stream_message(
+        cls, token: str, conversation_id: str, message: str
+    ) -> Iterator[Dict[str, Any]]:
+        """Sends a message and yields the backend's server-sent events.
+
+        Events are ``{"type": "delta", "text": ...}`` while the reply is
+        generated, then ``{"type": "done", "messages": [...]}`` or
+        ``{"type": "error", "error": ...}``. Raises
+        ``requests.RequestException`` if the request itself fails.
+        """
+        response = session.post(
+            f"{cls.BASE_URL}/conversations/{conversation_id}/messages",
+            json={"message": message, "stream": True},
+            cookies={"token": token},
+            stream=True,
+            timeout=(CONNECT_TIMEOUT, ASSISTANT_READ_TIMEOUT),
+        )
+        with response:
+            response.raise_for_status()
+            event_type = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event_type = line[len("event:") :].strip()
+                elif line.startswith("data:") and event_type:
+                    data = json.loads(line[len("data:") :])
+                    yield {"type": event_type, **data}
+                    event_type = None
@@ -0,0 +1,32 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+CacheKey = Tuple[str, ...]
+
+
+class ETagCache:
+    """Thread-safe LRU of ``key -> (etag, body)`` for conditional GETs.
+
+    Shared by every Streamlit session in the process, so keys must include
+    the user's token.
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[Tuple[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, etag: str, body: Any) -> None:
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
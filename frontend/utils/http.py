@@ -0,0 +1,45 @@
+import os
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.getenv("BACKEND_POOL_SIZE", "32"))
+CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("BACKEND_READ_TIMEOUT", "30"))
+# Sending a message blocks until the assistant run finishes.
+ASSISTANT_READ_TIMEOUT = float(os.getenv("BACKEND_ASSISTANT_TIMEOUT", "300"))
+
+
+class BackendSession(requests.Session):
+    """``requests.Session`` with pooled keep-alive connections, default
+    timeouts and retries for idempotent methods."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        # The session is shared by every user of the Streamlit process, so it
+        # must never store a cookie (e.g. one user's login token) and replay
+        # it for another. Callers pass their own cookies per request.
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+# One session per Streamlit server process, shared across user sessions.
+session = BackendSession()
@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Optional, Set
+
+ROLE_BORDER_COLORS = {
+    "user": "#0288d1",  # Blue for user messages
+    "assistant": "#7cb342",  # Green for assistant messages
+}
+DEFAULT_BORDER_COLOR = "#c2185b"  # Pink for other roles
+
+
+def render_message(message: Dict[str, Any]) -> str:
+    """Renders one message as the HTML box shown in the chat."""
+    border_color = ROLE_BORDER_COLORS.get(message["role"], DEFAULT_BORDER_COLOR)
+    # Join content of each message for display
+    content = " ".join(message["content"])
+    return f"""
+    <div class="message-box" style="border: 2px solid {border_color};">
+        <strong>{message['role']}:</strong> {content}
+    </div>
+    """
+
+
+class MessageHistory:
+    """Messages of one conversation already fetched by the front end.
+
+    Kept oldest first with each message's HTML rendered once, so a rerun
+    only fetches and renders messages newer than ``last_id`` and the page
+    shows the latest ``visible`` of them.
+    """
+
+    def __init__(self, page_size: int) -> None:
+        self.page_size = page_size
+        self.visible = page_size
+        self.has_earlier = True
+        self._messages: List[Dict[str, Any]] = []
+        self._ids: Set[str] = set()
+        self._html: Optional[str] = None
+
+    @property
+    def last_id(self) -> Optional[str]:
+        return self._messages[-1]["id"] if self._messages else None
+
+    @property
+    def oldest_id(self) -> Optional[str]:
+        return self._messages[0]["id"] if self._messages else None
+
+    @property
+    def hidden_count(self) -> int:
+        return max(0, len(self._messages) - self.visible)
+
+    def append_newer(self, newest_first: List[Dict[str, Any]]) -> int:
+        """Appends messages from a newest-first page; returns how many were new."""
+        added = 0
+        for message in reversed(newest_first):
+            if message["id"] in self._ids:
+                continue
+            self._messages.append({**message, "html": render_message(message)})
+            self._ids.add(message["id"])
+            added += 1
+        if added:
+            self._html = None
+        return added
+
+    def prepend_older(self, newest_first: List[Dict[str, Any]]) -> None:
+        """Prepends a newest-first page of messages older than ``oldest_id``."""
+        older = [
+            {**message, "html": render_message(message)}
+            for message in reversed(newest_first)
+            if message["id"] not in self._ids
+        ]
+        self._messages[:0] = older
+        self._ids.update(message["id"] for message in older)
+        self.has_earlier = len(newest_first) >= self.page_size
+        self._html = None
+
+    def show_earlier(self) -> None:
+        self.visible += self.page_size
+        self._html = None
+
+    def render(self) -> str:
+        """Returns the HTML of the visible window, reusing it until it changes."""
+        if self._html is None:
+            window = self._messages[-self.visible :]
+            self._html = "".join(message["html"] for message in window)
+        return self._html
@@ -0,0 +1,71 @@
+import os
+import time
+from typing import Any, Callable, Dict, MutableMapping, Optional, Tuple
+
+import streamlit as st
+from frontend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_TTL = float(os.getenv("FRONTEND_CACHE_TTL", "30"))
+
+CacheKey = Tuple[Any, ...]
+
+
+class SessionCache:
+    """Per-session cache of backend responses, kept in ``st.session_state``.
+
+    Entries are dropped explicitly after writes that change them and
+    otherwise expire after ``ttl`` seconds, so reruns that change nothing
+    make no backend calls.
+    """
+
+    STATE_KEY = "_backend_cache"
+
+    def __init__(
+        self, state: Optional[MutableMapping[str, Any]] = None, ttl: float = DEFAULT_TTL
+    ) -> None:
+        self.state = st.session_state if state is None else state
+        self.ttl = ttl
+        if self.STATE_KEY not in self.state:
+            self.state[self.STATE_KEY] = {"entries": {}, "hits": 0, "misses": 0}
+
+    @property
+    def _store(self) -> Dict[str, Any]:
+        return self.state[self.STATE_KEY]
+
+    def get_or_load(self, key: CacheKey, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for ``key`` or calls ``loader``.
+
+        ``None`` (a failed load) is not cached; empty results are.
+        """
+        store = self._store
+        entry = store["entries"].get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            store["hits"] += 1
+            logger.debug(
+                f"Cache hit {key[0]} (hits={store['hits']}, misses={store['misses']})"
+            )
+            return entry[1]
+
+        store["misses"] += 1
+        logger.debug(
+            f"Cache miss {key[0]} (hits={store['hits']}, misses={store['misses']})"
+        )
+        value = loader()
+        if value is not None:
+            store["entries"][key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, key: CacheKey) -> None:
+        if self._store["entries"].pop(key, None) is not None:
+            logger.debug(f"Cache invalidated {key[0]}")
+
+    def invalidate_prefix(self, prefix: CacheKey) -> None:
+        """Drops every entry whose key starts with ``prefix``."""
+        entries = self._store["entries"]
+        stale = [key for key in entries if key[: len(prefix)] == prefix]
+        for key in stale:
+            del entries[key]
+        if stale:
+            logger.debug(f"Cache invalidated {len(stale)} {prefix[0]} entries")
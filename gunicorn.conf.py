@@ -0,0 +1,105 @@
+"""Gunicorn settings for the backend.
+
+Every value can be overridden through the environment, e.g.
+``WEB_CONCURRENCY=4 GUNICORN_THREADS=16 gunicorn -c gunicorn.conf.py wsgi:app``.
+
+``send_message`` holds a worker thread for the whole assistant run, so
+capacity is ``workers * threads`` concurrent requests. Workers are sized
+from CPU count (the Python-side work is small); threads are sized from the
+number of assistant runs expected to be in flight at once, so long sends
+never starve short GETs.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# "gthread" needs nothing beyond gunicorn. "gevent" works too once gevent is
+# installed; it monkey-patches sockets so psycopg2 must be made green as well.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+workers = int(
+    os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8)))
+)
+
+# Expected concurrent assistant runs across the whole server, plus headroom
+# for the short requests that must not queue behind them.
+_expected_inflight_runs = int(os.getenv("EXPECTED_INFLIGHT_RUNS", "32"))
+threads = int(
+    os.getenv(
+        "GUNICORN_THREADS",
+        str(max(4, -(-_expected_inflight_runs // workers) + 4)),
+    )
+)
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+# Assistant runs can take minutes; the worker heartbeat must outlive them.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+# On SIGTERM workers stop accepting and get this long to finish in-flight
+# runs before being killed.
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", str(timeout)))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Preloading imports the app once in the master and forks it, which saves
+# memory and startup time. The DB engine is created lazily, but if anything
+# touched it before the fork, its pooled sockets must not be shared with the
+# children, hence post_fork below.
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = os.getenv("GUNICORN_ERRORLOG", "-")
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+# Workers write Prometheus samples here so /metrics on any worker reports
+# the whole server. Must be set before the app imports prometheus_client.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "prometheus-multiproc"),
+)
+# Workers rotating one shared file would clobber each other's records on
+# rollover, so they log to stderr only unless LOG_FILE is set (use "{pid}"
+# in it for one file per worker).
+os.environ.setdefault("LOG_FILE", "")
+
+
+def on_starting(server):
+    # Samples left by a previous server would be summed into the new one.
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    from app.src.db import dispose_engine
+    from app.src.logging_setup import configure_logging
+
+    dispose_engine(close=False)
+    # With preload_app the log listener thread stayed in the master.
+    configure_logging()
+
+
+def worker_exit(server, worker):
+    from app.src.db import dispose_engine
+    from app.src.logging_setup import stop_logging
+    from app.src.provisioning import shutdown_pool
+    from app.src.run_metrics import flush
+
+    # Run metrics still queued in this worker are written before it exits.
+    flush()
+    # Hashing processes started by bulk user uploads.
+    shutdown_pool()
+    dispose_engine()
+    stop_logging()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
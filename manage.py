@@ -0,0 +1,327 @@
+import argparse
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from app.src.logging_setup import configure_logging
+
+logger = logging.getLogger("manage")
+
+
+def bootstrap_db(args: argparse.Namespace) -> None:
+    """Creates the database once; run `alembic upgrade head` afterwards."""
+    from app.src.db import create_database_if_not_exists
+
+    # A non-zero exit stops deploy scripts before `alembic upgrade`.
+    if not create_database_if_not_exists():
+        raise SystemExit("Database bootstrap failed")
+
+
+def batch_worker(args: argparse.Namespace) -> None:
+    """Processes uploaded batch jobs, resuming any whose worker died."""
+    from app.assistants.openai import get_assistant
+    from app.src.batch import run_worker
+
+    run_worker(
+        get_assistant,
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        once=args.once,
+    )
+
+
+def _find_user_id(email: str) -> int:
+    from app.models.user import User
+    from app.src.db import get_db
+
+    db = next(get_db())
+    try:
+        user = db.query(User).filter_by(email=email).first()
+    finally:
+        db.close()
+    if user is None:
+        raise SystemExit(f"No user with email {email}")
+    return user.id
+
+
+def export_user_conversations(args: argparse.Namespace) -> None:
+    """Writes a user's conversations and messages as NDJSON."""
+    from app.assistants.openai import get_assistant
+    from app.src.db import get_db
+    from app.src.transfer import export_records
+
+    user_id = _find_user_id(args.email)
+    db = next(get_db())
+    output = open(args.output, "w") if args.output != "-" else sys.stdout
+    try:
+        records = export_records(db, user_id, get_assistant(), args.concurrency)
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+    finally:
+        db.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+def import_user_conversations(args: argparse.Namespace) -> None:
+    """Loads an NDJSON export into a user's conversations."""
+    from app.src.db import get_db
+    from app.src.transfer import import_conversations, parse_conversations
+
+    user_id = _find_user_id(args.email)
+    db = next(get_db())
+    source = open(args.input, "rb") if args.input != "-" else sys.stdin.buffer
+    try:
+        counts = import_conversations(
+            db, user_id, parse_conversations(source), method=args.method
+        )
+    except ValueError as e:
+        db.rollback()
+        raise SystemExit(f"Import failed: {e}")
+    finally:
+        db.close()
+        if source is not sys.stdin.buffer:
+            source.close()
+    logger.info(
+        f"Imported {counts['imported']} ({counts['messages']} messages),"
+        f" skipped {counts['skipped']}, rejected {counts['rejected']}"
+    )
+
+
+def provision_users(args: argparse.Namespace) -> None:
+    """Creates users from a CSV or JSONL file, writing each row that was not
+    created as an NDJSON line."""
+    from app.src.db import get_db
+    from app.src.provisioning import (
+        PROVISION_BATCH_SIZE,
+        PROVISION_HASH_PROCESSES,
+        parse_users,
+        provision_users as provision,
+    )
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+    db = next(get_db())
+    source = open(args.input, "rb") if args.input != "-" else sys.stdin.buffer
+    try:
+        results = provision(
+            db,
+            parse_users(source, fmt),
+            batch_size=args.batch_size or PROVISION_BATCH_SIZE,
+            processes=args.processes or PROVISION_HASH_PROCESSES,
+        )
+        for result in results:
+            if "summary" in result:
+                logger.info(f"Provisioning finished: {result['summary']}")
+            else:
+                sys.stdout.write(json.dumps(result) + "\n")
+    except ValueError as e:
+        raise SystemExit(f"Provisioning failed: {e}")
+    finally:
+        db.close()
+        if source is not sys.stdin.buffer:
+            source.close()
+
+
+def search_backfill(args: argparse.Namespace) -> None:
+    """Indexes existing conversations for full-text search."""
+    from app.assistants.openai import get_assistant
+    from app.src.db import get_db
+    from app.src.search import backfill
+
+    user_id = _find_user_id(args.email) if args.email else None
+    db = next(get_db())
+    try:
+        indexed = backfill(
+            db,
+            get_assistant(),
+            user_id=user_id,
+            after_id=args.after_id,
+            concurrency=args.concurrency,
+        )
+    finally:
+        db.close()
+    logger.info(f"Search backfill indexed {indexed} messages")
+
+
+def semantic_index(args: argparse.Namespace) -> None:
+    """Embeds messages that are not in the semantic index yet."""
+    from app.src.db import get_db
+    from app.src.semantic import index_pending, rebuild, users_with_pending
+
+    db = next(get_db())
+    try:
+        if args.email:
+            user_ids = [_find_user_id(args.email)]
+        else:
+            user_ids = users_with_pending(db)
+        embed = rebuild if args.rebuild else index_pending
+        total = sum(embed(db, user_id) for user_id in user_ids)
+    finally:
+        db.close()
+    logger.info(f"Embedded {total} messages for {len(user_ids)} users")
+
+
+def lifecycle(args: argparse.Namespace) -> None:
+    """Archives idle conversations and deletes unneeded OpenAI threads."""
+    import time
+    from datetime import timedelta
+
+    from app.assistants.openai import get_assistant
+    from app.src.db import get_db
+    from app.src.lifecycle import (
+        ARCHIVE_AFTER_DAYS,
+        REMOTE_DELETE_AFTER_DAYS,
+        THREAD_GC_RATE,
+        run_lifecycle,
+    )
+
+    archive_days = args.archive_after_days
+    if archive_days is None:
+        archive_days = ARCHIVE_AFTER_DAYS
+    remote_days = args.delete_remote_after_days
+    if remote_days is None:
+        remote_days = REMOTE_DELETE_AFTER_DAYS
+
+    while True:
+        db = next(get_db())
+        try:
+            run_lifecycle(
+                db,
+                get_assistant(),
+                timedelta(days=archive_days) if archive_days else None,
+                timedelta(days=remote_days) if remote_days is not None else None,
+                snapshot=not args.no_snapshot,
+                rate=args.rate or THREAD_GC_RATE,
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Lifecycle pass failed: {str(e)}")
+            if not args.every:
+                raise
+        finally:
+            db.close()
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="LLM Connect management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bootstrap = subparsers.add_parser(
+        "bootstrap-db", help="Create the database if it does not exist"
+    )
+    bootstrap.set_defaults(func=bootstrap_db)
+
+    worker = subparsers.add_parser("batch-worker", help="Run the batch job worker")
+    worker.add_argument(
+        "--concurrency", type=int, default=8, help="Prompts in flight per job"
+    )
+    worker.add_argument(
+        "--poll-interval", type=float, default=5.0, help="Seconds between polls"
+    )
+    worker.add_argument(
+        "--once", action="store_true", help="Exit when no job is runnable"
+    )
+    worker.set_defaults(func=batch_worker)
+
+    export = subparsers.add_parser(
+        "export-conversations", help="Export a user's conversations as NDJSON"
+    )
+    export.add_argument("--email", required=True)
+    export.add_argument("--output", default="-", help="File path, or - for stdout")
+    export.add_argument(
+        "--concurrency", type=int, default=8, help="Threads fetched in parallel"
+    )
+    export.set_defaults(func=export_user_conversations)
+
+    load = subparsers.add_parser(
+        "import-conversations", help="Import an NDJSON export for a user"
+    )
+    load.add_argument("--email", required=True)
+    load.add_argument("--input", default="-", help="File path, or - for stdin")
+    load.add_argument("--method", choices=("copy", "insert"), default="copy")
+    load.set_defaults(func=import_user_conversations)
+
+    provision = subparsers.add_parser(
+        "provision-users", help="Create users in bulk from a CSV or JSONL file"
+    )
+    provision.add_argument("--input", default="-", help="File path, or - for stdin")
+    provision.add_argument(
+        "--format",
+        choices=("csv", "jsonl"),
+        help="Defaults to csv for .csv files, jsonl otherwise",
+    )
+    provision.add_argument(
+        "--batch-size", type=int, help="Rows per insert (PROVISION_BATCH_SIZE)"
+    )
+    provision.add_argument(
+        "--processes", type=int, help="Hashing processes (PROVISION_HASH_PROCESSES)"
+    )
+    provision.set_defaults(func=provision_users)
+
+    search = subparsers.add_parser(
+        "search-backfill", help="Index existing conversations for search"
+    )
+    search.add_argument("--email", help="Only index this user's conversations")
+    search.add_argument(
+        "--after-id", type=int, default=0, help="Resume after this conversation ID"
+    )
+    search.add_argument(
+        "--concurrency", type=int, default=8, help="Threads fetched in parallel"
+    )
+    search.set_defaults(func=search_backfill)
+
+    semantic = subparsers.add_parser(
+        "semantic-index", help="Embed messages missing from the semantic index"
+    )
+    semantic.add_argument("--email", help="Only index this user's messages")
+    semantic.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop and re-embed everything, e.g. after changing EMBEDDER",
+    )
+    semantic.set_defaults(func=semantic_index)
+
+    gc = subparsers.add_parser(
+        "lifecycle", help="Archive idle conversations and delete old threads"
+    )
+    gc.add_argument(
+        "--archive-after-days",
+        type=int,
+        help="Archive conversations idle this long (ARCHIVE_AFTER_DAYS); 0 disables",
+    )
+    gc.add_argument(
+        "--delete-remote-after-days",
+        type=int,
+        help="Delete OpenAI threads archived this long (REMOTE_DELETE_AFTER_DAYS)",
+    )
+    gc.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Do not copy messages locally before deleting a thread",
+    )
+    gc.add_argument(
+        "--rate", type=float, help="Upstream calls per second (THREAD_GC_RATE)"
+    )
+    gc.add_argument(
+        "--every", type=float, help="Repeat every N seconds instead of exiting"
+    )
+    gc.set_defaults(func=lifecycle)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    # Commands log to stderr only; LOG_FORMAT=text is easier to read by hand.
+    configure_logging(filename=None)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+from flask import Flask
+
+from app.src import metrics
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-token")
+    app = Flask(__name__)
+    metrics.init_metrics(app)
+    return app.test_client()
+
+
+def test_metrics_requires_token(client):
+    assert client.get("/metrics").status_code == 404
+    wrong = {"Authorization": "Bearer nope"}
+    assert client.get("/metrics", headers=wrong).status_code == 404
+
+    right = {"Authorization": "Bearer scrape-token"}
+    response = client.get("/metrics", headers=right)
+    assert response.status_code == 200
+    assert b"http_request_duration_seconds" in response.data
+
+
+def test_old_profiles_are_pruned(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "PROFILE_MAX_FILES", 2)
+    for age, name in enumerate(("c.html", "b.html", "a.html")):
+        path = tmp_path / name
+        path.write_text("")
+        os.utime(path, (age, age))
+
+    metrics._prune_profiles()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.html", "b.html"]
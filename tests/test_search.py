@@ -0,0 +1,135 @@
+"""Search against a migrated database; skipped unless ``DATABASE_URL`` is set.
+
+Everything is written in one transaction that is rolled back.
+"""
+import os
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("DATABASE_URL"), reason="needs a migrated DATABASE_URL"
+)
+
+
+@pytest.fixture
+def db():
+    from app.src.db import SessionLocal, get_engine
+
+    get_engine()
+    session = SessionLocal()
+    # The backfill commits; keep it inside the outer transaction.
+    session.begin_nested()
+    session.commit = session.flush
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def make_conversation(db):
+    from app.models.conversation_thread import ConversationThread
+    from app.models.user import User
+
+    user = User(email=f"search-{uuid.uuid4().hex}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    conversation = ConversationThread(
+        user_id=user.id, thread_id=f"thread_{uuid.uuid4().hex}", assistant_id="asst"
+    )
+    db.add(conversation)
+    db.flush()
+    return user, conversation
+
+
+def test_snippet_escapes_stored_markup(db):
+    from app.models.conversation_message import ConversationMessage
+    from app.src.search import search_messages
+
+    user, conversation = make_conversation(db)
+    db.add(
+        ConversationMessage(
+            user_id=user.id,
+            conversation_id=conversation.id,
+            role="user",
+            content='<script>alert("x")</script> <img src=x onerror=alert(1)> '
+            "pelican migration",
+        )
+    )
+    db.flush()
+
+    results, _ = search_messages(db, user.id, "pelican", limit=10)
+
+    assert len(results) == 1
+    snippet = results[0]["snippet"]
+    assert "<mark>pelican</mark>" in snippet
+    assert "<script>" not in snippet and "<img" not in snippet
+    assert "&lt;/script&gt;" in snippet
+
+
+def test_replace_keeps_embeddings_of_unchanged_messages(db):
+    from app.models.conversation_message import ConversationMessage
+    from app.src.search import replace_conversation_messages
+
+    user, conversation = make_conversation(db)
+    captured = ConversationMessage(
+        user_id=user.id,
+        conversation_id=conversation.id,
+        role="user",
+        content="Where do pelicans winter?",
+        embedded=True,
+    )
+    edited = ConversationMessage(
+        user_id=user.id,
+        conversation_id=conversation.id,
+        message_id="msg_2",
+        role="assistant",
+        content="Inland.",
+        embedded=True,
+    )
+    gone = ConversationMessage(
+        user_id=user.id,
+        conversation_id=conversation.id,
+        message_id="msg_0",
+        role="user",
+        content="Hello",
+        embedded=True,
+    )
+    db.add_all([captured, edited, gone])
+    db.flush()
+    upstream = [
+        {
+            "id": "msg_1",
+            "role": "user",
+            "created_at": 1767312000,
+            "content": ["Where do pelicans winter?"],
+        },
+        {
+            "id": "msg_2",
+            "role": "assistant",
+            "created_at": 1767312001,
+            "content": ["Along the coast."],
+        },
+        {
+            "id": "msg_3",
+            "role": "user",
+            "created_at": 1767312002,
+            "content": ["Thanks"],
+        },
+    ]
+
+    assert replace_conversation_messages(db, user.id, conversation.id, upstream) == 3
+
+    db.expire_all()
+    rows = {
+        row.message_id: row
+        for row in db.query(ConversationMessage).filter_by(
+            conversation_id=conversation.id
+        )
+    }
+    assert set(rows) == {"msg_1", "msg_2", "msg_3"}
+    assert (rows["msg_1"].id, rows["msg_1"].embedded) == (captured.id, True)
+    assert (rows["msg_2"].id, rows["msg_2"].embedded) == (edited.id, False)
+    assert rows["msg_2"].content == "Along the coast."
+    assert rows["msg_3"].embedded is False
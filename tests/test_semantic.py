@@ -0,0 +1,75 @@
+"""Semantic search against a migrated database; skipped unless
+``DATABASE_URL`` is set.
+
+Everything is written in one transaction that is rolled back.
+"""
+import os
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("DATABASE_URL"), reason="needs a migrated DATABASE_URL"
+)
+
+
+@pytest.fixture
+def db():
+    from app.src.db import SessionLocal, get_engine
+
+    get_engine()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def test_dead_vectors_do_not_hide_live_matches(db, monkeypatch, tmp_path):
+    from app.models.conversation_message import ConversationMessage
+    from app.models.conversation_thread import ConversationThread
+    from app.models.user import User
+    from app.src import semantic
+    from app.src.embeddings import HashingEmbedder
+    from app.src.vector_index import VectorIndex
+
+    embedder = HashingEmbedder(dimensions=64)
+    index = VectorIndex(embedder.name, embedder.dimensions, root=str(tmp_path))
+    monkeypatch.setattr(semantic, "get_embedder", lambda: embedder)
+    monkeypatch.setattr(semantic, "get_index", lambda: index)
+
+    user = User(email=f"semantic-{uuid.uuid4().hex}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    conversation = ConversationThread(
+        user_id=user.id, thread_id=f"thread_{uuid.uuid4().hex}", assistant_id="asst"
+    )
+    db.add(conversation)
+    db.flush()
+    message = ConversationMessage(
+        user_id=user.id,
+        conversation_id=conversation.id,
+        role="user",
+        content="pelican migration routes",
+    )
+    db.add(message)
+    db.flush()
+
+    # Vectors of deleted rows that match the query better than any live one.
+    dead = 3 * semantic.CANDIDATES_PER_RESULT
+    with index.lock(user.id):
+        index.append(
+            user.id,
+            embedder.embed(["pelican migration"] * dead),
+            [(-row, conversation.id) for row in range(1, dead + 1)],
+        )
+        index.append(
+            user.id,
+            embedder.embed([message.content]),
+            [(message.id, conversation.id)],
+        )
+
+    results = semantic.semantic_search(db, user.id, "pelican migration", limit=1)
+
+    assert [result["conversation_id"] for result in results] == [conversation.id]
@@ -0,0 +1,29 @@
+from frontend.utils.session_cache import SessionCache
+
+
+def counting_loader(value):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return value
+
+    return load, calls
+
+
+def test_empty_result_is_cached_within_ttl():
+    cache = SessionCache(state={}, ttl=60)
+    load, calls = counting_loader([])
+
+    assert cache.get_or_load(("conversations", "token"), load) == []
+    assert cache.get_or_load(("conversations", "token"), load) == []
+    assert len(calls) == 1
+
+
+def test_failed_load_is_not_cached():
+    cache = SessionCache(state={}, ttl=60)
+    load, calls = counting_loader(None)
+
+    cache.get_or_load(("messages", "token", 1), load)
+    cache.get_or_load(("messages", "token", 1), load)
+    assert len(calls) == 2
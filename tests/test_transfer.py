@@ -0,0 +1,95 @@
+"""Import against a migrated database; skipped unless ``DATABASE_URL`` is set.
+
+Everything is written in one transaction that is rolled back.
+"""
+import json
+import os
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("DATABASE_URL"), reason="needs a migrated DATABASE_URL"
+)
+
+
+@pytest.fixture
+def db():
+    from app.src.db import SessionLocal, get_engine
+
+    get_engine()
+    session = SessionLocal()
+    # import_conversations commits; keep it inside the outer transaction.
+    session.begin_nested()
+    session.commit = session.flush
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+class LocalOnlyAssistant:
+    def iter_thread_messages(self, thread_id):
+        raise AssertionError("threads deleted upstream are exported locally")
+
+
+@pytest.mark.parametrize("method", ["copy", "insert"])
+def test_import_restores_what_export_wrote(db, method):
+    from app.models.thread_deletion import ThreadDeletion
+    from app.models.user import User
+    from app.src.transfer import (
+        export_records,
+        import_conversations,
+        parse_conversations,
+    )
+
+    user = User(email=f"transfer-{uuid.uuid4().hex}@example.com", password_hash="x")
+    db.add(user)
+    queued = f"thread_{uuid.uuid4().hex}"
+    db.add(ThreadDeletion(thread_id=queued))
+    db.flush()
+    record = {
+        "thread_id": f"thread_{uuid.uuid4().hex}",
+        "assistant_id": "asst",
+        "title": "Pelicans",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "status": "archived",
+        "last_activity_at": "2026-01-02T00:00:00+00:00",
+        "archived_at": None,
+        "remote_deleted_at": "2026-03-01T00:00:00+00:00",
+        "messages": [
+            {
+                "id": "msg_1",
+                "role": "user",
+                "created_at": 1767312000,
+                "content": ["Where do pelicans winter?"],
+            },
+            {
+                "id": "msg_2",
+                "role": "assistant",
+                "created_at": 1767312001,
+                "content": ["Along the coast."],
+            },
+        ],
+    }
+    lines = [
+        json.dumps(record).encode(),
+        json.dumps({**record, "thread_id": queued, "messages": []}).encode(),
+    ]
+
+    counts = import_conversations(db, user.id, parse_conversations(lines), method)
+
+    assert counts == {"imported": 1, "skipped": 0, "rejected": 1, "messages": 2}
+    [exported] = export_records(db, user.id, LocalOnlyAssistant())
+    assert exported["archived_at"] is not None
+    assert exported["messages"] == record["messages"]
+    assert {
+        key: value
+        for key, value in exported.items()
+        if key not in ("archived_at", "messages")
+    } == {
+        key: value
+        for key, value in record.items()
+        if key not in ("archived_at", "messages")
+    }
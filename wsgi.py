@@ -0,0 +1,22 @@
+"""WSGI entry point for production servers: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+``app.py`` shares its name with the ``app`` package, so ``gunicorn app:app``
+would import the package instead. Load the module by path under a distinct
+name and re-export the Flask application.
+"""
+import importlib.util
+import os
+import sys
+
+_APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+_MODULE_NAME = "llm_connect_app"
+
+if _MODULE_NAME in sys.modules:
+    _module = sys.modules[_MODULE_NAME]
+else:
+    _spec = importlib.util.spec_from_file_location(_MODULE_NAME, _APP_PATH)
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[_MODULE_NAME] = _module
+    _spec.loader.exec_module(_module)
+
+app = _module.app